@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+
+def _cost(name, default):
+    return getattr(settings, 'PASSWORD_HASHING_COST', {}).get(name, default)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 with the iteration count taken from PASSWORD_HASHING_COST['PBKDF2_ITERATIONS'].
+    Keeps Django's 'pbkdf2_sha256' algorithm name, so existing hashes still verify and are
+    re-encoded at the new count on the user's next successful login.
+    """
+    @property
+    def iterations(self):
+        return _cost('PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    scrypt with N, r and p taken from PASSWORD_HASHING_COST (SCRYPT_N, SCRYPT_R, SCRYPT_P).
+    Memory-hard, so it buys more resistance to GPU cracking per CPU-second than PBKDF2.
+    """
+    @property
+    def work_factor(self):
+        return _cost('SCRYPT_N', ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return _cost('SCRYPT_R', ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return _cost('SCRYPT_P', ScryptPasswordHasher.parallelism)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with time/memory cost taken from PASSWORD_HASHING_COST
+    (ARGON2_TIME_COST, ARGON2_MEMORY_COST in KiB, ARGON2_PARALLELISM).
+    Needs the argon2-cffi package.
+    """
+    @property
+    def time_cost(self):
+        return _cost('ARGON2_TIME_COST', Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return _cost('ARGON2_MEMORY_COST', Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return _cost('ARGON2_PARALLELISM', Argon2PasswordHasher.parallelism)
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.hashers import (
+    TunedArgon2PasswordHasher,
+    TunedPBKDF2PasswordHasher,
+    TunedScryptPasswordHasher,
+)
+
+POLICIES = {
+    'pbkdf2': TunedPBKDF2PasswordHasher,
+    'scrypt': TunedScryptPasswordHasher,
+    'argon2': TunedArgon2PasswordHasher,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure password verification cost under each hasher policy, using the costs in "
+        "PASSWORD_HASHING_COST. A login does one verify, so 1 / verify time is the number "
+        "of logins a single core can check per second."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=10, help='Verifications per policy (default 10).')
+
+    def handle(self, *args, **options):
+        rounds = options['rounds']
+        for policy, hasher_class in POLICIES.items():
+            hasher = hasher_class()
+            try:
+                encoded = hasher.encode('correct horse battery staple', hasher.salt())
+            except ValueError as exc:
+                # Argon2 without argon2-cffi installed
+                self.stdout.write(f"{policy:<8} skipped: {exc}")
+                continue
+            start = time.perf_counter()
+            for _ in range(rounds):
+                hasher.verify('correct horse battery staple', encoded)
+            per_login = (time.perf_counter() - start) / rounds
+            params = {k: v for k, v in hasher.decode(encoded).items() if k not in ('algorithm', 'hash', 'salt')}
+            self.stdout.write(
+                f"{policy:<8} {per_login * 1000:8.1f} ms/login  {1 / per_login:8.1f} logins/s/core  {params}"
+            )
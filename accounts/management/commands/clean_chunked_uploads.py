@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import ChunkedUpload, chunked_upload_expiry
+from accounts.uploads import upload_dir
+
+
+class Command(BaseCommand):
+    help = (
+        "Remove chunked uploads older than CHUNKED_UPLOAD_EXPIRY, and partial files "
+        "left behind without an upload (e.g. after a crash)."
+    )
+
+    def handle(self, *args, **options):
+        removed, _ = ChunkedUpload.objects.expired().discard()
+        known = {f'{pk}.part' for pk in ChunkedUpload.objects.values_list('pk', flat=True)}
+        cutoff = time.time() - chunked_upload_expiry().total_seconds()
+        orphans = 0
+        for path in upload_dir().glob('*.part'):
+            if path.name not in known and path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                orphans += 1
+        self.stdout.write(f'{removed} expired upload(s) and {orphans} orphaned partial file(s) removed.')
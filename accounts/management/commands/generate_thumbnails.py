@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import CustomUser
+from accounts.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Build missing profile picture thumbnails (e.g. after adding a size to PROFILE_PIC_THUMBNAIL_SIZES)."
+
+    def handle(self, *args, **options):
+        names = (
+            CustomUser.objects.exclude(profile_pic='').exclude(profile_pic__isnull=True)
+            .values_list('profile_pic', flat=True).distinct().iterator()
+        )
+        done = 0
+        for name in names:
+            try:
+                generate_thumbnails(name)
+                done += 1
+            except (OSError, ValueError) as exc:
+                self.stderr.write(f"{name}: {exc}")
+        self.stdout.write(f"Checked thumbnails for {done} image(s).")
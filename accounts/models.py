@@ -1,11 +1,105 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 # Create your models here.
 from django.contrib.auth.models import AbstractUser
 
+from .storage import get_profile_pic_storage
+from .uploads import upload_dir
+
 class CustomUser(AbstractUser):
     bio = models.TextField(blank=True, null=True)
-    profile_pic = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    profile_pic = models.ImageField(
+        upload_to='profile_pics/', storage=get_profile_pic_storage, blank=True, null=True,
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored picture so a replaced one can be released on save
+        # without another query (see accounts/signals.py).
+        instance._loaded_profile_pic = instance.__dict__.get('profile_pic')
+        return instance
+
+    def profile_pic_blob_name(self, filename, content):
+        """
+        The name `content` would be stored under as this user's picture. Equal to
+        the stored name when it is the picture the user already has.
+        """
+        field = self._meta.get_field('profile_pic')
+        return field.storage.blob_name(field.generate_filename(self, filename), field.storage.content_digest(content))
+
+    def has_profile_pic(self, filename, content):
+        return self.profile_pic_blob_name(filename, content) == getattr(self, '_loaded_profile_pic', None)
 
     def __str__(self):
         return self.username
+
+
+def chunked_upload_expiry():
+    return timedelta(seconds=getattr(settings, 'CHUNKED_UPLOAD_EXPIRY', 24 * 3600))
+
+
+class ChunkedUploadQuerySet(models.QuerySet):
+    def expired(self):
+        return self.filter(created_at__lt=timezone.now() - chunked_upload_expiry())
+
+    def discard(self):
+        """
+        Delete these uploads and their partial files.
+        """
+        for upload in self:
+            upload.part_path().unlink(missing_ok=True)
+        return self.delete()
+
+
+class ChunkedUpload(models.Model):
+    """
+    A resumable profile picture upload, sent as a sequence of chunks.
+    - offset: number of bytes received and verified so far; the next chunk must start here.
+    - size: total size announced by the client when the upload was started.
+    The bytes themselves live in a partial file under CHUNKED_UPLOAD_DIR (see part_path).
+    Uploads not completed within CHUNKED_UPLOAD_EXPIRY are refused and removed, by the
+    views or by `manage.py clean_chunked_uploads`.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='chunked_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ChunkedUploadQuerySet.as_manager()
+
+    def part_path(self):
+        return upload_dir() / f'{self.id}.part'
+
+    @property
+    def is_complete(self):
+        return self.offset == self.size
+
+    @property
+    def is_expired(self):
+        return self.created_at < timezone.now() - chunked_upload_expiry()
+
+    def __str__(self):
+        return f'{self.filename} ({self.offset}/{self.size}) for {self.user}'
+
+
+class StoredBlob(models.Model):
+    """
+    Reference count for a file in the content-addressed profile picture storage.
+    - name: storage name, e.g. 'profile_pics/ab/ab12...ef.jpg' (the hash is in the name).
+    - refcount: number of saved references; the file is deleted when it drops to zero.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} x{self.refcount}'
@@ -0,0 +1,56 @@
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import CustomUser
+from .storage import profile_pic_storage
+from .thumbnails import enqueue_thumbnails, thumbnail_name, thumbnail_sizes
+
+
+def release_profile_pic(name):
+    """
+    Drop one reference to a stored picture; once nobody uses it, remove its thumbnails too.
+    """
+    if profile_pic_storage.release(name):
+        for size in thumbnail_sizes():
+            default_storage.delete(thumbnail_name(name, size))
+
+
+@receiver(pre_save, sender=CustomUser)
+def keep_unchanged_profile_pic(sender, instance, **kwargs):
+    """
+    Uploading the picture a user already has would store it again and take a second
+    reference, which the post_save receiver below (seeing the same name) never
+    releases. Keep the stored name instead, so nothing is saved. Code that saves
+    the file itself first (profile_pic.save(..., save=False)) must check
+    has_profile_pic() beforehand, as the chunked upload view does.
+    """
+    pic = instance.profile_pic
+    if pic and not pic._committed and instance.has_profile_pic(pic.name, pic.file):
+        instance.profile_pic = instance._loaded_profile_pic
+
+
+@receiver(post_save, sender=CustomUser)
+def queue_profile_pic_thumbnails(sender, instance, update_fields=None, **kwargs):
+    """
+    After a profile picture is saved, build its thumbnails in the background once the
+    transaction commits, and release the picture it replaced. Saves that cannot touch
+    profile_pic (e.g. the last_login update on every login) are ignored.
+    """
+    if update_fields is not None and 'profile_pic' not in update_fields:
+        return
+    name = instance.profile_pic.name if instance.profile_pic else None
+    previous = getattr(instance, '_loaded_profile_pic', None)
+    instance._loaded_profile_pic = name
+    if previous and previous != name:
+        transaction.on_commit(lambda: release_profile_pic(previous))
+    if name:
+        transaction.on_commit(lambda: enqueue_thumbnails(name))
+
+
+@receiver(post_delete, sender=CustomUser)
+def release_deleted_users_profile_pic(sender, instance, **kwargs):
+    if instance.profile_pic:
+        name = instance.profile_pic.name
+        transaction.on_commit(lambda: release_profile_pic(name))
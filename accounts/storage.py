@@ -0,0 +1,97 @@
+import hashlib
+import os
+import posixpath
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each file under the SHA-256 of its content, with a refcount per file.
+
+    - 'profile_pics/me.jpg' is saved as 'profile_pics/ab/ab12...ef.jpg'; the directory
+      from upload_to is kept as a prefix and the extension as a suffix.
+    - Saving content that is already stored writes nothing and just bumps the refcount,
+      so identical uploads share one file (accounts/signals.py keeps a user's re-upload
+      of their current picture from taking a second reference).
+    - delete() drops one reference; the file goes away when the last one does.
+    - Both lock the refcount row, and the increment is part of the caller's transaction,
+      so a save that is rolled back takes no reference and a concurrent release can't
+      remove a file that a save has just decided to reuse.
+    - A name never changes meaning, so its URL can be cached forever (see the media
+      route in django_blog/urls.py).
+    """
+    def __init__(self, **kwargs):
+        # Overwriting is only ever with identical bytes, so two concurrent saves of the
+        # same content are harmless and need no name de-duplication.
+        kwargs.setdefault('allow_overwrite', True)
+        super().__init__(**kwargs)
+
+    @staticmethod
+    def blob_model():
+        return apps.get_model('accounts', 'StoredBlob')
+
+    @staticmethod
+    def content_digest(content):
+        # Remembered on the file: the pre_save check and save() both need it.
+        if getattr(content, '_sha256', None) is None:
+            digest = hashlib.sha256()
+            for chunk in content.chunks():
+                digest.update(chunk)
+            content.seek(0)
+            content._sha256 = digest.hexdigest()
+        return content._sha256
+
+    def blob_name(self, name, digest):
+        directory, filename = posixpath.split(name)
+        ext = posixpath.splitext(filename)[1].lower()
+        return posixpath.join(directory, digest[:2], f'{digest}{ext}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.blob_name(name, self.content_digest(content))
+
+        StoredBlob = self.blob_model()
+        with transaction.atomic():
+            blob, _ = StoredBlob.objects.select_for_update().get_or_create(
+                name=name, defaults={'size': content.size, 'refcount': 0},
+            )
+            if not os.path.exists(self.path(name)):
+                name = super().save(name, content, max_length=max_length)
+            StoredBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+        return name
+
+    def release(self, name):
+        """
+        Drop one reference to `name`. Returns True if that was the last one and the
+        file was removed. Files stored before this backend (no refcount row) are
+        treated as having a single reference.
+        """
+        StoredBlob = self.blob_model()
+        with transaction.atomic():
+            blob = StoredBlob.objects.select_for_update().filter(name=name).first()
+            if blob is not None and blob.refcount > 1:
+                StoredBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') - 1)
+                return False
+            if blob is not None:
+                blob.delete()
+            super().delete(name)
+        return True
+
+    def delete(self, name):
+        self.release(name)
+
+
+profile_pic_storage = ContentAddressedStorage()
+
+
+def get_profile_pic_storage():
+    # Referenced by CustomUser.profile_pic (a callable keeps the storage out of migrations)
+    return profile_pic_storage
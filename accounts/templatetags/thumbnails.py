@@ -0,0 +1,25 @@
+from django import template
+from django.core.files.storage import default_storage
+
+from accounts.thumbnails import closest_size, enqueue_thumbnails, thumbnail_name
+
+register = template.Library()
+
+
+@register.simple_tag
+def thumbnail_url(image, size=128):
+    """
+    URL of a cached WebP derivative of `image` no larger than `size` pixels.
+
+    Usage: {% load thumbnails %}<img src="{% thumbnail_url user.profile_pic 128 %}">
+
+    Until the background worker has written the derivative, the original URL is
+    returned; generation is queued once, not again on every render.
+    """
+    if not image:
+        return ''
+    name = thumbnail_name(image.name, closest_size(int(size)))
+    if default_storage.exists(name):
+        return default_storage.url(name)
+    enqueue_thumbnails(image.name)
+    return image.url
@@ -1,3 +1,295 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import transaction
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from django_blog import settings as project_settings
+
+from .models import ChunkedUpload, StoredBlob
+from . import thumbnails
+from .thumbnails import thumbnail_name
+from .uploads import fcntl, locked_part
+
+FAST_HASHERS = [
+    'accounts.hashers.TunedScryptPasswordHasher',
+    'accounts.hashers.TunedPBKDF2PasswordHasher',
+]
+
+
+@override_settings(
+    PASSWORD_HASHERS=FAST_HASHERS,
+    PASSWORD_HASHING_COST={'PBKDF2_ITERATIONS': 1000, 'SCRYPT_N': 2 ** 10, 'SCRYPT_R': 8, 'SCRYPT_P': 1},
+)
+class PasswordHasherPolicyTests(TestCase):
+    def login(self):
+        return self.client.post('/accounts/login/', {'username': 'reader', 'password': 'pass-1234'})
+
+    def test_login_rehashes_old_pbkdf2_password_with_scrypt(self):
+        user = get_user_model().objects.create(
+            username='reader', password=make_password('pass-1234', hasher='pbkdf2_sha256'),
+        )
+        self.assertEqual(self.login().status_code, 302)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$1024$'))
+
+    def test_login_accepts_django_default_hashes(self):
+        with self.settings(PASSWORD_HASHERS=project_settings.PASSWORD_HASHERS):
+            user = get_user_model().objects.create(
+                username='reader', password=make_password('pass-1234', hasher='pbkdf2_sha1'),
+            )
+            self.assertEqual(self.login().status_code, 302)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$1024$'))
+
+    def test_login_rehashes_when_the_cost_changes(self):
+        user = get_user_model().objects.create_user(username='reader', password='pass-1234')
+        with self.settings(PASSWORD_HASHING_COST={'SCRYPT_N': 2 ** 11, 'SCRYPT_R': 8, 'SCRYPT_P': 1}):
+            self.assertEqual(self.login().status_code, 302)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$2048$'))
+
+
+def make_image(size=(800, 600)):
+    buffer = BytesIO()
+    Image.new('RGB', size, 'teal').save(buffer, 'JPEG')
+    return SimpleUploadedFile('me.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+class ProfilePicThumbnailTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        overrides = override_settings(
+            MEDIA_ROOT=self.media_root, THUMBNAIL_ASYNC=False, PROFILE_PIC_THUMBNAIL_SIZES=(64, 128),
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def test_thumbnails_are_built_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = get_user_model().objects.create_user(username='pic', password='x', profile_pic=make_image())
+        for size in (64, 128):
+            with default_storage.open(thumbnail_name(user.profile_pic.name, size)) as f:
+                thumb = Image.open(f)
+                self.assertEqual(thumb.format, 'WEBP')
+                self.assertEqual(max(thumb.size), size)
+
+    def test_template_tag_returns_closest_cached_derivative(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = get_user_model().objects.create_user(username='pic', password='x', profile_pic=make_image())
+        url = Template('{% load thumbnails %}{% thumbnail_url pic 100 %}').render(Context({'pic': user.profile_pic}))
+        self.assertTrue(url.endswith('thumbnails/128/' + user.profile_pic.name.rsplit('.', 1)[0] + '.webp'))
+
+    @override_settings(THUMBNAIL_ASYNC=True)
+    def test_missing_thumbnails_are_queued_once_and_failures_are_not_retried(self):
+        with patch.object(thumbnails._executor, 'submit') as submit:
+            thumbnails.enqueue_thumbnails('profile_pics/gone.jpg')
+            thumbnails.enqueue_thumbnails('profile_pics/gone.jpg')
+            self.assertEqual(submit.call_count, 1)
+        with self.assertLogs('accounts.thumbnails', 'ERROR'):
+            thumbnails._generate_logged('profile_pics/gone.jpg')  # the file doesn't exist
+        with patch.object(thumbnails._executor, 'submit') as submit:
+            thumbnails.enqueue_thumbnails('profile_pics/gone.jpg')
+            submit.assert_not_called()
+        thumbnails._failed.clear()
+
+    def test_rebuilt_thumbnails_replace_the_old_file(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = get_user_model().objects.create_user(username='pic', password='x', profile_pic=make_image())
+        name = thumbnail_name(user.profile_pic.name, 64)
+        thumbnails._save_over(name, SimpleUploadedFile('x', b'again'))
+        folder, filename = name.rsplit('/', 1)
+        self.assertEqual(default_storage.listdir(folder)[1], [filename])
+        with default_storage.open(name) as f:
+            self.assertEqual(f.read(), b'again')
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        overrides = override_settings(
+            MEDIA_ROOT=f'{self.tmp}/media', CHUNKED_UPLOAD_DIR=f'{self.tmp}/parts',
+            CHUNKED_UPLOAD_CHUNK_SIZE=1024, THUMBNAIL_ASYNC=False,
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.user = get_user_model().objects.create_user(username='pic', password='x')
+        self.client.force_login(self.user)
+        self.data = make_image().read()
+
+    def start(self):
+        resp = self.client.post('/accounts/uploads/', {'filename': '../me.jpg', 'size': len(self.data)})
+        self.assertEqual(resp.status_code, 201)
+        return resp.json()['id']
+
+    def send(self, upload_id, offset, chunk, checksum=None):
+        return self.client.generic(
+            'PATCH', f'/accounts/uploads/{upload_id}/', chunk, content_type='application/octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset),
+            HTTP_UPLOAD_CHECKSUM=checksum or hashlib.sha256(chunk).hexdigest(),
+        )
+
+    def test_chunks_resume_and_attach(self):
+        upload_id = self.start()
+        offset = 0
+        while offset < len(self.data):
+            chunk = self.data[offset:offset + 1024]
+            # a corrupted chunk is rejected and leaves the offset where it was
+            self.assertEqual(self.send(upload_id, offset, chunk, checksum='0' * 64).status_code, 400)
+            resumed = self.client.get(f'/accounts/uploads/{upload_id}/').json()['offset']
+            self.assertEqual(resumed, offset)
+            self.assertEqual(self.send(upload_id, offset, chunk).status_code, 200)
+            offset += len(chunk)
+
+        resp = self.client.post(f'/accounts/uploads/{upload_id}/complete/')
+        self.assertEqual(resp.status_code, 200)
+        self.user.refresh_from_db()
+        digest = hashlib.sha256(self.data).hexdigest()
+        self.assertEqual(self.user.profile_pic.name, f'profile_pics/{digest[:2]}/{digest}.jpg')
+        with self.user.profile_pic.open('rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertFalse(ChunkedUpload.objects.exists())
+
+    def test_out_of_order_chunk_is_a_conflict(self):
+        upload_id = self.start()
+        resp = self.send(upload_id, 1024, self.data[1024:2048])
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.json()['offset'], 0)
+
+    def test_non_image_is_rejected_on_complete(self):
+        self.data = b'not an image' * 10
+        upload_id = self.start()
+        self.send(upload_id, 0, self.data)
+        self.assertEqual(self.client.post(f'/accounts/uploads/{upload_id}/complete/').status_code, 400)
+
+    def test_decompression_bomb_is_rejected_on_complete(self):
+        upload_id = self.start()
+        for offset in range(0, len(self.data), 1024):
+            self.send(upload_id, offset, self.data[offset:offset + 1024])
+        with patch.object(Image, 'MAX_IMAGE_PIXELS', 10):
+            resp = self.client.post(f'/accounts/uploads/{upload_id}/complete/')
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(ChunkedUpload.objects.exists())
+
+    @skipUnless(fcntl, 'chunk writes are locked with fcntl.flock')
+    def test_chunk_writes_hold_the_part_lock(self):
+        upload = ChunkedUpload.objects.get(pk=self.start())
+        with locked_part(upload.part_path()):
+            with open(upload.part_path(), 'rb') as other, self.assertRaises(BlockingIOError):
+                fcntl.flock(other, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def test_expired_uploads_are_refused_and_cleaned_up(self):
+        upload_id = self.start()
+        self.send(upload_id, 0, self.data[:1024])
+        ChunkedUpload.objects.update(created_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(self.send(upload_id, 1024, self.data[1024:2048]).status_code, 410)
+        self.assertFalse(ChunkedUpload.objects.exists())
+        self.assertEqual(list(Path(self.tmp, 'parts').glob('*.part')), [])
+
+        orphan = Path(self.tmp, 'parts', 'abandoned.part')
+        orphan.write_bytes(b'x')
+        os.utime(orphan, (0, 0))
+        call_command('clean_chunked_uploads', stdout=StringIO())
+        self.assertFalse(orphan.exists())
+
+    @override_settings(CHUNKED_UPLOAD_MAX_OPEN=2)
+    def test_open_uploads_per_user_are_capped(self):
+        first = self.start()
+        self.start()
+        resp = self.client.post('/accounts/uploads/', {'filename': 'me.jpg', 'size': len(self.data)})
+        self.assertEqual(resp.status_code, 429)
+        ChunkedUpload.objects.filter(pk=first).update(created_at=timezone.now() - timedelta(days=2))
+        self.start()
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        overrides = override_settings(MEDIA_ROOT=self.media_root, THUMBNAIL_ASYNC=False)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.data = make_image().read()
+
+    def create_user(self, username):
+        with self.captureOnCommitCallbacks(execute=True):
+            return get_user_model().objects.create_user(
+                username=username, password='x', profile_pic=SimpleUploadedFile(f'{username}.JPG', self.data),
+            )
+
+    def test_identical_uploads_share_one_file(self):
+        first, second = self.create_user('one'), self.create_user('two')
+        self.assertEqual(first.profile_pic.name, second.profile_pic.name)
+        self.assertTrue(first.profile_pic.name.endswith('.jpg'))
+        self.assertEqual(StoredBlob.objects.get(name=first.profile_pic.name).refcount, 2)
+
+    def test_file_is_removed_with_its_last_reference(self):
+        first, second = self.create_user('one'), self.create_user('two')
+        name = first.profile_pic.name
+        storage = first.profile_pic.storage
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(storage.exists(name))
+        # replacing the picture releases the old one
+        second = get_user_model().objects.get(pk=second.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            second.profile_pic = SimpleUploadedFile('new.png', make_image(size=(10, 10)).read())
+            second.save()
+        self.assertFalse(storage.exists(name))
+        self.assertFalse(default_storage.exists(thumbnail_name(name, 64)))
+        self.assertFalse(StoredBlob.objects.filter(name=name).exists())
+
+    def test_uploading_the_same_picture_again_takes_no_reference(self):
+        user = get_user_model().objects.get(pk=self.create_user('one').pk)
+        name = user.profile_pic.name
+        with self.captureOnCommitCallbacks(execute=True):
+            user.profile_pic = SimpleUploadedFile('again.jpg', self.data)
+            user.save()
+        self.assertEqual(user.profile_pic.name, name)
+        self.assertEqual(StoredBlob.objects.get(name=name).refcount, 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.delete()
+        self.assertFalse(StoredBlob.objects.filter(name=name).exists())
+
+    def test_chunked_upload_of_the_same_picture_takes_no_reference(self):
+        user = self.create_user('one')
+        name = user.profile_pic.name
+        self.client.force_login(user)
+        with override_settings(CHUNKED_UPLOAD_DIR=f'{self.media_root}/parts'):
+            resp = self.client.post('/accounts/uploads/', {'filename': 'again.jpg', 'size': len(self.data)})
+            upload_id = resp.json()['id']
+            self.client.generic(
+                'PATCH', f'/accounts/uploads/{upload_id}/', self.data, content_type='application/octet-stream',
+                HTTP_UPLOAD_OFFSET='0', HTTP_UPLOAD_CHECKSUM=hashlib.sha256(self.data).hexdigest(),
+            )
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self.client.post(f'/accounts/uploads/{upload_id}/complete/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(get_user_model().objects.get(pk=user.pk).profile_pic.name, name)
+        self.assertEqual(StoredBlob.objects.get(name=name).refcount, 1)
+        self.assertFalse(ChunkedUpload.objects.exists())
+
+    def test_rolled_back_save_takes_no_reference(self):
+        name = self.create_user('one').profile_pic.name
+        with transaction.atomic():
+            self.create_user('two')
+            self.assertEqual(StoredBlob.objects.get(name=name).refcount, 2)
+            transaction.set_rollback(True)
+        self.assertEqual(StoredBlob.objects.get(name=name).refcount, 1)
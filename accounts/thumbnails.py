@@ -0,0 +1,110 @@
+import logging
+import posixpath
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# One small pool per process; thumbnailing is CPU-bound Pillow work that releases the GIL.
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'THUMBNAIL_WORKERS', 2),
+    thread_name_prefix='thumbnails',
+)
+# Images queued or being processed in this process, and when generation last failed
+# for an image; thumbnail_url is called on every render, and must not queue the same
+# image again while it is pending, nor retry a broken one on every page view.
+_pending = set()
+_failed = {}
+_lock = threading.Lock()
+
+
+def thumbnail_sizes():
+    return sorted(getattr(settings, 'PROFILE_PIC_THUMBNAIL_SIZES', (64, 128, 256)))
+
+
+def closest_size(size):
+    """
+    Only configured sizes are generated; map a requested size to the smallest
+    configured size that is at least as large (or the largest one).
+    """
+    sizes = thumbnail_sizes()
+    return next((s for s in sizes if s >= size), sizes[-1])
+
+
+def thumbnail_name(name, size):
+    """
+    'profile_pics/me.jpg', 128 -> 'thumbnails/128/profile_pics/me.webp'
+    """
+    stem = posixpath.splitext(name)[0]
+    return f'thumbnails/{size}/{stem}.webp'
+
+
+def generate_thumbnails(name):
+    """
+    Write a WebP thumbnail of the stored image `name` for every configured size.
+    Sizes that already exist are skipped, so calling this again is cheap.
+    """
+    missing = [s for s in thumbnail_sizes() if not default_storage.exists(thumbnail_name(name, s))]
+    if not missing:
+        return
+    with default_storage.open(name, 'rb') as f:
+        image = ImageOps.exif_transpose(Image.open(f))
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+    # Largest first, each one shrinking the previous result instead of the original.
+    for size in sorted(missing, reverse=True):
+        image.thumbnail((size, size), Image.LANCZOS)
+        buffer = BytesIO()
+        image.save(buffer, 'WEBP', quality=getattr(settings, 'THUMBNAIL_WEBP_QUALITY', 80))
+        _save_over(thumbnail_name(name, size), ContentFile(buffer.getvalue()))
+
+
+def _save_over(name, content):
+    """
+    Save `content` as exactly `name`. Storage.save() never overwrites: it picks a
+    new name ('me_a1b2c3.webp') when the file exists, which would leave orphans
+    when two processes build the same thumbnail. Anything under another name is
+    a duplicate of a file that is already there, so it is removed again.
+    """
+    default_storage.delete(name)
+    saved = default_storage.save(name, content)
+    if saved != name:
+        default_storage.delete(saved)
+
+
+def _generate_logged(name):
+    try:
+        generate_thumbnails(name)
+    except Exception:
+        logger.exception('Thumbnail generation failed for %s', name)
+        with _lock:
+            _failed[name] = time.monotonic()
+    finally:
+        with _lock:
+            _pending.discard(name)
+
+
+def enqueue_thumbnails(name):
+    """
+    Generate thumbnails for `name` outside the request, unless they are already
+    queued or failed less than THUMBNAIL_RETRY_INTERVAL seconds ago.
+    With THUMBNAIL_ASYNC = False (tests, management commands) they are made inline.
+    """
+    if not getattr(settings, 'THUMBNAIL_ASYNC', True):
+        generate_thumbnails(name)
+        return
+    with _lock:
+        failed_at = _failed.get(name)
+        if failed_at is not None and time.monotonic() - failed_at < getattr(settings, 'THUMBNAIL_RETRY_INTERVAL', 3600):
+            return
+        if name in _pending:
+            return
+        _failed.pop(name, None)
+        _pending.add(name)
+    _executor.submit(_generate_logged, name)
@@ -0,0 +1,73 @@
+import hashlib
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+
+try:
+    import fcntl
+except ImportError:  # Windows: chunk writes are then only guarded by the conditional offset UPDATE
+    fcntl = None
+
+READ_BLOCK = 64 * 1024
+
+
+class ChecksumMismatch(Exception):
+    pass
+
+
+def upload_dir():
+    path = Path(getattr(settings, 'CHUNKED_UPLOAD_DIR', settings.BASE_DIR / 'chunked_uploads'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+@contextmanager
+def locked_part(path):
+    """
+    Hold an exclusive lock on the partial file `path` (created if missing).
+    Two requests sending the same chunk would otherwise both write the file, and
+    the one that failed its checks would truncate bytes the other had committed.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # also releases the lock
+
+
+def write_chunk(path, offset, stream, length, expected_sha256):
+    """
+    Copy `length` bytes from `stream` into the partial file at `offset`, 64 KiB at a time,
+    hashing as it goes. Nothing is kept in memory beyond one block. If the checksum does not
+    match, the file is truncated back to `offset` so the client can simply resend the chunk.
+    """
+    digest = hashlib.sha256()
+    mode = 'r+b' if os.path.exists(path) else 'wb'
+    with open(path, mode) as f:
+        f.seek(offset)
+        remaining = length
+        while remaining:
+            block = stream.read(min(READ_BLOCK, remaining))
+            if not block:
+                break
+            digest.update(block)
+            f.write(block)
+            remaining -= len(block)
+        if remaining or digest.hexdigest() != expected_sha256.lower():
+            f.truncate(offset)
+            raise ChecksumMismatch()
+        f.truncate(offset + length)
+
+
+class AssembledFile(File):
+    """
+    A finished upload on local disk. Exposing temporary_file_path() lets
+    FileSystemStorage move it into MEDIA_ROOT instead of copying it.
+    """
+    def temporary_file_path(self):
+        return self.file.name
@@ -7,4 +7,9 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
     path('profile/', views.profile_view, name='profile'),
     path('profile/edit/', views.edit_profile_view, name='edit_profile'),
+
+    # Chunked, resumable profile picture uploads
+    path('uploads/', views.upload_start_view, name='upload_start'),
+    path('uploads/<uuid:upload_id>/', views.upload_chunk_view, name='upload_chunk'),
+    path('uploads/<uuid:upload_id>/complete/', views.upload_complete_view, name='upload_complete'),
 ]
@@ -1,10 +1,18 @@
 from django.shortcuts import render
 
 # Create your views here.
-from django.shortcuts import render, redirect
+import os
+
+from django.conf import settings
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods, require_POST
+from PIL import Image, UnidentifiedImageError
 from .forms import RegisterForm, EditProfileForm
+from .models import ChunkedUpload
+from .uploads import AssembledFile, ChecksumMismatch, locked_part, write_chunk
 
 def register_view(request):
     if request.method == 'POST':
@@ -46,3 +54,118 @@ def edit_profile_view(request):
     else:
         form = EditProfileForm(instance=request.user)
     return render(request, 'accounts/edit_profile.html', {'form': form})
+
+
+# ------------------------------
+# Chunked, resumable profile picture uploads
+# ------------------------------
+# 1. POST   uploads/                 filename, size          -> {id, offset, chunk_size}
+# 2. PATCH  uploads/<id>/            raw chunk bytes with Upload-Offset and
+#                                    Upload-Checksum (sha256 hex) headers -> {offset}
+#    GET    uploads/<id>/            -> {offset} to resume after a dropped connection
+# 3. POST   uploads/<id>/complete/   -> attaches the file to request.user.profile_pic
+
+def _upload_state(upload):
+    return {
+        'id': str(upload.id),
+        'filename': upload.filename,
+        'size': upload.size,
+        'offset': upload.offset,
+        'chunk_size': settings.CHUNKED_UPLOAD_CHUNK_SIZE,
+        'complete': upload.is_complete,
+    }
+
+
+def _open_upload(request, upload_id):
+    """
+    The user's upload, or (None, 410 response) once it has expired.
+    """
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, user=request.user)
+    if upload.is_expired:
+        ChunkedUpload.objects.filter(pk=upload.pk).discard()
+        return None, JsonResponse({'error': 'This upload has expired; start a new one.'}, status=410)
+    return upload, None
+
+
+@login_required
+@require_POST
+def upload_start_view(request):
+    filename = os.path.basename(request.POST.get('filename', '')).strip()
+    try:
+        size = int(request.POST.get('size', ''))
+    except ValueError:
+        size = -1
+    if not filename or not 0 < size <= settings.PROFILE_PIC_MAX_UPLOAD_SIZE:
+        return JsonResponse({'error': 'A filename and a size up to the upload limit are required.'}, status=400)
+    uploads = ChunkedUpload.objects.filter(user=request.user)
+    uploads.expired().discard()
+    if uploads.count() >= getattr(settings, 'CHUNKED_UPLOAD_MAX_OPEN', 3):
+        return JsonResponse({'error': 'Too many unfinished uploads; finish or let them expire first.'}, status=429)
+    upload = ChunkedUpload.objects.create(user=request.user, filename=filename, size=size)
+    return JsonResponse(_upload_state(upload), status=201)
+
+
+@login_required
+@require_http_methods(['GET', 'PATCH'])
+def upload_chunk_view(request, upload_id):
+    upload, gone = _open_upload(request, upload_id)
+    if gone:
+        return gone
+    if request.method == 'GET':
+        return JsonResponse(_upload_state(upload))
+
+    try:
+        offset = int(request.headers['Upload-Offset'])
+        length = int(request.headers['Content-Length'])
+        checksum = request.headers['Upload-Checksum']
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Upload-Offset, Content-Length and Upload-Checksum are required.'}, status=400)
+    if offset != upload.offset:
+        return JsonResponse(dict(_upload_state(upload), error='Offset does not match.'), status=409)
+    if not 0 < length <= settings.CHUNKED_UPLOAD_CHUNK_SIZE or offset + length > upload.size:
+        return JsonResponse({'error': 'Chunk is empty, too large or past the announced size.'}, status=400)
+
+    # The offset is read again under the lock: a request for the same chunk that got
+    # here first has moved it, and this one must not touch the file.
+    with locked_part(upload.part_path()):
+        upload.refresh_from_db(fields=['offset'])
+        if offset != upload.offset:
+            return JsonResponse(dict(_upload_state(upload), error='Offset does not match.'), status=409)
+        try:
+            write_chunk(upload.part_path(), offset, request, length, checksum)
+        except ChecksumMismatch:
+            return JsonResponse(dict(_upload_state(upload), error='Checksum mismatch.'), status=400)
+        # Conditional, for platforms without the file lock.
+        if not ChunkedUpload.objects.filter(pk=upload.pk, offset=offset).update(offset=offset + length):
+            upload.refresh_from_db()
+            return JsonResponse(dict(_upload_state(upload), error='Offset does not match.'), status=409)
+    upload.offset = offset + length
+    return JsonResponse(_upload_state(upload))
+
+
+@login_required
+@require_POST
+def upload_complete_view(request, upload_id):
+    upload, gone = _open_upload(request, upload_id)
+    if gone:
+        return gone
+    if not upload.is_complete:
+        return JsonResponse(dict(_upload_state(upload), error='Upload is not complete.'), status=409)
+
+    path = upload.part_path()
+    try:
+        with Image.open(path) as image:
+            image.verify()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        ChunkedUpload.objects.filter(pk=upload.pk).discard()
+        return JsonResponse({'error': 'The uploaded file is not a valid image.'}, status=400)
+
+    with open(path, 'rb') as f:
+        content = AssembledFile(f)
+        # Storing the current picture again would take a reference nothing releases.
+        if not request.user.has_profile_pic(upload.filename, content):
+            request.user.profile_pic.save(upload.filename, content, save=False)
+            request.user.save(update_fields=['profile_pic'])
+    path.unlink(missing_ok=True)
+    upload.delete()
+    return JsonResponse({'profile_pic': request.user.profile_pic.url})
@@ -14,3 +14,6 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'advanced_api_project.settings')
 
 application = get_asgi_application()
+
+# Serve with an ASGI server, e.g. `uvicorn advanced_api_project.asgi:application`,
+# so the async views in api/views.py run on the event loop.
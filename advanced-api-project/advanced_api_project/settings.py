@@ -113,6 +113,39 @@ USE_I18N = True
 USE_TZ = True
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# File-based so that every worker process sees the same cached responses,
+# resource versions and throttle buckets.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+    }
+}
+
+# How long (seconds) a rendered anonymous API response stays cached.
+# Entries are also invalidated as soon as a Book or Author changes.
+API_CACHE_TIMEOUT = 60 * 15
+
+
+# Django REST Framework
+# Token-bucket throttles (see api/throttling.py); rates are 'requests/period'
+# where period is one of s, m, h or d.
+
+REST_FRAMEWORK = {
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.AnonBucketThrottle',
+        'api.throttling.UserBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'anon': '60/min',
+        'user': '240/min',
+    },
+}
+
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
@@ -0,0 +1,172 @@
+import hashlib
+import time
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+VERSION_KEY_PREFIX = 'api:version:'
+RESPONSE_KEY_PREFIX = 'api:response:'
+
+
+def _version_key(resource):
+    return f'{VERSION_KEY_PREFIX}{resource}'
+
+
+def get_versions(resources):
+    """
+    Return the current version of each resource, in the order given.
+    A resource that has no version yet (or whose version was evicted) is seeded
+    with a nanosecond timestamp, so a reset never reuses an old version number.
+    """
+    keys = [_version_key(r) for r in resources]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+        versions.append(found[key])
+    return versions
+
+
+def bump_version(*resources):
+    """
+    Invalidate every cached response that depends on one of the resources.
+    Old entries are never deleted; they simply stop being addressable and expire.
+    """
+    for resource in resources:
+        key = _version_key(resource)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def response_digest(request, resources):
+    """
+    Cache key (and ETag) of a GET: path, query string, Accept header and the
+    current version of each resource the response depends on.
+    """
+    parts = [
+        request.path,
+        request.META.get('QUERY_STRING', ''),
+        request.META.get('HTTP_ACCEPT', ''),
+    ]
+    parts += [f'{r}={v}' for r, v in zip(resources, get_versions(resources))]
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+def is_cacheable(request, user):
+    return (
+        request.method in ('GET', 'HEAD')
+        and not (user is not None and user.is_authenticated)
+        and 'HTTP_AUTHORIZATION' not in request.META
+    )
+
+
+def _finish(response, etag):
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept', 'Cookie', 'Authorization'))
+    return response
+
+
+class CachedResponseMixin:
+    """
+    Caches rendered GET responses for anonymous clients.
+
+    - cache_resources: names of the resources whose data appears in the response.
+      Saving or deleting any of them bumps its version and changes the cache key.
+    - The key is built from the path, the query string, the Accept header and the
+      resource versions, so the ETag can be derived from the key alone and a
+      matching If-None-Match is answered with a 304 without reading the body.
+    - The lookup happens in initial(), after authentication, permission and
+      throttle checks, so cached responses are refused and throttled like any other.
+    """
+    cache_resources = ()
+    cache_timeout = None
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            return self.cache_timeout
+        return getattr(settings, 'API_CACHE_TIMEOUT', 300)
+
+    def get_cache_digest(self, request):
+        return response_digest(request, self.cache_resources)
+
+    def is_cacheable_request(self, request):
+        return is_cacheable(request, getattr(request, 'user', None))
+
+    def initial(self, request, *args, **kwargs):
+        self.cache_etag = self.cache_key = None
+        super().initial(request, *args, **kwargs)
+        if not self.cache_resources or not self.is_cacheable_request(request):
+            return
+
+        digest = self.get_cache_digest(request)
+        self.cache_etag = f'"{digest}"'
+        if self.cache_etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponseNotModified()
+        else:
+            self.cache_key = f'{RESPONSE_KEY_PREFIX}{digest}'
+            cached = cache.get(self.cache_key)
+            if cached is None:
+                return
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Cache'] = 'HIT'
+        # dispatch() looks the handler up after initial(): answer this request from the cache.
+        setattr(self, request.method.lower(), lambda *args, **kwargs: response)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'cache_etag', None) is None:
+            return response
+        if self.cache_key is not None and not response.has_header('X-Cache'):
+            if response.status_code != 200:
+                return response
+            if hasattr(response, 'render'):
+                response.render()
+            cache.set(self.cache_key, (response.content, response['Content-Type']), self.get_cache_timeout())
+            response['X-Cache'] = 'MISS'
+        return _finish(response, self.cache_etag)
+
+
+def async_cached(*resources):
+    """
+    CachedResponseMixin for plain async views: the same keys, ETags and 304s,
+    with the cache read and written through the async cache API.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        async def wrapper(request, *args, **kwargs):
+            auser = getattr(request, 'auser', None)
+            user = await auser() if auser is not None else None
+            if not is_cacheable(request, user):
+                return await view_func(request, *args, **kwargs)
+
+            digest = await sync_to_async(response_digest)(request, resources)
+            etag = f'"{digest}"'
+            if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+                return _finish(HttpResponseNotModified(), etag)
+
+            cache_key = f'{RESPONSE_KEY_PREFIX}{digest}'
+            cached = await cache.aget(cache_key)
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                response['X-Cache'] = 'HIT'
+            else:
+                response = await view_func(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                timeout = getattr(settings, 'API_CACHE_TIMEOUT', 300)
+                await cache.aset(cache_key, (response.content, response['Content-Type']), timeout)
+                response['X-Cache'] = 'MISS'
+            return _finish(response, etag)
+        return wrapper
+    return decorator
@@ -0,0 +1,62 @@
+import sys
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+
+def prefix_upper_bound(prefix):
+    """
+    Smallest string greater than every string starting with `prefix`.
+    'Dun' -> 'Duo', so `title >= 'Dun' AND title < 'Duo'` is a prefix match
+    that the database can answer with a range scan on the title index.
+    Returns None when there is no such string (the prefix is all U+10FFFF).
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    code = ord(prefix[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:  # surrogates can't be encoded for the database
+        code = 0xE000
+    return prefix[:-1] + chr(code)
+
+
+class BookFilterBackend(BaseFilterBackend):
+    """
+    Server-side filtering for the book endpoints.
+
+    Query parameters:
+    - author: author id.
+    - publication_year, publication_year__gte, publication_year__lte: exact year or range.
+    - title__startswith: case-sensitive title prefix.
+
+    The filters map onto the Book(author, publication_year) and Book(title) indexes:
+    author + year range is a single range scan on the composite index, and the title
+    prefix is rewritten as a range so it can use the title index (LIKE cannot on SQLite).
+    """
+    int_params = {
+        'author': 'author_id',
+        'publication_year': 'publication_year',
+        'publication_year__gte': 'publication_year__gte',
+        'publication_year__lte': 'publication_year__lte',
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        filters = {}
+        for param, lookup in self.int_params.items():
+            value = params.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                filters[lookup] = int(value)
+            except ValueError:
+                raise ValidationError({param: 'A whole number is required.'})
+
+        prefix = params.get('title__startswith')
+        if prefix:
+            filters['title__gte'] = prefix
+            upper = prefix_upper_bound(prefix)
+            if upper is not None:
+                filters['title__lt'] = upper
+
+        return queryset.filter(**filters) if filters else queryset
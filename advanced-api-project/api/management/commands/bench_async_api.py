@@ -0,0 +1,59 @@
+import asyncio
+import inspect
+import statistics
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory
+
+from api.models import Book
+from api.views import BookList, async_book_list
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync BookList with async_book_list under concurrent load, "
+        "dispatching each view the way Django's ASGI handler does."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per view (default 500).')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at once (default 50).')
+
+    def handle(self, *args, **options):
+        total, concurrency = options['requests'], options['concurrency']
+        self.stdout.write(f"{Book.objects.count()} books, {total} requests per view, concurrency {concurrency}")
+
+        # Response cache and throttles are switched off so both views do the same work.
+        sync_view = BookList.as_view(cache_resources=(), throttle_classes=[])
+        async_view = inspect.unwrap(async_book_list)
+        # Under ASGI a sync view is run through sync_to_async(thread_sensitive=True),
+        # i.e. on one shared thread, which is what limits its concurrency.
+        sync_call = sync_to_async(sync_view, thread_sensitive=True)
+
+        for label, call in (('sync BookList', sync_call), ('async_book_list', async_view)):
+            elapsed, latencies = asyncio.run(self.run_load(call, total, concurrency))
+            latencies.sort()
+            self.stdout.write(
+                f"{label:<16} {total / elapsed:8.1f} req/s  "
+                f"p50 {statistics.median(latencies) * 1000:7.2f} ms  "
+                f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:7.2f} ms"
+            )
+
+    async def run_load(self, call, total, concurrency):
+        factory = AsyncRequestFactory()
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one():
+            async with semaphore:
+                start = time.perf_counter()
+                response = await call(factory.get('/api/books/'))
+                if hasattr(response, 'render'):
+                    await sync_to_async(response.render)()
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return time.perf_counter() - start, latencies
@@ -1,5 +1,38 @@
 from django.db import models
 
+from .cache import bump_version
+
+
+class VersionedQuerySet(models.QuerySet):
+    """
+    QuerySet whose bulk operations bump the API cache version of its model.
+    save() and delete() on single instances are handled by the signals in api/signals.py;
+    bulk_create(), bulk_update() and update() send no signals, so they are covered here.
+    """
+    def _bump(self):
+        bump_version(self.model._meta.model_name)
+
+    def bulk_create(self, *args, **kwargs):
+        objs = super().bulk_create(*args, **kwargs)
+        self._bump()
+        return objs
+
+    def bulk_update(self, *args, **kwargs):
+        rows = super().bulk_update(*args, **kwargs)
+        self._bump()
+        return rows
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        self._bump()
+        return rows
+
+    def delete(self):
+        result = super().delete()
+        self._bump()
+        return result
+
+
 class Author(models.Model):
     """
     Represents an author of books.
@@ -7,6 +40,8 @@ class Author(models.Model):
     """
     name = models.CharField(max_length=100)
 
+    objects = VersionedQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
@@ -20,7 +55,16 @@ class Book(models.Model):
     """
     title = models.CharField(max_length=200)
     publication_year = models.IntegerField()
-    author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='books')
+    # Not indexed on its own: the (author, publication_year) index below covers author lookups.
+    author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='books', db_index=False)
+
+    objects = VersionedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author', 'publication_year'], name='book_author_year_idx'),
+            models.Index(fields=['title'], name='book_title_idx'),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.publication_year}) by {self.author.name}"
\ No newline at end of file
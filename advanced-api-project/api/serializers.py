@@ -42,6 +42,22 @@ class AuthorSerializer(serializers.ModelSerializer):
         model = Author
         fields = ['id', 'name', 'books'] # Include 'books' for nesting
 
+# --- Author Stats Serializer (aggregates, no nesting) ---
+class AuthorStatsSerializer(serializers.ModelSerializer):
+    """
+    Serializer for per-author aggregates.
+    The three extra fields are not stored on Author; they are annotations added by
+    AuthorStatsList's queryset (COUNT, MIN and MAX over the author's books).
+    Authors without books have a book_count of 0 and null years.
+    """
+    book_count = serializers.IntegerField(read_only=True)
+    first_publication_year = serializers.IntegerField(read_only=True, allow_null=True)
+    last_publication_year = serializers.IntegerField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Author
+        fields = ['id', 'name', 'book_count', 'first_publication_year', 'last_publication_year']
+
 # --- How the relationship between Author and Book is handled in serializers ---
 """
 In AuthorSerializer:
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .models import Author, Book
+
+
+@receiver([post_save, post_delete], sender=Author)
+@receiver([post_save, post_delete], sender=Book)
+def bump_api_cache_version(sender, **kwargs):
+    """
+    Invalidate cached API responses for the model that was saved or deleted.
+    Cascading deletes (an Author taking its Books with it) fire this once per object.
+    """
+    bump_version(sender._meta.model_name)
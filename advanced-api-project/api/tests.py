@@ -1,3 +1,219 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.permissions import BasePermission
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .filters import prefix_upper_bound
+from .models import Author, Book
+from .throttling import AnonBucketThrottle
+from .views import BookViewSet
+
+# Tests clear the cache; keep them off the file cache the dev server uses.
+ISOLATED_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'api-tests'}}
+
+
+@override_settings(CACHES=ISOLATED_CACHE)
+class ApiResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name='Chinua Achebe')
+        self.book = Book.objects.create(title='Things Fall Apart', publication_year=1958, author=self.author)
+
+    def test_second_get_is_served_from_cache(self):
+        url = reverse('book-list')
+        first = self.client.get(url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+
+    def test_query_string_is_part_of_the_key(self):
+        url = reverse('book-list')
+        self.client.get(url)
+        self.assertEqual(self.client.get(url, {'format': 'json'})['X-Cache'], 'MISS')
+
+    def test_if_none_match_returns_304(self):
+        url = reverse('book-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+    def test_save_invalidates_book_responses(self):
+        url = reverse('book-list')
+        etag = self.client.get(url)['ETag']
+        self.book.title = 'Arrow of God'
+        self.book.save()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, 'Arrow of God')
+
+    def test_bulk_operations_invalidate(self):
+        url = reverse('author-list')
+        self.client.get(url)
+        Book.objects.bulk_create([Book(title='No Longer at Ease', publication_year=1960, author=self.author)])
+        self.assertContains(self.client.get(url), 'No Longer at Ease')
+        Book.objects.filter(pk=self.book.pk).update(title='Anthills of the Savannah')
+        self.assertContains(self.client.get(url), 'Anthills of the Savannah')
+
+    def test_permissions_run_before_the_cache(self):
+        class Closed(BasePermission):
+            def has_permission(self, request, view):
+                return False
+
+        factory = APIRequestFactory()
+        self.assertEqual(BookViewSet.as_view({'get': 'list'})(factory.get('/api/books_all/'))['X-Cache'], 'MISS')
+        view = BookViewSet.as_view({'get': 'list'}, permission_classes=[Closed])
+        self.assertEqual(view(factory.get('/api/books_all/')).status_code, 403)
+
+    def test_authenticated_requests_bypass_cache(self):
+        from django.contrib.auth.models import User
+        User.objects.create_user(username='reader', password='pass')
+        self.client.login(username='reader', password='pass')
+        resp = self.client.get(reverse('book-list'))
+        self.assertFalse(resp.has_header('X-Cache'))
+
+
+@override_settings(CACHES=ISOLATED_CACHE)
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_anon_bucket_throttles_after_burst_even_when_cached(self):
+        class TwoPerMinute(AnonBucketThrottle):
+            rate = '2/min'
+
+        view = BookViewSet.as_view({'get': 'list'}, throttle_classes=[TwoPerMinute])
+        factory = APIRequestFactory()
+        responses = [view(factory.get('/api/books_all/')) for _ in range(3)]
+        self.assertEqual([r.status_code for r in responses], [200, 200, 429])
+        self.assertEqual(responses[1]['X-Cache'], 'HIT')
+
+    def test_concurrent_requests_cannot_overspend(self):
+        class TwoPerMinute(AnonBucketThrottle):
+            rate = '2/min'
+
+        request = Request(APIRequestFactory().get('/api/books_all/'))
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            allowed = list(pool.map(lambda _: TwoPerMinute().allow_request(request, None), range(8)))
+        self.assertEqual(allowed.count(True), 2)
+
+
+@override_settings(CACHES=ISOLATED_CACHE)
+class BookFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.achebe = Author.objects.create(name='Chinua Achebe')
+        self.soyinka = Author.objects.create(name='Wole Soyinka')
+        Book.objects.create(title='Things Fall Apart', publication_year=1958, author=self.achebe)
+        Book.objects.create(title='No Longer at Ease', publication_year=1960, author=self.achebe)
+        Book.objects.create(title='Anthills of the Savannah', publication_year=1987, author=self.achebe)
+        Book.objects.create(title='The Interpreters', publication_year=1965, author=self.soyinka)
+
+    def titles(self, **params):
+        resp = self.client.get(reverse('book-list'), params)
+        self.assertEqual(resp.status_code, 200)
+        return [b['title'] for b in resp.json()]
+
+    def test_author_and_year_range(self):
+        self.assertEqual(
+            self.titles(author=self.achebe.pk, publication_year__gte=1958, publication_year__lte=1970, ordering='publication_year'),
+            ['Things Fall Apart', 'No Longer at Ease'],
+        )
+
+    def test_title_prefix_search_and_ordering(self):
+        self.assertEqual(self.titles(title__startswith='Th', ordering='-title'), ['Things Fall Apart', 'The Interpreters'])
+        self.assertEqual(self.titles(search='soyinka'), ['The Interpreters'])
+
+    def test_invalid_year_is_a_400(self):
+        resp = self.client.get(reverse('book-list'), {'publication_year__gte': 'soon'})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_search_follows_author_renames(self):
+        self.assertEqual(self.titles(search='soyinka'), ['The Interpreters'])
+        self.soyinka.name = 'Akinwande Oluwole'
+        self.soyinka.save()
+        self.assertEqual(self.titles(search='soyinka'), [])
+
+    def test_prefix_of_the_last_code_point(self):
+        self.assertEqual(prefix_upper_bound('a\U0010ffff'), 'b')
+        self.assertIsNone(prefix_upper_bound('\U0010ffff'))
+        self.assertEqual(prefix_upper_bound('\ud7ff'), '\ue000')
+        self.assertEqual(self.titles(title__startswith='\U0010ffff'), [])
+
+
+@override_settings(CACHES=ISOLATED_CACHE)
+class AuthorStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.achebe = Author.objects.create(name='Chinua Achebe')
+        Author.objects.create(name='Unpublished')
+        Book.objects.create(title='Things Fall Apart', publication_year=1958, author=self.achebe)
+        Book.objects.create(title='Anthills of the Savannah', publication_year=1987, author=self.achebe)
+
+    def test_stats_in_one_query(self):
+        with self.assertNumQueries(1):
+            resp = self.client.get(reverse('author-stats'))
+        self.assertEqual(resp.json(), [
+            {'id': self.achebe.pk, 'name': 'Chinua Achebe', 'book_count': 2,
+             'first_publication_year': 1958, 'last_publication_year': 1987},
+            {'id': self.achebe.pk + 1, 'name': 'Unpublished', 'book_count': 0,
+             'first_publication_year': None, 'last_publication_year': None},
+        ])
+
+    def test_stats_follow_book_changes(self):
+        self.client.get(reverse('author-stats'))
+        Book.objects.create(title='Arrow of God', publication_year=1964, author=self.achebe)
+        self.assertEqual(self.client.get(reverse('author-stats')).json()[0]['book_count'], 3)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'query plan assertions are written for SQLite')
+class BookQueryPlanTests(TestCase):
+    def test_author_year_range_uses_composite_index(self):
+        plan = Book.objects.filter(author_id=1, publication_year__gte=1950, publication_year__lte=1970).explain()
+        self.assertIn('book_author_year_idx', plan)
+
+    def test_title_prefix_uses_title_index(self):
+        plan = Book.objects.filter(title__gte='Th', title__lt=prefix_upper_bound('Th')).explain()
+        self.assertIn('book_title_idx', plan)
+
+
+@override_settings(CACHES=ISOLATED_CACHE)
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(name='Chinua Achebe')
+        self.book = Book.objects.create(title='Things Fall Apart', publication_year=1958, author=self.author)
+
+    async def test_async_book_list_and_detail(self):
+        resp = await self.async_client.get(reverse('async-book-list'))
+        self.assertEqual([b['title'] for b in resp.json()], ['Things Fall Apart'])
+        resp = await self.async_client.get(reverse('async-book-detail', args=[self.book.pk]))
+        self.assertEqual(resp.json()['publication_year'], 1958)
+        resp = await self.async_client.get(reverse('async-book-detail', args=[self.book.pk + 100]))
+        self.assertEqual(resp.status_code, 404)
+
+    async def test_async_author_detail_nests_books(self):
+        resp = await self.async_client.get(reverse('async-author-detail', args=[self.author.pk]))
+        self.assertEqual(resp.json()['books'][0]['title'], 'Things Fall Apart')
+
+    async def test_async_views_are_cached_and_throttled(self):
+        url = reverse('async-book-list')
+        first = await self.async_client.get(url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        second = await self.async_client.get(url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(second.status_code, 304)
+        with patch.dict(AnonBucketThrottle.THROTTLE_RATES, {'anon': '1/min'}):
+            cache.clear()
+            self.assertEqual((await self.async_client.get(url)).status_code, 200)
+            resp = await self.async_client.get(url)
+        self.assertEqual(resp.status_code, 429)
+        self.assertTrue(resp.has_header('Retry-After'))
@@ -0,0 +1,102 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import Throttled
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+# How long a bucket stays locked if the worker holding it dies mid-update.
+LOCK_TIMEOUT = 2
+# Threads of one process queue here first; a bucket always maps to the same stripe.
+_local_locks = [threading.Lock() for _ in range(64)]
+
+
+class TokenBucketMixin:
+    """
+    Replaces DRF's sliding-window history with a token bucket.
+
+    - A rate of 'N/period' gives a bucket of N tokens refilled at N/period tokens per second.
+    - Each request takes one token; an empty bucket means the request is throttled.
+    - The bucket is stored as a single (tokens, timestamp) pair in the configured cache,
+      so it is shared by all worker processes. The read and write happen under a lock
+      (cache.add on a lock key), so concurrent requests can't both spend the same token.
+    """
+    @contextmanager
+    def locked(self, key):
+        lock_key = f'{key}:lock'
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        with _local_locks[hash(key) % len(_local_locks)]:
+            while not (acquired := self.cache.add(lock_key, 1, LOCK_TIMEOUT)) and time.monotonic() < deadline:
+                time.sleep(0.001)
+            try:
+                yield
+            finally:
+                if acquired:
+                    self.cache.delete(lock_key)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        with self.locked(self.key):
+            self.now = self.timer()
+            refill_rate = self.num_requests / self.duration
+            tokens, last = self.cache.get(self.key, (self.num_requests, self.now))
+            self.tokens = min(self.num_requests, tokens + (self.now - last) * refill_rate)
+
+            if self.tokens < 1:
+                return self.throttle_failure()
+
+            self.tokens -= 1
+            self.cache.set(self.key, (self.tokens, self.now), self.duration)
+        return True
+
+    def wait(self):
+        """
+        Seconds until the bucket holds a whole token again.
+        """
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class AnonBucketThrottle(TokenBucketMixin, AnonRateThrottle):
+    """
+    Token-bucket throttle for anonymous clients, keyed by IP address ('anon' rate).
+    """
+
+
+class UserBucketThrottle(TokenBucketMixin, UserRateThrottle):
+    """
+    Token-bucket throttle for authenticated users, keyed by user id ('user' rate).
+    """
+
+
+def async_throttled(view_func):
+    """
+    Apply the REST_FRAMEWORK default throttles to a plain async view, which DRF's
+    APIView.initial() never sees. Answers 429 with Retry-After like DRF does.
+    """
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        drf_request = Request(request)
+        auser = getattr(request, 'auser', None)
+        if auser is not None:
+            drf_request.user = await auser()
+        for throttle in (throttle_class() for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES):
+            if not await sync_to_async(throttle.allow_request)(drf_request, None):
+                exc = Throttled(throttle.wait())
+                response = JsonResponse({'detail': str(exc.detail)}, status=exc.status_code)
+                if exc.wait is not None:
+                    response['Retry-After'] = str(math.ceil(exc.wait))
+                return response
+        return await view_func(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,27 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import (
+    BookList, BookViewSet, AuthorViewSet, AuthorStatsList,
+    async_book_list, async_book_detail, async_author_list, async_author_detail,
+)
+
+router = DefaultRouter()
+router.register(r'books_all', BookViewSet, basename='book_all')
+router.register(r'authors', AuthorViewSet, basename='author')
+
+urlpatterns = [
+    # Read-only list of books (ListAPIView)
+    path('books/', BookList.as_view(), name='book-list'),
+
+    # Per-author aggregates; listed before the router so 'stats' is not taken as an author pk
+    path('authors/stats/', AuthorStatsList.as_view(), name='author-stats'),
+
+    # Async read-only views (for ASGI servers)
+    path('async/books/', async_book_list, name='async-book-list'),
+    path('async/books/<int:pk>/', async_book_detail, name='async-book-detail'),
+    path('async/authors/', async_author_list, name='async-author-list'),
+    path('async/authors/<int:pk>/', async_author_detail, name='async-author-detail'),
+
+    # Router URLs for the ViewSets (all CRUD operations)
+    path('', include(router.urls)),
+]
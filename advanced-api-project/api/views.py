@@ -1,3 +1,114 @@
-from django.shortcuts import render
+from django.db.models import Count, Max, Min
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404
+from rest_framework import filters, generics, viewsets
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
-# Create your views here.
+from .cache import CachedResponseMixin, async_cached
+from .filters import BookFilterBackend
+from .models import Author, Book
+from .serializers import AuthorSerializer, AuthorStatsSerializer, BookSerializer
+from .throttling import async_throttled
+
+
+# --- Book views ---
+class BookQueryMixin:
+    """
+    Filtering, search and ordering shared by the book endpoints.
+    - ?author=1&publication_year__gte=1950&publication_year__lte=1970&title__startswith=Th
+    - ?search=achebe matches title or author name.
+    - ?ordering=-publication_year (title and publication_year are allowed).
+    """
+    filter_backends = [BookFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    search_fields = ['title', 'author__name']
+    ordering_fields = ['title', 'publication_year']
+
+
+class BookList(CachedResponseMixin, BookQueryMixin, generics.ListAPIView):
+    """
+    Read-only list of all books.
+    Anonymous responses are cached until a Book or Author is saved or deleted
+    (?search= matches author names too).
+    """
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    cache_resources = ('book', 'author')
+
+
+class BookViewSet(CachedResponseMixin, BookQueryMixin, viewsets.ModelViewSet):
+    """
+    Full CRUD for books. Reads are open to everyone, writes need an authenticated user.
+    """
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    cache_resources = ('book', 'author')
+
+
+# --- Author views ---
+class AuthorViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    """
+    Full CRUD for authors, each serialized with their nested books.
+    The nested books mean a cached author response also depends on the 'book' version.
+    """
+    queryset = Author.objects.prefetch_related('books')
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    cache_resources = ('author', 'book')
+
+
+class AuthorStatsList(CachedResponseMixin, generics.ListAPIView):
+    """
+    Book count and first/last publication year for every author, in one GROUP BY query.
+    The aggregate reads only the Book(author, publication_year) index, and the rendered
+    response is cached until an Author or Book changes, so dashboards polling this
+    endpoint hit the database once per catalogue change.
+    """
+    queryset = Author.objects.annotate(
+        book_count=Count('books'),
+        first_publication_year=Min('books__publication_year'),
+        last_publication_year=Max('books__publication_year'),
+    ).order_by('name')
+    serializer_class = AuthorStatsSerializer
+    cache_resources = ('author', 'book')
+
+
+# --- Async views (served natively under ASGI, e.g. uvicorn advanced_api_project.asgi:application) ---
+# DRF views are sync only, so these are plain Django async views, throttled and cached
+# like their DRF counterparts. The serializers only see already-loaded objects. Django's
+# database backends have no async driver: each async ORM call runs through
+# sync_to_async(thread_sensitive=True), which holds the shared sync thread while it waits
+# on the database. The rest of the request (cache, throttles, rendering) stays on the loop.
+
+@async_throttled
+@async_cached('book')
+async def async_book_list(request):
+    """
+    Read-only list of all books (async counterpart of BookList).
+    """
+    books = [book async for book in Book.objects.all()]
+    return JsonResponse(BookSerializer(books, many=True).data, safe=False)
+
+
+@async_throttled
+@async_cached('book')
+async def async_book_detail(request, pk):
+    book = await aget_object_or_404(Book, pk=pk)
+    return JsonResponse(BookSerializer(book).data)
+
+
+@async_throttled
+@async_cached('author', 'book')
+async def async_author_list(request):
+    """
+    Authors with their nested books; the books are prefetched in the same async fetch.
+    """
+    authors = [author async for author in Author.objects.prefetch_related('books')]
+    return JsonResponse(AuthorSerializer(authors, many=True).data, safe=False)
+
+
+@async_throttled
+@async_cached('author', 'book')
+async def async_author_detail(request, pk):
+    author = await aget_object_or_404(Author.objects.prefetch_related('books'), pk=pk)
+    return JsonResponse(AuthorSerializer(author).data)
@@ -0,0 +1,58 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import ExtractMonth, ExtractYear
+from django.utils import timezone
+
+from .models import MonthlyPostCount, Post
+
+ARCHIVE_CACHE_KEY = 'blog:archive:months'
+
+
+def adjust_month_count(published_date, delta):
+    """
+    Add `delta` to the post count of the month `published_date` falls in.
+    """
+    local = timezone.localtime(published_date) if timezone.is_aware(published_date) else published_date
+    rows = MonthlyPostCount.objects.filter(year=local.year, month=local.month)
+    if not rows.update(count=F('count') + delta) and delta > 0:
+        try:
+            with transaction.atomic():
+                MonthlyPostCount.objects.create(year=local.year, month=local.month, count=delta)
+        except IntegrityError:  # another request created the row first
+            rows.update(count=F('count') + delta)
+    transaction.on_commit(lambda: cache.delete(ARCHIVE_CACHE_KEY))
+
+
+def archive_months():
+    """
+    [(date(year, month, 1), count), ...], newest month first, for the sidebar.
+    Read from the cache, or from the month table in one query.
+    """
+    months = cache.get(ARCHIVE_CACHE_KEY)
+    if months is None:
+        months = [
+            (date(year, month, 1), count)
+            for year, month, count in MonthlyPostCount.objects.filter(count__gt=0).values_list('year', 'month', 'count')
+        ]
+        cache.set(ARCHIVE_CACHE_KEY, months, None)
+    return months
+
+
+@transaction.atomic
+def rebuild_month_counts():
+    """
+    Recount every month from the posts table. Returns the number of months.
+    """
+    counts = (
+        Post.objects.annotate(year=ExtractYear('published_date'), month=ExtractMonth('published_date'))
+        .values('year', 'month')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    MonthlyPostCount.objects.all().delete()
+    MonthlyPostCount.objects.bulk_create(MonthlyPostCount(**row) for row in counts)
+    transaction.on_commit(lambda: cache.delete(ARCHIVE_CACHE_KEY))
+    return MonthlyPostCount.objects.count()
@@ -0,0 +1,187 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Max
+from taggit.models import Tag
+
+from .models import AutocompleteChange, Post
+
+# Changes kept in the log; a worker further behind than this rebuilds its index.
+CHANGE_LOG_SIZE = 1000
+# Keys are truncated to this many characters; longer queries are matched on their start.
+KEY_LENGTH = 40
+# A title is findable from the start of each of its first MAX_WORDS words.
+MAX_WORDS = 8
+TAG, POST = 0, 1
+
+
+def normalize(text):
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+
+def prefix_keys(text):
+    """
+    'Intro to Django ORM' -> ['intro to django orm', 'to django orm', 'django orm', 'orm'],
+    so a query matches from the start of any word.
+    """
+    words = normalize(text).split()
+    return sorted({' '.join(words[i:])[:KEY_LENGTH] for i in range(min(len(words), MAX_WORDS))})
+
+
+class PrefixIndex:
+    """
+    Sorted arrays of (key, id), one for post titles and one for tag names. A
+    lookup is a bisect plus a scan that stops after `limit` matches, and updates
+    are an insort/delete, so nothing is rebuilt when a post or tag changes.
+    """
+    def __init__(self, posts=(), tags=(), version=None):
+        self.version = version
+        self.texts = {POST: dict(posts), TAG: dict(tags)}
+        self.entries = {
+            kind: sorted((key, pk) for pk, text in texts.items() for key in prefix_keys(text))
+            for kind, texts in self.texts.items()
+        }
+        self.lock = threading.Lock()
+
+    def set(self, kind, pk, text):
+        with self.lock:
+            self._remove(kind, pk)
+            self.texts[kind][pk] = text
+            for key in prefix_keys(text):
+                insort(self.entries[kind], (key, pk))
+
+    def remove(self, kind, pk):
+        with self.lock:
+            self._remove(kind, pk)
+
+    def _remove(self, kind, pk):
+        if pk not in self.texts[kind]:
+            return
+        entries = self.entries[kind]
+        for key in prefix_keys(self.texts[kind].pop(pk)):
+            i = bisect_left(entries, (key, pk))
+            if i < len(entries) and entries[i] == (key, pk):
+                del entries[i]
+
+    def _matches(self, kind, query, limit):
+        entries, texts = self.entries[kind], self.texts[kind]
+        found = {}
+        i = bisect_left(entries, (query,))
+        while i < len(entries) and len(found) < limit:
+            key, pk = entries[i]
+            if not key.startswith(query):
+                break
+            found.setdefault(pk, texts[pk])
+            i += 1
+        return list(found.items())
+
+    def lookup(self, query, limit):
+        """
+        ([(post_id, title), ...], [(tag_id, name), ...]), up to `limit` of each,
+        in key order.
+        """
+        query = normalize(query)[:KEY_LENGTH]
+        if not query:
+            return [], []
+        with self.lock:
+            return self._matches(POST, query, limit), self._matches(TAG, query, limit)
+
+
+_index = None
+_build_lock = threading.Lock()
+_checked_at = 0.0
+_rebuilding = False
+
+
+def build_index():
+    # Read the version first: changes logged while the tables are read are applied
+    # again afterwards, which is harmless, rather than missed.
+    version = AutocompleteChange.objects.aggregate(version=Max('pk'))['version'] or 0
+    return PrefixIndex(
+        posts=Post.objects.values_list('pk', 'title').iterator(chunk_size=5000),
+        tags=Tag.objects.values_list('pk', 'name').iterator(chunk_size=5000),
+        version=version,
+    )
+
+
+def _rebuild_in_background():
+    global _index, _rebuilding
+    try:
+        _index = build_index()
+    finally:
+        _rebuilding = False
+        close_old_connections()
+
+
+def _apply(index, kind, pk, text):
+    if text is None:
+        index.remove(kind, pk)
+    else:
+        index.set(kind, pk, text)
+
+
+def catch_up(index):
+    """
+    Apply the changes other workers logged since `index.version`. Returns False if
+    that isn't possible (the log skips an id: trimmed past the index's version, or
+    a write that has not committed yet), and the index must be rebuilt instead.
+    """
+    changes = list(
+        AutocompleteChange.objects.filter(pk__gt=index.version).order_by('pk')
+        .values_list('pk', 'kind', 'object_id', 'text')[:CHANGE_LOG_SIZE]
+    )
+    for version, kind, pk, text in changes:
+        if version != index.version + 1:
+            return False
+        _apply(index, kind, pk, text)
+        index.version = version
+    return True
+
+
+def get_index():
+    """
+    This process's index, built on first use. Changes made in this process are
+    applied to it directly; every BLOG_AUTOCOMPLETE_CHECK_INTERVAL seconds the
+    changes other workers made since are read from the change log and applied.
+    Only if the log can't bring it up to date is the index rebuilt, in a background
+    thread while the old one keeps serving.
+    """
+    global _index, _checked_at, _rebuilding
+    if _index is None:
+        with _build_lock:
+            if _index is None:
+                _index = build_index()
+                _checked_at = time.monotonic()
+        return _index
+
+    now = time.monotonic()
+    if now - _checked_at >= getattr(settings, 'BLOG_AUTOCOMPLETE_CHECK_INTERVAL', 5):
+        _checked_at = now
+        if not _rebuilding:
+            with _build_lock:
+                caught_up = catch_up(_index)
+            if not caught_up:
+                _rebuilding = True
+                threading.Thread(target=_rebuild_in_background, name='autocomplete-index', daemon=True).start()
+    return _index
+
+
+def changed(kind, pk, text=None):
+    """
+    Log that post or tag `pk` now has title/name `text` (None: it was deleted),
+    apply it to this process's index (if built), and let the other workers catch up.
+    """
+    version = AutocompleteChange.objects.create(kind=kind, object_id=pk, text=text).pk
+    if version % 100 == 0:
+        AutocompleteChange.objects.filter(pk__lte=version - CHANGE_LOG_SIZE).delete()
+    index = _index
+    if index is not None:
+        with _build_lock:
+            _apply(index, kind, pk, text)
+            if index.version == version - 1:
+                # Nobody else changed anything since our last look: still current.
+                index.version = version
@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_TIMEOUT = 60 * 5
+
+
+def user_cache_key(user_id):
+    return f'blog:user:v2:{user_id}'  # v2: (user, checked_at)
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that keeps the session user in the cache.
+
+    AuthenticationMiddleware calls get_user() once per request; with the default
+    backend that is a SELECT on auth_user for every logged-in page view.
+    Here the user is read from the cache and only loaded from the database on a miss.
+    Saving or deleting a user drops the entry (see blog/signals.py), and the session
+    hash check in django.contrib.auth still runs against the cached password hash.
+    Changes made with queryset.update() send no signal, so every
+    BLOG_USER_RECHECK_INTERVAL seconds the cached is_active flag and password hash
+    are compared with the database (a primary-key lookup of two columns).
+    """
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        cached = cache.get(key)
+        now = time.time()
+        if cached is not None:
+            user, checked_at = cached
+            if now - checked_at >= getattr(settings, 'BLOG_USER_RECHECK_INTERVAL', 30):
+                current = get_user_model()._default_manager.filter(pk=user_id).values_list('is_active', 'password')
+                if list(current) == [(user.is_active, user.password)]:
+                    cache.set(key, (user, now), USER_CACHE_TIMEOUT)
+                else:
+                    cached = None
+        if cached is None:
+            user = super().get_user(user_id)
+            if user is None:
+                cache.delete(key)
+                return None
+            cache.set(key, (user, now), USER_CACHE_TIMEOUT)
+        return user if self.user_can_authenticate(user) else None
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
@@ -0,0 +1,123 @@
+import secrets
+import struct
+import zlib
+
+from django.utils.crypto import get_random_string
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only gzip is offered
+    brotli = None
+
+GZIP_LEVEL = 6
+# Quality 11 is for collectstatic; on-the-fly compression needs to stay cheap.
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = (
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+)
+
+
+def accepted_encodings(request):
+    """
+    Encodings the client accepts, ignoring any listed with q=0.
+    """
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        encoding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+def choose_encoding(request):
+    """
+    The encoding to compress a response with: br when brotli is installed and the
+    client accepts it, otherwise gzip, otherwise None.
+    """
+    accepted = accepted_encodings(request)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def is_compressible(content_type):
+    content_type = content_type.split(';')[0].strip().lower()
+    return (
+        content_type.startswith('text/')
+        or content_type in COMPRESSIBLE_TYPES
+        or content_type.endswith(('+xml', '+json'))
+    )
+
+
+def _gzip_header(max_random_bytes):
+    # Like django.utils.text.compress_string, put a random-length file name in the
+    # header so the compressed size does not leak the page content (BREACH).
+    if not max_random_bytes:
+        return b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff'
+    name = get_random_string(1 + secrets.randbelow(max_random_bytes)).encode()
+    return b'\x1f\x8b\x08\x08\x00\x00\x00\x00\x00\xff' + name + b'\x00'
+
+
+class StreamCompressor:
+    """
+    Incremental gzip or brotli compressor.
+
+    compress(chunk) returns whatever output is ready; with flush=True the output
+    so far is decodable on its own, so a streamed page reaches the browser chunk by
+    chunk. finish() returns the trailer and must be called exactly once.
+    """
+    def __init__(self, encoding, max_random_bytes=0):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._deflate = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+            self._header = _gzip_header(max_random_bytes)
+            self._crc = 0
+            self._size = 0
+
+    def compress(self, chunk, flush=True):
+        if self.encoding == 'br':
+            out = self._brotli.process(chunk)
+            return out + self._brotli.flush() if flush else out
+        self._crc = zlib.crc32(chunk, self._crc)
+        self._size += len(chunk)
+        out = self._header + self._deflate.compress(chunk)
+        self._header = b''
+        return out + self._deflate.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._brotli.finish()
+        out = self._header + self._deflate.flush()
+        self._header = b''
+        return out + struct.pack('<II', self._crc, self._size & 0xffffffff)
+
+
+def compress_body(data, encoding, max_random_bytes=0):
+    compressor = StreamCompressor(encoding, max_random_bytes)
+    return compressor.compress(data, flush=False) + compressor.finish()
+
+
+def compress_stream(chunks, encoding, max_random_bytes=0):
+    compressor = StreamCompressor(encoding, max_random_bytes)
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.finish()
+
+
+async def acompress_stream(chunks, encoding, max_random_bytes=0):
+    compressor = StreamCompressor(encoding, max_random_bytes)
+    async for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.finish()
@@ -0,0 +1,117 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, Value, When
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+DECAY_LOCK_KEY = 'blog:trending:lock'
+DECAYED_AT_KEY = 'blog:trending:decayed_at'
+
+# One writer per process, so flushes never compete with each other for the SQLite lock.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='view-counter')
+
+
+class ViewCounter:
+    """
+    Write-behind post view counter.
+
+    hit() only bumps an in-memory counter. Every BLOG_VIEW_FLUSH_INTERVAL seconds,
+    or once BLOG_VIEW_FLUSH_MAX_PENDING hits have piled up, the counts are written
+    in one transaction with an UPDATE per distinct count rather than per hit, so a
+    busy post costs one write per flush however often it is read. Hits still in
+    memory when the process dies are lost; the counts are for ranking, not billing.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._pending_hits = 0
+        self._last_flush = time.monotonic()
+
+    def hit(self, post_id):
+        with self._lock:
+            self._pending[post_id] += 1
+            self._pending_hits += 1
+            due = (
+                time.monotonic() - self._last_flush >= getattr(settings, 'BLOG_VIEW_FLUSH_INTERVAL', 10)
+                or self._pending_hits >= getattr(settings, 'BLOG_VIEW_FLUSH_MAX_PENDING', 1000)
+            )
+            if due:
+                self._last_flush = time.monotonic()
+        if due:
+            if getattr(settings, 'BLOG_VIEW_COUNTER_ASYNC', True):
+                _executor.submit(self._flush_logged)
+            else:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._pending_hits = 0
+        if not pending:
+            return
+        by_count = defaultdict(list)
+        for post_id, count in pending.items():
+            by_count[count].append(post_id)
+        # A view adds one point to the trending score; decay_trending() ages it.
+        with transaction.atomic():
+            for count, post_ids in by_count.items():
+                Post.objects.filter(pk__in=post_ids).update(
+                    view_count=F('view_count') + count,
+                    trending_score=F('trending_score') + count,
+                )
+        maybe_decay_trending()
+
+    def _flush_logged(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Flushing post view counts failed')
+        finally:
+            close_old_connections()
+
+
+view_counter = ViewCounter()
+atexit.register(view_counter._flush_logged)
+
+
+def decay_trending(elapsed):
+    """
+    Age every trending score by `elapsed` seconds: scores halve every
+    BLOG_TRENDING_HALF_LIFE seconds, and scores that fall below 0.01 drop to 0 so
+    the UPDATE only touches posts read recently.
+    """
+    half_life = getattr(settings, 'BLOG_TRENDING_HALF_LIFE', 6 * 3600)
+    factor = 0.5 ** (elapsed / half_life)
+    return Post.objects.filter(trending_score__gt=0).update(
+        trending_score=Case(
+            When(trending_score__lt=0.01 / factor, then=Value(0.0)),
+            default=F('trending_score') * factor,
+        )
+    )
+
+
+def maybe_decay_trending(force=False):
+    """
+    Decay the trending scores by the time since the last decay, at most once per
+    BLOG_TRENDING_INTERVAL seconds; the cache lock makes one worker do it per
+    interval, whichever flushes first. force=True skips the interval check.
+    Returns True if the scores were decayed.
+    """
+    interval = getattr(settings, 'BLOG_TRENDING_INTERVAL', 300)
+    if not cache.add(DECAY_LOCK_KEY, 1, timeout=interval) and not force:
+        return False
+    now = time.time()
+    elapsed = now - cache.get(DECAYED_AT_KEY, now - interval)
+    decay_trending(elapsed)
+    cache.set(DECAYED_AT_KEY, now, timeout=None)
+    return True
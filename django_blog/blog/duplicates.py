@@ -0,0 +1,153 @@
+import hashlib
+import random
+import re
+import struct
+import zlib
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import PostLshBand, PostSignature
+
+# 128 MinHash values split into 16 bands of 8 rows: two posts share at least one
+# band with probability 1 - (1 - J^8)^16: about 1% at 40% overlap, 61% at 70%,
+# 95% at 80% and 99.99% at 90%, so few candidates fall far below the threshold.
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Fixed seed: signatures stored in the database must stay comparable across processes.
+_rng = random.Random(0x6D696E68)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_SIGNATURE = struct.Struct(f'<{NUM_PERM}I')
+
+
+def shingles(text):
+    """
+    The set of 3-word sequences in `text`, ignoring case and punctuation.
+    """
+    words = re.findall(r'\w+', text.lower())
+    if len(words) <= SHINGLE_WORDS:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+@lru_cache(maxsize=64)
+def signature(text):
+    """
+    MinHash signature of `text` (a tuple of NUM_PERM integers), or None for
+    empty text. The share of positions where two signatures agree estimates the
+    Jaccard similarity of the two texts' shingle sets. Memoised, since a new post
+    is hashed by the duplicate check and again when it is indexed on save.
+    """
+    hashes = [zlib.crc32(shingle.encode()) for shingle in shingles(text)]
+    if not hashes:
+        return None
+    return tuple(min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def band_keys(sig):
+    """
+    One 64-bit LSH key per band; equal keys mean the two signatures agree on all
+    ROWS values of that band.
+    """
+    keys = []
+    for band in range(BANDS):
+        rows = struct.pack(f'<H{ROWS}I', band, *sig[band * ROWS:(band + 1) * ROWS])
+        keys.append(int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), 'little', signed=True))
+    return keys
+
+
+def similarity(sig, other):
+    return sum(a == b for a, b in zip(sig, other)) / NUM_PERM
+
+
+def _threshold(threshold):
+    return threshold if threshold is not None else getattr(settings, 'BLOG_NEAR_DUPLICATE_THRESHOLD', 0.8)
+
+
+def content_hash(text):
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def index_post(post):
+    """
+    Store the signature and LSH buckets of `post`, replacing any previous ones.
+    If the stored signature was computed from the same content, nothing is done:
+    editing a post's title or tags costs one lookup, not a new MinHash.
+    """
+    digest = content_hash(post.content)
+    if PostSignature.objects.filter(post=post, content_hash=digest).exists():
+        return
+    sig = signature(post.content)
+    with transaction.atomic():
+        PostLshBand.objects.filter(post=post).delete()
+        if sig is None:
+            PostSignature.objects.filter(post=post).delete()
+            return
+        PostSignature.objects.update_or_create(
+            post=post, defaults={'minhash': _SIGNATURE.pack(*sig), 'content_hash': digest},
+        )
+        PostLshBand.objects.bulk_create(PostLshBand(post=post, key=key) for key in band_keys(sig))
+
+
+def find_near_duplicates(text, exclude_pk=None, threshold=None):
+    """
+    [(post_id, similarity), ...] for indexed posts whose content is at least
+    `threshold` similar to `text`, most similar first. One query, however many
+    posts there are: the signatures of the posts sharing an LSH bucket, with the
+    bucket lookup as an indexed subquery.
+    """
+    sig = signature(text)
+    if sig is None:
+        return []
+    candidates = PostLshBand.objects.filter(key__in=band_keys(sig)).exclude(post_id=exclude_pk)
+    found = [
+        (post_id, similarity(sig, _SIGNATURE.unpack(minhash)))
+        for post_id, minhash in PostSignature.objects.filter(
+            post_id__in=candidates.values('post_id')
+        ).values_list('post_id', 'minhash')
+    ]
+    threshold = _threshold(threshold)
+    return sorted([(pk, sim) for pk, sim in found if sim >= threshold], key=lambda pair: -pair[1])
+
+
+def near_duplicates_of(post_ids, threshold=None):
+    """
+    {post_id: [(other_post_id, similarity), ...]} for the given posts, for the
+    moderation page. Three queries for the whole batch.
+    """
+    bands = PostLshBand.objects.filter(post_id__in=post_ids).values_list('post_id', 'key')
+    keys_of = defaultdict(set)
+    for post_id, key in bands:
+        keys_of[post_id].add(key)
+    all_keys = set().union(*keys_of.values()) if keys_of else set()
+
+    posts_in = defaultdict(set)
+    for post_id, key in PostLshBand.objects.filter(key__in=all_keys).values_list('post_id', 'key'):
+        posts_in[key].add(post_id)
+    pairs = {
+        post_id: set().union(*(posts_in[key] for key in keys)) - {post_id}
+        for post_id, keys in keys_of.items()
+    }
+    wanted = set(pairs).union(*pairs.values()) if pairs else set()
+    signatures = {
+        post_id: _SIGNATURE.unpack(minhash)
+        for post_id, minhash in PostSignature.objects.filter(post_id__in=wanted).values_list('post_id', 'minhash')
+    }
+
+    threshold = _threshold(threshold)
+    result = {}
+    for post_id, others in pairs.items():
+        if post_id not in signatures:
+            continue
+        scored = [(other, similarity(signatures[post_id], signatures[other])) for other in others if other in signatures]
+        scored = sorted([pair for pair in scored if pair[1] >= threshold], key=lambda pair: -pair[1])
+        if scored:
+            result[post_id] = scored
+    return result
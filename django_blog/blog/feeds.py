@@ -0,0 +1,174 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.http import http_date, quote_etag
+from taggit.models import Tag, TaggedItem
+
+from .models import Post
+
+FEED_KEY_PREFIX = 'blog:feed:'
+FEED_FORMATS = ('rss', 'atom')
+
+
+def feed_scope(tag_id=None):
+    """
+    Cache scope of a feed: 'all' for the site-wide feed, 'tag:<id>' for a tag feed.
+    """
+    if tag_id is None:
+        return 'all'
+    return f'tag:{tag_id}'
+
+
+def _feed_key(scope, feed_format):
+    return f'{FEED_KEY_PREFIX}{scope}:{feed_format}'
+
+
+def invalidate_feeds(scopes, post_ids=None):
+    """
+    Drop the cached RSS and Atom renderings of the given feeds. With post_ids, only
+    the renderings whose window of latest posts contains one of those posts are
+    dropped, so editing an old post does not rebuild feeds it no longer appears in.
+    Called from transaction.on_commit (blog/signals.py), so a request that reads the
+    feed before the change commits can't cache the old version again.
+    """
+    keys = [_feed_key(scope, feed_format) for scope in scopes for feed_format in FEED_FORMATS]
+    if post_ids is not None:
+        keys = [key for key, entry in cache.get_many(keys).items() if not entry['post_ids'].isdisjoint(post_ids)]
+    if keys:
+        cache.delete_many(keys)
+
+
+def invalidate_author_feeds(user_id):
+    """
+    Drop the feeds that show a post by this user, which name the author.
+    """
+    post_ids = set(Post.objects.filter(author_id=user_id).values_list('pk', flat=True))
+    if not post_ids:
+        return
+    tag_ids = TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Post), object_id__in=post_ids,
+    ).values_list('tag_id', flat=True).distinct()
+    invalidate_feeds([feed_scope()] + [feed_scope(tag_id) for tag_id in tag_ids], post_ids=post_ids)
+
+
+class CachedFeed(Feed):
+    """
+    Feed whose rendered XML is kept in the cache until a post in it changes
+    (see blog/signals.py), and which answers If-None-Match / If-Modified-Since
+    with a 304, so a feed reader polling an unchanged feed costs one cache read.
+    """
+    feed_format = 'rss'
+
+    def get_scope(self, obj):
+        return feed_scope()
+
+    def get_posts(self, obj):
+        return Post.objects.all()
+
+    def items(self, obj):
+        size = getattr(settings, 'BLOG_FEED_SIZE', 20)
+        posts = self.get_posts(obj).select_related('author').defer('content')
+        return posts.order_by('-published_date', '-id')[:size]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt
+
+    def item_link(self, item):
+        return reverse('blog:post-detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.published_date
+
+    def item_author_name(self, item):
+        return item.author.username
+
+    def item_extra_kwargs(self, item):
+        # Not written to the XML; lets the cache entry record which posts it shows.
+        return {'post_id': item.pk}
+
+    def render_entry(self, obj, request):
+        feedgen = self.get_feed(obj, request)
+        body = feedgen.writeString('utf-8').encode()
+        return {
+            # Links in the feed are absolute, so an entry is only reused for the same origin.
+            'origin': (request.scheme, request.get_host()),
+            'body': body,
+            'content_type': feedgen.content_type,
+            'etag': quote_etag(hashlib.sha256(body).hexdigest()),
+            'last_modified': int(feedgen.latest_post_date().timestamp()),
+            'post_ids': {item['post_id'] for item in feedgen.items},
+        }
+
+    def __call__(self, request, *args, **kwargs):
+        try:
+            obj = self.get_object(request, *args, **kwargs)
+        except ObjectDoesNotExist:
+            raise Http404('Feed object does not exist.')
+
+        key = _feed_key(self.get_scope(obj), self.feed_format)
+        entry = cache.get(key)
+        if entry is None or entry['origin'] != (request.scheme, request.get_host()):
+            entry = self.render_entry(obj, request)
+            cache.set(key, entry, getattr(settings, 'BLOG_FEED_CACHE_TIMEOUT', 86400))
+
+        response = HttpResponse(entry['body'], content_type=entry['content_type'])
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(entry['last_modified'])
+        response['Cache-Control'] = f"public, max-age={getattr(settings, 'BLOG_FEED_MAX_AGE', 300)}"
+        return get_conditional_response(
+            request, etag=entry['etag'], last_modified=entry['last_modified'], response=response
+        )
+
+
+class LatestPostsFeed(CachedFeed):
+    title = 'Django Blog'
+    description = 'The latest posts on Django Blog.'
+
+    def link(self):
+        return reverse('blog:post-list')
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    feed_format = 'atom'
+    subtitle = LatestPostsFeed.description
+
+
+class TagPostsFeed(CachedFeed):
+    def get_object(self, request, tag_name):
+        return get_object_or_404(Tag, name__iexact=tag_name)
+
+    def get_scope(self, obj):
+        return feed_scope(obj.pk)
+
+    def get_posts(self, obj):
+        return Post.objects.filter(tags__name__iexact=obj.name)
+
+    def title(self, obj):
+        return f'Django Blog: posts tagged "{obj.name}"'
+
+    def description(self, obj):
+        return f'The latest posts tagged "{obj.name}".'
+
+    def link(self, obj):
+        return reverse('blog:posts-by-tag', args=[obj.name])
+
+
+class TagPostsAtomFeed(TagPostsFeed):
+    feed_type = Atom1Feed
+    feed_format = 'atom'
+
+    def subtitle(self, obj):
+        return self.description(obj)
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post, make_excerpt
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute Post.excerpt from Post.content in primary-key batches. Run after "
+        "migrating, and after any bulk edit that bypassed Post.save()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Posts per batch (default 500).')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk, checked, updated = 0, 0, 0
+        while True:
+            # Keyset pagination: each batch is an index range scan, however far in we are.
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk').only('pk', 'content', 'excerpt')[:batch_size]
+            )
+            if not batch:
+                break
+            stale = []
+            for post in batch:
+                excerpt = make_excerpt(post.content)
+                if post.excerpt != excerpt:
+                    post.excerpt = excerpt
+                    stale.append(post)
+            Post.objects.bulk_update(stale, ['excerpt'])
+            checked += len(batch)
+            updated += len(stale)
+            last_pk = batch[-1].pk
+        self.stdout.write(f'{updated} of {checked} excerpts updated.')
@@ -0,0 +1,72 @@
+import time
+
+from django.contrib.auth import get_user_model, login
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+SETUPS = {
+    'db sessions + ModelBackend': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+        'AUTHENTICATION_BACKENDS': ['django.contrib.auth.backends.ModelBackend'],
+    },
+    'cached_db + CachedModelBackend': {
+        'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+        'AUTHENTICATION_BACKENDS': ['blog.backends.CachedModelBackend'],
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the session + user lookup that every authenticated page view "
+        "(e.g. profile_view) pays, under the old and the new session/auth setup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per setup (default 2000).')
+
+    def handle(self, *args, **options):
+        # The benchmark user and sessions are rolled back at the end.
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(username='bench-auth-user', password='bench-pass')
+            for label, overrides in SETUPS.items():
+                with override_settings(**overrides):
+                    self.run_setup(label, user, overrides['AUTHENTICATION_BACKENDS'][0], options['requests'])
+            transaction.set_rollback(True)
+
+    def run_setup(self, label, user, backend, total):
+        factory = RequestFactory()
+
+        # Log in once to get a session cookie, like a browser would.
+        request = factory.get('/login/')
+        SessionMiddleware(lambda r: HttpResponse()).process_request(request)
+        login(request, user, backend=backend)
+        request.session.save()
+        session_key = request.session.session_key
+        cache.clear()
+
+        def page_view():
+            # The middleware work an authenticated request does before reaching the view.
+            req = factory.get('/profile/')
+            req.COOKIES['sessionid'] = session_key
+            SessionMiddleware(lambda r: HttpResponse()).process_request(req)
+            AuthenticationMiddleware(lambda r: HttpResponse()).process_request(req)
+            assert req.user.is_authenticated
+
+        page_view()  # warm the caches
+        with CaptureQueriesContext(connection) as queries:
+            page_view()
+        start = time.perf_counter()
+        for _ in range(total):
+            page_view()
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:<32} {len(queries)} queries/request  "
+            f"{elapsed / total * 1e6:8.1f} us/request"
+        )
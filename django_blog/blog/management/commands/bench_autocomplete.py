@@ -0,0 +1,59 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.autocomplete import PrefixIndex
+
+WORDS = (
+    'django python orm query cache index template view model form async api rest '
+    'testing deploy docker postgres sqlite migration signal middleware session auth '
+    'static media upload search feed sitemap tag comment archive performance'
+).split()
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the autocomplete prefix index over synthetic post titles and tags and "
+        "time lookups for typed prefixes (no database involved)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000, help='Synthetic posts (default 100000).')
+        parser.add_argument('--tags', type=int, default=5000, help='Synthetic tags (default 5000).')
+        parser.add_argument('--queries', type=int, default=20000, help='Lookups to time (default 20000).')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        titles = [
+            (pk, ' '.join(rng.choice(WORDS) + (str(rng.randrange(1000)) if rng.random() < 0.3 else '')
+                          for _ in range(rng.randint(3, 9))).title())
+            for pk in range(1, options['posts'] + 1)
+        ]
+        tags = [(pk, f'{rng.choice(WORDS)}-{pk}') for pk in range(1, options['tags'] + 1)]
+
+        start = time.perf_counter()
+        index = PrefixIndex(titles, tags)
+        self.stdout.write(
+            f"built {sum(map(len, index.entries.values()))} keys for {len(titles)} posts and {len(tags)} tags "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+        queries = []
+        for _ in range(options['queries']):
+            words = rng.choice(titles)[1].lower().split()
+            typed = ' '.join(words[rng.randrange(len(words)):])
+            queries.append(typed[:rng.randint(1, min(len(typed), 12))])
+
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            index.lookup(query, 8)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        self.stdout.write(
+            f"{len(queries)} lookups: p50 {statistics.median(timings):.3f} ms, "
+            f"p99 {p99:.3f} ms, max {timings[-1]:.3f} ms"
+        )
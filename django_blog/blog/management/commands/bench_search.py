@@ -0,0 +1,128 @@
+import itertools
+import random
+import statistics
+import string
+import time
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.test import RequestFactory
+from taggit.models import Tag, TaggedItem
+
+from blog.models import Post
+from blog.search import index_posts, search_posts
+from blog.views import search_view
+
+WORDS = (
+    'django python orm query cache index template view model form async api rest '
+    'testing deploy docker postgres sqlite migration signal middleware session auth '
+    'static media upload search feed sitemap tag comment archive performance'
+).split()
+
+
+def typo(word, rng):
+    i = rng.randrange(len(word) - 1)
+    kind = rng.choice(['swap', 'drop', 'replace', 'insert'])
+    if kind == 'swap':
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+    if kind == 'drop':
+        return word[:i] + word[i + 1:]
+    letter = rng.choice(string.ascii_lowercase)
+    return word[:i] + letter + word[i + (kind == 'replace'):]
+
+
+def timed(queries, run):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        run(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[max(int(len(timings) * 0.99) - 1, 0)], timings[-1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic tagged posts, index them for fuzzy search and "
+        "time misspelled queries, and the search page serving them, against the old "
+        "substring search. Everything runs in one transaction that is rolled back at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000, help='Synthetic posts (default 100000).')
+        parser.add_argument('--vocabulary', type=int, default=30000, help='Distinct title words (default 30000).')
+        parser.add_argument('--queries', type=int, default=2000, help='Fuzzy queries to time (default 2000).')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(**options)
+            transaction.set_rollback(True)
+
+    def run(self, posts, vocabulary, queries, **options):
+        rng = random.Random(42)
+        syllables = [a + b for a in 'bcdfghklmnprstvz' for b in 'aeiou']
+        vocab = WORDS + list({''.join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(vocabulary)})
+        # Roughly Zipfian: a few words are in many titles, most in a handful.
+        weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocab))))
+
+        start = time.perf_counter()
+        author = User.objects.create_user(username='bench-search')
+        first = Post.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        Post.objects.bulk_create(
+            (Post(title=' '.join(rng.choices(vocab, cum_weights=weights, k=rng.randint(3, 9))).title(),
+                  content='-', author=author)
+             for _ in range(posts)),
+            batch_size=5000,
+        )
+        post_ids = list(Post.objects.filter(pk__gt=first).values_list('pk', flat=True))
+        Tag.objects.bulk_create(
+            Tag(name=f'{word}-{i}', slug=f'bench-{i}') for i, word in enumerate(rng.choices(WORDS, k=2000))
+        )
+        tags = list(Tag.objects.filter(slug__startswith='bench-'))
+        post_type = ContentType.objects.get_for_model(Post)
+        TaggedItem.objects.bulk_create(
+            (TaggedItem(content_type=post_type, object_id=pk, tag=tag)
+             for pk in post_ids for tag in set(rng.choices(tags, k=rng.randint(0, 4)))),
+            batch_size=5000,
+        )
+        self.stdout.write(f'created {len(post_ids)} posts in {time.perf_counter() - start:.1f}s')
+
+        start = time.perf_counter()
+        for i in range(0, len(post_ids), 1000):
+            index_posts(post_ids[i:i + 1000])
+        self.stdout.write(f'indexed them in {time.perf_counter() - start:.1f}s')
+
+        titles = dict(Post.objects.filter(pk__in=rng.sample(post_ids, 500)).values_list('pk', 'title'))
+        fuzzy, intended = [], {}
+        for _ in range(queries):
+            words = [w for w in rng.choice(list(titles.values())).lower().split() if len(w) >= 4]
+            if words:
+                picked = rng.sample(words, min(len(words), rng.choice([1, 1, 2])))
+                query = ' '.join(typo(word, rng) for word in picked)
+                fuzzy.append(query)
+                intended[query] = picked
+
+        p50, p99, worst = timed(fuzzy, lambda query: search_posts(query, 50))
+        self.stdout.write(f'{len(fuzzy)} fuzzy searches: p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {worst:.1f} ms')
+
+        # The whole page: ranking, the fill-up from the index, loading the posts, rendering.
+        factory = RequestFactory()
+        p50, p99, worst = timed(fuzzy, lambda query: search_view(factory.get('/search/', {'q': query})))
+        self.stdout.write(f'{len(fuzzy)} search pages: p50 {p50:.1f} ms, p99 {p99:.1f} ms, max {worst:.1f} ms')
+
+        def substring(query):
+            list(Post.objects.filter(
+                Q(title__icontains=query) | Q(content__icontains=query) | Q(tags__name__icontains=query)
+            ).distinct().values_list('pk', flat=True)[:50])
+        p50, p99, worst = timed(fuzzy[:50], substring)
+        self.stdout.write(f'50 substring searches (the old search): p50 {p50:.1f} ms, max {worst:.1f} ms')
+
+        # A hit: one of the top 5 has every intended word in its title.
+        found = 0
+        for query in fuzzy[:200]:
+            top = Post.objects.filter(pk__in=[pk for pk, _ in search_posts(query, 5)]).values_list('title', flat=True)
+            found += any(set(intended[query]) <= set(title.lower().split()) for title in top)
+        self.stdout.write(f'{found}/200 misspelled queries found a post with the intended words in the top 5')
@@ -0,0 +1,65 @@
+import time
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import Context, Engine, engines
+from django.test import RequestFactory
+
+from blog.models import Comment, Post
+
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request template cost with and without the cached loader "
+        "for post_list.html and post_detail.html."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Renders per template and loader (default 500).')
+
+    def handle(self, *args, **options):
+        # Sample data is rolled back at the end.
+        with transaction.atomic():
+            self.run(options['requests'])
+            transaction.set_rollback(True)
+
+    def run(self, total):
+        author = User.objects.create_user(username='bench-templates', password='x')
+        posts = [
+            Post.objects.create(title=f'Post {i}', content='Lorem ipsum dolor sit amet. ' * 80, author=author)
+            for i in range(10)
+        ]
+        posts[0].tags.add('django', 'performance')
+        Comment.objects.bulk_create(
+            Comment(post=posts[0], author=author, content=f'Comment {i}') for i in range(20)
+        )
+        request = RequestFactory().get('/posts/')
+        base = {'request': request, 'user': AnonymousUser()}
+        contexts = {
+            'blog/post_list.html': dict(base, posts=Post.objects.select_related('author')[:10]),
+            'blog/post_detail.html': dict(base, object=posts[0]),
+        }
+
+        libraries = next(iter(engines.all())).engine.libraries
+        uncached = Engine(loaders=LOADERS, libraries=libraries)
+        cached = Engine(loaders=[('django.template.loaders.cached.Loader', LOADERS)], libraries=libraries)
+
+        for name, ctx in contexts.items():
+            context = Context(ctx)
+            start = time.perf_counter()
+            cached.get_template(name)
+            compile_ms = (time.perf_counter() - start) * 1000
+            self.stdout.write(f"{name}  (compile {compile_ms:.2f} ms)")
+            for label, engine in (('uncached loader', uncached), ('cached loader', cached)):
+                engine.get_template(name).render(context)  # warm querysets
+                start = time.perf_counter()
+                for _ in range(total):
+                    engine.get_template(name).render(context)
+                per_request = (time.perf_counter() - start) / total * 1e6
+                self.stdout.write(f"  {label:<16} {per_request:9.1f} us/request (load + render)")
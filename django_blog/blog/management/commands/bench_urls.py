@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.urls import get_resolver
+
+HOT_PATHS = [
+    '/posts/',
+    '/posts/42/',
+    '/posts/42/comments/new/',
+    '/tags/django/',
+    '/search/',
+    '/login/',
+]
+
+
+class Command(BaseCommand):
+    help = "Time URL resolution for the blog's hot paths."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20000, help='Resolutions per path (default 20000).')
+
+    def handle(self, *args, **options):
+        resolver = get_resolver()
+        rounds = options['rounds']
+        blog_patterns = next(p for p in resolver.url_patterns if getattr(p, 'namespace', None) == 'blog')
+        self.stdout.write(f"{len(blog_patterns.url_patterns)} blog URL patterns")
+        for path in HOT_PATHS:
+            match = resolver.resolve(path)
+            start = time.perf_counter()
+            for _ in range(rounds):
+                resolver.resolve(path)
+            per_call = (time.perf_counter() - start) / rounds * 1e6
+            self.stdout.write(f"{path:<28} {per_call:6.2f} us  -> {match.view_name}")
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from blog.sitemaps import SECTIONS, shard_count, shard_path
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every missing sitemap shard ahead of time, so crawlers never wait for "
+        "a shard to be generated. Shards already on disk are left alone."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('host', help='Host the URLs are written for, e.g. blog.example.com.')
+        parser.add_argument('--http', action='store_true', help='Write http:// URLs instead of https://.')
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/', HTTP_HOST=options['host'], secure=not options['http'])
+        written = 0
+        for section in SECTIONS:
+            for number in range(shard_count(section)):
+                path = shard_path(request, section, number)
+                self.stdout.write(f'{section} {number}: {path}')
+                written += 1
+        self.stdout.write(f'{written} shards under {settings.BLOG_SITEMAP_ROOT}.')
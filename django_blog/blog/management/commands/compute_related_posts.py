@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import related
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the related-posts table: cosine similarity of IDF-weighted tag "
+        "vectors, top-k per post. Needs numpy and scipy. Run it from cron; posts "
+        "tagged since the last run simply show no related posts yet."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=getattr(settings, 'BLOG_RELATED_POSTS', 5),
+            help='Related posts kept per post (default BLOG_RELATED_POSTS).',
+        )
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Posts per similarity block (default 1000).')
+
+    def handle(self, *args, **options):
+        if related.np is None:
+            raise CommandError('compute_related_posts needs numpy and scipy: pip install numpy scipy')
+        started = time.perf_counter()
+        written = related.compute_related_posts(options['top_k'], options['chunk_size'])
+        self.stdout.write(f'{written} related-post rows written in {time.perf_counter() - started:.1f}s.')
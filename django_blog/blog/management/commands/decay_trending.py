@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog.counters import maybe_decay_trending, view_counter
+
+
+class Command(BaseCommand):
+    help = (
+        "Age the post trending scores by the time since they were last aged. Web "
+        "workers do this as they flush view counts; run it from cron as well so "
+        "scores keep decaying while the site is quiet."
+    )
+
+    def handle(self, *args, **options):
+        view_counter.flush()
+        maybe_decay_trending(force=True)
+        self.stdout.write('Trending scores updated.')
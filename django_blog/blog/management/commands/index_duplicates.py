@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from blog.duplicates import index_post
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute the MinHash signature and LSH buckets of posts that don't have them "
+        "yet (all posts with --all). New and edited posts are indexed on save."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-index every post.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Posts per batch (default 500).')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.all() if options['all'] else Post.objects.filter(signature__isnull=True)
+        last_pk, indexed = 0, 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk).order_by('pk').only('pk', 'content')[:options['batch_size']])
+            if not batch:
+                break
+            for post in batch:
+                index_post(post)
+            indexed += len(batch)
+            last_pk = batch[-1].pk
+        self.stdout.write(f'{indexed} posts indexed.')
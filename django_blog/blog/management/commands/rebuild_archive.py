@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog.archive import rebuild_month_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the posts per month behind the archive sidebar. Run once after "
+        "migrating, and after bulk imports or deletes that bypassed the Post signals."
+    )
+
+    def handle(self, *args, **options):
+        months = rebuild_month_counts()
+        self.stdout.write(f'{months} months counted.')
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post, SearchTerm
+from blog.search import index_posts
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-index the title and tag words of every post for fuzzy search, and drop "
+        "terms no post uses any more. New and edited posts are indexed on save."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Posts per batch (default 1000).')
+
+    def handle(self, *args, **options):
+        last_pk, indexed = 0, 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            index_posts(batch)
+            indexed += len(batch)
+            last_pk = batch[-1]
+        _, deleted = SearchTerm.objects.filter(posts__isnull=True).delete()
+        self.stdout.write(
+            f"{indexed} posts indexed; {deleted.get('blog.SearchTerm', 0)} unused terms dropped."
+        )
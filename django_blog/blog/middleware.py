@@ -0,0 +1,111 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.cache import patch_vary_headers
+
+from .compression import acompress_stream, choose_encoding, compress_body, compress_stream, is_compressible
+
+COMPRESSED_KEY_PREFIX = 'blog:compressed:'
+
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header with the render time of each template rendered for the
+    request, e.g. `Server-Timing: tpl;desc="blog/post_list.html";dur=3.41`, which the
+    browser's network panel shows. Enabled by BLOG_SERVER_TIMING.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'BLOG_SERVER_TIMING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.template_timings = []
+        response = self.get_response(request)
+        if request.template_timings:
+            response['Server-Timing'] = ', '.join(
+                f'tpl;desc="{name}";dur={elapsed:.2f}' for name, elapsed in request.template_timings
+            )
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compresses text responses with brotli or gzip, whichever the client accepts.
+
+    - Bodies shorter than BLOG_COMPRESSION_MIN_SIZE bytes are sent as they are; the
+      framing overhead would eat most of the saving.
+    - StreamingHttpResponse bodies are compressed chunk by chunk and flushed after
+      each one, so the browser can start parsing before the view has finished.
+    - Responses that are cacheable anyway (an ETag, or public Cache-Control) keep
+      their compressed body in the cache under a hash of the uncompressed body, so a
+      page served over and over is only compressed once.
+    - gzip bodies are padded like Django's GZipMiddleware does, against BREACH.
+    """
+    max_random_bytes = 100
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'BLOG_COMPRESSION_MIN_SIZE', 1024)
+        self.cache_timeout = getattr(settings, 'BLOG_COMPRESSION_CACHE_TIMEOUT', 600)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.has_header('Content-Encoding')
+            or response.has_header('Content-Range')
+            or not is_compressible(response.get('Content-Type', ''))
+            or (not response.streaming and len(response.content) < self.min_size)
+        ):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_stream(
+                    response.streaming_content, encoding, self.max_random_bytes
+                )
+            else:
+                response.streaming_content = compress_stream(
+                    response.streaming_content, encoding, self.max_random_bytes
+                )
+            # The compressed size is not known until the last chunk has been sent.
+            del response.headers['Content-Length']
+        else:
+            compressed = self.compress(response, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # RFC 9110 8.8.1: a strong ETag can't be shared by two different encodings.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def is_cacheable(self, response):
+        cache_control = response.get('Cache-Control', '').lower()
+        if 'private' in cache_control or 'no-store' in cache_control:
+            return False
+        return response.status_code == 200 and (
+            response.has_header('ETag') or 'public' in cache_control
+        )
+
+    def compress(self, response, encoding):
+        if not self.is_cacheable(response):
+            return compress_body(response.content, encoding, self.max_random_bytes)
+        digest = hashlib.sha256(response.content).hexdigest()
+        key = f'{COMPRESSED_KEY_PREFIX}{encoding}:{digest}'
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = compress_body(response.content, encoding, self.max_random_bytes)
+            cache.set(key, compressed, self.cache_timeout)
+        return compressed
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postsignature',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_post_signature_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AutocompleteChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.PositiveSmallIntegerField()),
+                ('object_id', models.BigIntegerField()),
+                ('text', models.TextField(null=True)),
+            ],
+        ),
+    ]
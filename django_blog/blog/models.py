@@ -3,14 +3,30 @@
 
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils.text import Truncator
 from taggit.managers import TaggableManager
 
+# Words of content shown on listing pages. After changing it, run backfill_excerpts.
+EXCERPT_WORDS = 25
+
+
+def make_excerpt(content):
+    return Truncator(content).words(EXCERPT_WORDS)
+
 
 class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
-    published_date = models.DateTimeField(auto_now_add=True)
+    # First EXCERPT_WORDS words of content, kept in sync by save() so list pages can
+    # defer('content'). Rows written with queryset.update() are fixed by backfill_excerpts.
+    excerpt = models.TextField(blank=True, editable=False)
+    # Indexed for the archive pages' date-range queries.
+    published_date = models.DateTimeField(auto_now_add=True, db_index=True)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
+    # Written in batches by blog.counters.view_counter, never by save().
+    view_count = models.PositiveBigIntegerField(default=0, db_index=True, editable=False)
+    # Views with exponential time decay (see blog.counters.decay_trending).
+    trending_score = models.FloatField(default=0, db_index=True, editable=False)
 
     # Use django-taggit TaggableManager
     tags = TaggableManager(blank=True)
@@ -18,6 +34,139 @@ class Post(models.Model):
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'content' in update_fields:
+            self.excerpt = make_excerpt(self.content)
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+
+
+class MonthlyPostCount(models.Model):
+    """
+    Number of posts published in each month (in TIME_ZONE), kept up to date by
+    blog/signals.py so the archive sidebar never has to GROUP BY over posts.
+    Rebuilt from scratch by `manage.py rebuild_archive`.
+    """
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-year', '-month']
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'month'], name='monthly_post_count_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.year}-{self.month:02d}: {self.count}'
+
+
+class RelatedPost(models.Model):
+    """
+    Precomputed "related posts": for each post, its most similar posts by shared
+    tags, best first. Written in bulk by `manage.py compute_related_posts`.
+    """
+    # No separate index: related_post_rank_unique starts with post.
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_links', db_index=False)
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_from')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        ordering = ['post', 'rank']
+        constraints = [
+            # Also the index behind the detail page's single lookup.
+            models.UniqueConstraint(fields=['post', 'rank'], name='related_post_rank_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} -> {self.related_id} ({self.score:.3f})'
+
+
+class PostSignature(models.Model):
+    """
+    MinHash signature of a post's content (blog/duplicates.py), used to estimate
+    how much two posts overlap without comparing their text.
+    """
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    minhash = models.BinaryField()
+    # Hash of the content the signature was computed from; unchanged content isn't re-hashed.
+    content_hash = models.CharField(max_length=32, blank=True)
+
+    def __str__(self):
+        return f'MinHash of post {self.post_id}'
+
+
+class PostLshBand(models.Model):
+    """
+    One LSH bucket a post falls in: posts sharing any bucket are near-duplicate
+    candidates, found with a single `key IN (...)` lookup instead of a scan.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='lsh_bands')
+    key = models.BigIntegerField(db_index=True)
+
+    def __str__(self):
+        return f'{self.key} -> post {self.post_id}'
+
+
+class SearchTerm(models.Model):
+    """
+    A word that appears in some post title or tag name (blog/search.py). Fuzzy
+    search matches query words against these, not against every post.
+    """
+    term = models.CharField(max_length=40, unique=True)
+    trigram_count = models.PositiveSmallIntegerField()
+
+    def __str__(self):
+        return self.term
+
+
+class TermTrigram(models.Model):
+    term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name='trigrams')
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        constraints = [
+            # Also the index that finds the terms sharing a trigram with a query word.
+            models.UniqueConstraint(fields=['trigram', 'term'], name='term_trigram_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.trigram!r} in {self.term_id}'
+
+
+class PostTerm(models.Model):
+    """
+    Post `post` has `term` in its title or in one of its tags.
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.ForeignKey(SearchTerm, on_delete=models.CASCADE, related_name='posts')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['term', 'post'], name='post_term_unique'),
+        ]
+
+    def __str__(self):
+        return f'{self.term_id} -> post {self.post_id}'
+
+
+class AutocompleteChange(models.Model):
+    """
+    A post title or tag name that was set or removed, for the other workers'
+    autocomplete indexes (blog/autocomplete.py). The auto-increment id is the
+    shared version: a worker applies the rows after the last one it has seen.
+    """
+    kind = models.PositiveSmallIntegerField()
+    object_id = models.BigIntegerField()
+    # New title or name; null when the post or tag was deleted.
+    text = models.TextField(null=True)
+
+    def __str__(self):
+        return f'{self.pk}: {self.kind}/{self.object_id}'
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -35,7 +184,11 @@ class Comment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        ordering = ['created_at']
+        ordering = ['created_at', 'id']
+        indexes = [
+            # Serves comment_page's keyset pagination: WHERE post_id = ? AND (created_at, id) > (?, ?)
+            models.Index(fields=['post', 'created_at', 'id'], name='comment_post_created_idx'),
+        ]
 
     def __str__(self):
         return f'Comment by {self.author} on "{self.post}"'
\ No newline at end of file
@@ -0,0 +1,104 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from taggit.models import TaggedItem
+
+from .models import Post, RelatedPost
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # only compute_related_posts needs them; the site just reads RelatedPost
+    np = sparse = None
+
+
+# Tags on more than this share of posts (and on more than COMMON_TAG_MIN_POSTS
+# posts) are left out: they say little about relatedness, and a tag on most posts
+# makes every post similar to every other, which turns X @ X.T dense.
+COMMON_TAG_MAX_SHARE = 0.1
+COMMON_TAG_MIN_POSTS = 1000
+
+
+def tag_matrix():
+    """
+    (post_ids, matrix): a sparse post x tag matrix built from taggit's through
+    table, one row per tagged post (in post_ids order). Each tag is weighted by
+    its inverse document frequency, so sharing a rare tag counts for more than
+    sharing a common one, and rows are L2-normalised so that X @ X.T is the
+    cosine similarity.
+    """
+    post_type = ContentType.objects.get_for_model(Post)
+    pairs = TaggedItem.objects.filter(content_type=post_type).values_list('object_id', 'tag_id')
+    pairs = np.array(list(pairs.iterator(chunk_size=10000)), dtype=np.int64).reshape(-1, 2)
+    post_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    _, cols = np.unique(pairs[:, 1], return_inverse=True)
+
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs)), (rows, cols)), shape=(len(post_ids), cols.max() + 1 if len(cols) else 0)
+    )
+    matrix.data[:] = 1.0  # a post tagged twice with the same tag is still one tag
+    document_frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + len(post_ids)) / (1 + document_frequency)) + 1
+    too_common = (document_frequency > COMMON_TAG_MAX_SHARE * len(post_ids)) & (
+        document_frequency > COMMON_TAG_MIN_POSTS
+    )
+    idf[too_common] = 0
+    matrix = matrix @ sparse.diags(idf)
+    matrix.eliminate_zeros()
+    norms = np.sqrt(matrix.multiply(matrix).sum(axis=1)).A1
+    norms[norms == 0] = 1  # posts with only common tags end up with no related posts
+    matrix = sparse.diags(1 / norms) @ matrix
+    return post_ids, matrix.tocsr()
+
+
+def top_k_similar(matrix, k, chunk_size=1000):
+    """
+    Yield (row, [(other_row, score), ...]) with the k most similar other rows,
+    best first. Similarities are computed one block of rows at a time, so
+    memory grows with chunk_size, not with the square of the number of posts.
+    """
+    for start in range(0, matrix.shape[0], chunk_size):
+        block = (matrix[start:start + chunk_size] @ matrix.T).tocsr()
+        for offset in range(block.shape[0]):
+            row = start + offset
+            lo, hi = block.indptr[offset], block.indptr[offset + 1]
+            others, scores = block.indices[lo:hi], block.data[lo:hi]
+            keep = others != row
+            others, scores = others[keep], scores[keep]
+            # Best score first; among equal scores, the newer (higher id) post first.
+            if len(scores) > k:
+                # Everything above the k-th best score, then the newest of the posts
+                # tied with it, so the cutoff follows the same order as the ranking.
+                kth = -np.partition(-scores, k - 1)[k - 1]
+                above = np.flatnonzero(scores > kth)
+                tied = np.flatnonzero(scores == kth)
+                tied = tied[np.argsort(-others[tied], kind='stable')[:k - len(above)]]
+                best = np.concatenate([above, tied])
+                others, scores = others[best], scores[best]
+            order = np.lexsort((-others, -scores))
+            yield row, list(zip(others[order].tolist(), scores[order].tolist()))
+
+
+def compute_related_posts(k, chunk_size=1000, batch_size=5000):
+    """
+    Replace the RelatedPost table with the top-k posts by tag similarity for
+    every tagged post. Returns the number of rows written.
+    """
+    post_ids, matrix = tag_matrix()
+    written = 0
+    with transaction.atomic():
+        RelatedPost.objects.all().delete()
+        if not len(post_ids):
+            return 0
+        batch = []
+        for row, similar in top_k_similar(matrix, k, chunk_size):
+            for rank, (other, score) in enumerate(similar, start=1):
+                batch.append(RelatedPost(
+                    post_id=int(post_ids[row]), related_id=int(post_ids[other]), rank=rank, score=score,
+                ))
+            if len(batch) >= batch_size:
+                RelatedPost.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        RelatedPost.objects.bulk_create(batch)
+        written += len(batch)
+    return written
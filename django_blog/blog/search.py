@@ -0,0 +1,234 @@
+import math
+import operator
+import re
+import threading
+from collections import defaultdict
+from functools import reduce
+from itertools import groupby
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Case, Count, FloatField, Max, Q, Value, When
+from django.db.models.functions import Coalesce
+from taggit.models import TaggedItem
+
+from .models import Post, PostTerm, SearchTerm, TermTrigram
+
+# Matches SearchTerm.term; longer words are indexed and searched by their start.
+TERM_LENGTH = 40
+MAX_QUERY_WORDS = 8
+# The closest terms kept per query word: bounds the posting lists read for a short,
+# vague word that resembles hundreds of terms.
+MAX_TERMS_PER_WORD = 20
+
+
+def words(text):
+    return list(dict.fromkeys(word[:TERM_LENGTH] for word in re.findall(r'\w+', text.lower())))
+
+
+def trigrams(word):
+    """
+    The trigrams of `word` padded the way pg_trgm pads them ('  d', ' dj', 'dja',
+    ..., 'go '), so the first letters count for more than the middle ones.
+    """
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _threshold(threshold):
+    return threshold if threshold is not None else getattr(settings, 'BLOG_SEARCH_SIMILARITY', 0.25)
+
+
+def _term_ids(new_words):
+    """
+    {word: SearchTerm id}, adding the words (and their trigrams) that aren't
+    terms yet.
+    """
+    ids = dict(SearchTerm.objects.filter(term__in=new_words).values_list('term', 'id'))
+    missing = [word for word in new_words if word not in ids]
+    if missing:
+        # ignore_conflicts: another request may add the same word in the meantime.
+        SearchTerm.objects.bulk_create(
+            [SearchTerm(term=word, trigram_count=len(trigrams(word))) for word in missing], ignore_conflicts=True,
+        )
+        created = dict(SearchTerm.objects.filter(term__in=missing).values_list('term', 'id'))
+        TermTrigram.objects.bulk_create(
+            [TermTrigram(term_id=term_id, trigram=gram) for word, term_id in created.items() for gram in trigrams(word)],
+            ignore_conflicts=True,
+        )
+        ids.update(created)
+    return ids
+
+
+@transaction.atomic
+def index_posts(post_ids):
+    """
+    Replace the search terms of the given posts with the words of their titles
+    and tag names.
+    """
+    words_of = defaultdict(set)
+    for pk, title in Post.objects.filter(pk__in=post_ids).values_list('pk', 'title'):
+        words_of[pk].update(words(title))
+    tagged = TaggedItem.objects.filter(content_type=ContentType.objects.get_for_model(Post), object_id__in=post_ids)
+    for pk, name in tagged.values_list('object_id', 'tag__name'):
+        if pk in words_of:
+            words_of[pk].update(words(name))
+
+    ids = _term_ids(set().union(*words_of.values())) if words_of else {}
+    PostTerm.objects.filter(post_id__in=post_ids).delete()
+    PostTerm.objects.bulk_create(
+        PostTerm(post_id=pk, term_id=ids[word]) for pk, post_words in words_of.items() for word in post_words
+    )
+
+
+# Post ids to re-index when the current transaction commits. Per thread, so per
+# database connection.
+_pending = threading.local()
+
+
+def _reindex_pending():
+    post_ids, _pending.post_ids = getattr(_pending, 'post_ids', set()), set()
+    if post_ids:
+        index_posts(sorted(post_ids))
+
+
+def reindex_on_commit(post_ids):
+    """
+    index_posts(post_ids) once the current transaction commits, merged with the
+    other calls made in it: removing several tags from a post, or deleting a post
+    with its tags, re-indexes each post once rather than once per tag. Every call
+    adds a callback, but the first to run takes all the ids and the rest have none.
+    Ids left by a rolled-back transaction are re-indexed with the next batch, which
+    is harmless: index_posts reads the posts as they are.
+    """
+    if not hasattr(_pending, 'post_ids'):
+        _pending.post_ids = set()
+    _pending.post_ids.update(post_ids)
+    transaction.on_commit(_reindex_pending)
+
+
+def add_post_words(post_id, text):
+    """
+    Add the words of `text` (a newly added tag) to a post's terms, without
+    re-reading the rest of the post.
+    """
+    if not Post.objects.filter(pk=post_id).exists():  # deleted before this ran
+        return
+    ids = _term_ids(words(text))
+    PostTerm.objects.bulk_create(
+        [PostTerm(post_id=post_id, term_id=term_id) for term_id in ids.values()], ignore_conflicts=True,
+    )
+
+
+def similar_terms(word, threshold=None):
+    """
+    {term_id: similarity} for the terms whose trigram similarity to `word`
+    (shared trigrams / trigrams in either) is at least `threshold`, the closest
+    MAX_TERMS_PER_WORD of them. One indexed query on TermTrigram: since a term
+    can't be similar enough without sharing threshold * len(grams) trigrams,
+    the rest are dropped in SQL.
+    """
+    threshold = _threshold(threshold)
+    grams = trigrams(word)
+    rows = (
+        TermTrigram.objects.filter(trigram__in=grams)
+        .values('term_id', 'term__trigram_count')
+        .annotate(shared=Count('id'))
+        .filter(shared__gte=max(1, math.ceil(threshold * len(grams))))
+        .values_list('term_id', 'term__trigram_count', 'shared')
+    )
+    scored = {term_id: shared / (len(grams) + count - shared) for term_id, count, shared in rows}
+    best = sorted(scored.items(), key=lambda pair: -pair[1])[:MAX_TERMS_PER_WORD]
+    return {term_id: score for term_id, score in best if score >= threshold}
+
+
+def search_posts(query, limit, threshold=None):
+    """
+    [(post_id, score), ...] for the posts whose title or tags contain words like
+    the words of `query`, best first, at most `limit` of them. A post scores the
+    similarity of its closest term to each query word, averaged over the query
+    words, so "djnago orm" ranks a post with both words above one with either.
+    """
+    query_words = words(query)[:MAX_QUERY_WORDS]
+    matches = [terms for terms in (similar_terms(word, threshold) for word in query_words) if terms]
+    if not matches:
+        return []
+    if len(matches) == 1:
+        return [(post_id, score / len(query_words)) for post_id, score in _best_posts(matches[0], limit)]
+
+    # One Max(CASE ...) per query word: the best matching term a post has for it.
+    per_word = [
+        Coalesce(
+            Max(Case(*(When(term_id=term_id, then=Value(score)) for term_id, score in terms.items()),
+                     output_field=FloatField())),
+            0.0,
+        )
+        for terms in matches
+    ]
+    score = per_word[0]
+    for best in per_word[1:]:
+        score = score + best
+    rows = (
+        PostTerm.objects.filter(term_id__in=set().union(*matches))
+        .values('post_id')
+        .annotate(score=score)
+        .order_by('-score', '-post_id')
+        .values_list('post_id', 'score')[:limit]
+    )
+    return [(post_id, score / len(query_words)) for post_id, score in rows]
+
+
+def posts_containing(query, limit, exclude=()):
+    """
+    Ids of the newest posts, at most `limit`, whose title or tags have a word
+    containing one of the query's words (so 'duct' finds 'production'). Matched
+    against the SearchTerm vocabulary, not against post text, so the scan covers
+    the distinct words rather than every post body.
+    """
+    query_words = words(query)[:MAX_QUERY_WORDS]
+    if not query_words:
+        return []
+    terms = SearchTerm.objects.filter(reduce(operator.or_, (Q(term__contains=word) for word in query_words)))
+    return list(
+        PostTerm.objects.filter(term__in=terms).exclude(post_id__in=exclude)
+        .order_by('-post_id').values_list('post_id', flat=True).distinct()[:limit]
+    )
+
+
+def posts_mentioning(query, limit, exclude=()):
+    """
+    Ids of the newest posts, at most `limit`, whose content contains `query`.
+    Post bodies aren't indexed, so only the newest BLOG_SEARCH_CONTENT_SCAN posts
+    are scanned, which keeps the cost of a search from growing with the blog.
+    """
+    scan = getattr(settings, 'BLOG_SEARCH_CONTENT_SCAN', 5000)
+    oldest = list(Post.objects.order_by('-pk').values_list('pk', flat=True)[scan - 1:scan])
+    return list(
+        Post.objects.filter(pk__gte=oldest[0] if oldest else 0, content__icontains=query)
+        .exclude(pk__in=exclude).order_by('-pk').values_list('pk', flat=True)[:limit]
+    )
+
+
+def _best_posts(terms, limit):
+    """
+    search_posts for a single matched word, where a post's score is just that of
+    its closest term: read posts term by term, closest terms first, newest posts
+    first, straight off the (term, post) index and stopping at `limit`, instead
+    of grouping every posting of a common word.
+    """
+    found = []
+    ranked = sorted(terms.items(), key=lambda pair: -pair[1])
+    for score, group in groupby(ranked, key=lambda pair: pair[1]):
+        seen = [post_id for post_id, _ in found]
+        post_ids = (
+            PostTerm.objects.filter(term_id__in=[term_id for term_id, _ in group])
+            .exclude(post_id__in=seen)
+            .order_by('-post_id')
+            .values_list('post_id', flat=True)
+            .distinct()[:limit - len(found)]
+        )
+        found += [(post_id, score) for post_id in post_ids]
+        if len(found) >= limit:
+            break
+    return found
@@ -0,0 +1,203 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from taggit.models import Tag, TaggedItem
+
+from . import autocomplete
+from .archive import adjust_month_count
+from .backends import invalidate_cached_user
+from .duplicates import index_post
+from .feeds import feed_scope, invalidate_author_feeds, invalidate_feeds
+from .models import Post
+from .search import add_post_words, reindex_on_commit
+from .sitemaps import invalidate_shard
+from .tagging import forget_tag_ids
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def drop_cached_user(sender, instance, **kwargs):
+    """
+    Keep CachedModelBackend from serving a stale user after a profile edit,
+    password change, last_login update or deletion.
+    """
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_init, sender=settings.AUTH_USER_MODEL)
+def remember_username(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred username isn't loaded just for this.
+    instance._loaded_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def refresh_feeds_on_rename(sender, instance, created, **kwargs):
+    # Feeds show the author's username.
+    if created or instance._loaded_username in (None, instance.username):
+        return
+    instance._loaded_username = instance.username
+    transaction.on_commit(partial(invalidate_author_feeds, instance.pk))
+
+
+@receiver(post_save, sender=Post)
+def refresh_feeds_on_save(sender, instance, created, **kwargs):
+    """
+    A new post is the newest in the site feed; an edited one only matters to the
+    feeds whose window still contains it. New posts reach tag feeds through
+    the TaggedItem receiver below, once their tags are added.
+    """
+    if created:
+        transaction.on_commit(partial(invalidate_feeds, [feed_scope()]))
+        return
+    scopes = [feed_scope()] + [feed_scope(tag_id) for tag_id in instance.tags.values_list('pk', flat=True)]
+    transaction.on_commit(partial(invalidate_feeds, scopes, post_ids={instance.pk}))
+
+
+@receiver(post_delete, sender=Post)
+def refresh_feeds_on_delete(sender, instance, **kwargs):
+    # Tag feeds are handled by the TaggedItem rows deleted along with the post.
+    transaction.on_commit(partial(invalidate_feeds, [feed_scope()], post_ids={instance.pk}))
+
+
+@receiver([post_save, post_delete], sender=TaggedItem)
+def refresh_tag_feed(sender, instance, **kwargs):
+    """
+    Tagging or untagging a post changes which posts the tag feed lists.
+    """
+    if instance.content_type_id == ContentType.objects.get_for_model(Post).pk:
+        transaction.on_commit(partial(invalidate_feeds, [feed_scope(instance.tag_id)]))
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def refresh_renamed_tag_feed(sender, instance, created=False, **kwargs):
+    # The tag feed's title and link use the tag name.
+    if not created:
+        transaction.on_commit(partial(invalidate_feeds, [feed_scope(instance.pk)]))
+
+
+@receiver(post_save, sender=Post)
+def refresh_sitemap_on_save(sender, instance, created, **kwargs):
+    # A post's URL and lastmod never change after creation, so edits keep the shard.
+    if created:
+        transaction.on_commit(partial(invalidate_shard, 'posts', instance.pk))
+
+
+@receiver(post_delete, sender=Post)
+def refresh_sitemap_on_delete(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_shard, 'posts', instance.pk))
+
+
+@receiver([post_save, post_delete], sender=TaggedItem)
+def refresh_tag_sitemap(sender, instance, **kwargs):
+    # A tag page is listed once the tag is on at least one post.
+    transaction.on_commit(partial(invalidate_shard, 'tags', instance.tag_id))
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def refresh_renamed_tag_sitemap(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_shard, 'tags', instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def forget_cached_tag_ids(sender, instance, created=False, **kwargs):
+    # A new tag can't be cached anywhere yet; a renamed or deleted one can.
+    if not created:
+        transaction.on_commit(forget_tag_ids)
+
+
+@receiver(post_save, sender=Post)
+def count_post_in_archive(sender, instance, created, **kwargs):
+    # published_date is set once (auto_now_add), so only creation changes the counts.
+    if created:
+        adjust_month_count(instance.published_date, 1)
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post_in_archive(sender, instance, **kwargs):
+    adjust_month_count(instance.published_date, -1)
+
+
+@receiver(post_save, sender=Post)
+def index_post_for_duplicates(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is None or 'content' in update_fields:
+        index_post(instance)
+
+
+@receiver(post_init, sender=Post)
+def remember_title(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred title isn't loaded just for this.
+    instance._loaded_title = instance.__dict__.get('title')
+
+
+def title_changed(instance, created, update_fields):
+    """
+    Whether a post_save wrote a new title. The autocomplete and search receivers
+    below use it; forget_saved_title, at the end of this module, then updates
+    the remembered title.
+    """
+    if update_fields is not None and 'title' not in update_fields:
+        return False
+    return created or instance._loaded_title != instance.title
+
+
+@receiver(post_save, sender=Post)
+def autocomplete_post_saved(sender, instance, created, update_fields=None, **kwargs):
+    if title_changed(instance, created, update_fields):
+        transaction.on_commit(partial(autocomplete.changed, autocomplete.POST, instance.pk, instance.title))
+
+
+@receiver(post_delete, sender=Post)
+def autocomplete_post_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(autocomplete.changed, autocomplete.POST, instance.pk))
+
+
+@receiver(post_save, sender=Tag)
+def autocomplete_tag_saved(sender, instance, **kwargs):
+    transaction.on_commit(partial(autocomplete.changed, autocomplete.TAG, instance.pk, instance.name))
+
+
+@receiver(post_delete, sender=Tag)
+def autocomplete_tag_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(autocomplete.changed, autocomplete.TAG, instance.pk))
+
+
+# Search index receivers run on commit: a post being deleted fires the TaggedItem
+# receiver mid-cascade, and re-adding its terms then would break the delete.
+
+@receiver(post_save, sender=Post)
+def index_post_for_search(sender, instance, created, update_fields=None, **kwargs):
+    if title_changed(instance, created, update_fields):
+        reindex_on_commit([instance.pk])
+
+
+@receiver(post_save, sender=TaggedItem)
+def index_tag_for_search(sender, instance, created, **kwargs):
+    if instance.content_type_id == ContentType.objects.get_for_model(Post).pk:
+        post_id, name = instance.object_id, instance.tag.name
+        transaction.on_commit(lambda: add_post_words(post_id, name))
+
+
+@receiver(post_delete, sender=TaggedItem)
+def unindex_tag_for_search(sender, instance, **kwargs):
+    if instance.content_type_id == ContentType.objects.get_for_model(Post).pk:
+        reindex_on_commit([instance.object_id])
+
+
+@receiver(post_save, sender=Tag)
+def reindex_renamed_tag_for_search(sender, instance, created, **kwargs):
+    if created:
+        return
+    post_ids = list(TaggedItem.objects.filter(
+        tag=instance, content_type=ContentType.objects.get_for_model(Post),
+    ).values_list('object_id', flat=True))
+    if post_ids:
+        reindex_on_commit(post_ids)
+
+
+# Registered last, so every receiver above has compared against the old title.
+@receiver(post_save, sender=Post)
+def forget_saved_title(sender, instance, **kwargs):
+    instance._loaded_title = instance.__dict__.get('title')
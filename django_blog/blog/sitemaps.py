@@ -0,0 +1,196 @@
+import os
+import re
+import tempfile
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.exceptions import DisallowedHost
+from django.db.models import Max
+from django.http.request import split_domain_port, validate_host
+from django.urls import NoReverseMatch, reverse
+from taggit.models import Tag
+
+from .models import Post
+
+# The sitemap protocol allows at most 50,000 URLs per file.
+SHARD_SIZE = 50000
+BATCH_SIZE = 2000
+# Rebuilds of a shard that keeps changing while it is written, before giving up on caching it
+MAX_BUILD_ATTEMPTS = 3
+SITEMAP_KEY_PREFIX = 'blog:sitemap:'
+
+URLSET_OPEN = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_CLOSE = '</urlset>\n'
+
+
+def shard_of(pk):
+    """
+    Shards cover fixed primary-key ranges (pks 1-50000 are shard 0, and so on), so a
+    post always stays in the same shard and a change rebuilds exactly one file.
+    """
+    return (pk - 1) // SHARD_SIZE
+
+
+def sitemap_root():
+    return Path(getattr(settings, 'BLOG_SITEMAP_ROOT', Path(settings.BASE_DIR) / 'sitemaps'))
+
+
+def site_origin(request):
+    """
+    Scheme and host the sitemap URLs are written for. BLOG_SITEMAP_ORIGIN pins one
+    site for every request. Otherwise the request's host is used, but only if
+    ALLOWED_HOSTS names it exactly: under a wildcard or a .domain pattern, any Host
+    header would get its own directory of shards on disk.
+    """
+    origin = getattr(settings, 'BLOG_SITEMAP_ORIGIN', None)
+    if origin:
+        parts = urlsplit(origin)
+        return parts.scheme, parts.netloc
+    host = request.get_host()
+    allowed = [name for name in settings.ALLOWED_HOSTS if name != '*' and not name.startswith('.')]
+    if settings.DEBUG and not settings.ALLOWED_HOSTS:
+        allowed = ['localhost', '127.0.0.1', '[::1]']
+    domain, _ = split_domain_port(host)
+    if not validate_host(domain, allowed):
+        raise DisallowedHost(f'No sitemaps for host {host!r}; add it to ALLOWED_HOSTS or set BLOG_SITEMAP_ORIGIN.')
+    return request.scheme, host
+
+
+def _origin_dir(origin):
+    # URLs in a shard are absolute, so each scheme/host pair gets its own copies.
+    scheme, host = origin
+    return sitemap_root() / f"{scheme}_{re.sub(r'[^A-Za-z0-9.-]', '_', host)}"
+
+
+def _generation_key(section, number):
+    return f'{SITEMAP_KEY_PREFIX}generation:{section}:{number}'
+
+
+def _generation(section, number):
+    # Any new value will do, so concurrent invalidations need no atomic counter.
+    key = _generation_key(section, number)
+    cache.add(key, uuid.uuid4().hex, None)
+    return cache.get(key)
+
+
+def _tagged_with_posts():
+    post_type = ContentType.objects.get_for_model(Post)
+    return Tag.objects.filter(taggit_taggeditem_items__content_type=post_type).distinct()
+
+
+def _post_urls(start, stop):
+    last_pk = start - 1
+    while True:
+        # Keyset pagination: each batch is a short range scan on the primary key.
+        batch = list(
+            Post.objects.filter(pk__gt=last_pk, pk__lte=stop)
+            .order_by('pk')
+            .values_list('pk', 'published_date')[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        for pk, published_date in batch:
+            yield reverse('blog:post-detail', args=[pk]), published_date
+        last_pk = batch[-1][0]
+
+
+def _tag_urls(start, stop):
+    last_pk = start - 1
+    while True:
+        batch = list(
+            _tagged_with_posts()
+            .filter(pk__gt=last_pk, pk__lte=stop)
+            .order_by('pk')
+            .values_list('pk', 'name')[:BATCH_SIZE]
+        )
+        if not batch:
+            return
+        for pk, name in batch:
+            try:
+                yield reverse('blog:posts-by-tag', args=[name]), None
+            except NoReverseMatch:
+                # A name with a "/" has no tag page (views.tag_url sends it to search).
+                continue
+        last_pk = batch[-1][0]
+
+
+SECTIONS = {
+    'posts': (Post.objects.all, _post_urls),
+    'tags': (_tagged_with_posts, _tag_urls),
+}
+
+
+def shard_count(section):
+    """
+    Number of shards in a section, cached until invalidate_shard() runs.
+    """
+    key = f'{SITEMAP_KEY_PREFIX}shards:{section}'
+    count = cache.get(key)
+    if count is None:
+        queryset, _ = SECTIONS[section]
+        max_pk = queryset().aggregate(max_pk=Max('pk'))['max_pk']
+        count = shard_of(max_pk) + 1 if max_pk else 0
+        cache.set(key, count, None)
+    return count
+
+
+def _write_shard(path, base, section, number):
+    _, urls = SECTIONS[section]
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(URLSET_OPEN)
+            for location, lastmod in urls(number * SHARD_SIZE + 1, (number + 1) * SHARD_SIZE):
+                f.write(f'<url><loc>{escape(base + location)}</loc>')
+                if lastmod:
+                    f.write(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+                f.write('</url>\n')
+            f.write(URLSET_CLOSE)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def shard_path(request, section, number):
+    """
+    Path of a shard file, written first if it is not on disk yet. URLs are streamed
+    from the database in batches straight into a temporary file, which is then
+    renamed into place, so memory use does not grow with the shard.
+    Files are named after the shard's generation, which invalidate_shard() changes:
+    a build that overlapped an invalidation is not renamed into place but built
+    again, and even one that slips through sits under a name no reader asks for.
+    """
+    origin = site_origin(request)
+    base = '{}://{}'.format(*origin)
+    directory = _origin_dir(origin)
+    for attempt in range(MAX_BUILD_ATTEMPTS):
+        generation = _generation(section, number)
+        path = directory / f'{section}-{number}-{generation}.xml'
+        if path.exists():
+            return path
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = _write_shard(path, base, section, number)
+        if _generation(section, number) == generation or attempt == MAX_BUILD_ATTEMPTS - 1:
+            break
+        os.unlink(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def invalidate_shard(section, pk):
+    """
+    Delete the cached copies of the shard holding pk; the next request rebuilds it.
+    """
+    number = shard_of(pk)
+    cache.set(_generation_key(section, number), uuid.uuid4().hex, None)
+    cache.delete(f'{SITEMAP_KEY_PREFIX}shards:{section}')
+    root = sitemap_root()
+    if root.is_dir():
+        for path in root.glob(f'*/{section}-{number}-*.xml'):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,37 @@
+// Fills the search box's <datalist> with suggestions from the autocomplete
+// endpoint. Requests are debounced, and a response that arrives after a newer
+// one has been sent is dropped.
+(function () {
+  var input = document.querySelector('input[data-autocomplete]');
+  if (!input) {
+    return;
+  }
+  var list = document.getElementById(input.getAttribute('list'));
+  var timer = null;
+  var latest = 0;
+
+  input.addEventListener('input', function () {
+    clearTimeout(timer);
+    timer = setTimeout(function () {
+      var query = input.value.trim();
+      var sent = ++latest;
+      if (!query) {
+        list.innerHTML = '';
+        return;
+      }
+      fetch(input.dataset.autocomplete + '?q=' + encodeURIComponent(query))
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+          if (sent !== latest) {
+            return;
+          }
+          list.innerHTML = '';
+          data.posts.concat(data.tags).forEach(function (item) {
+            var option = document.createElement('option');
+            option.value = item.title || item.name;
+            list.appendChild(option);
+          });
+        });
+    }, 100);
+  });
+})();
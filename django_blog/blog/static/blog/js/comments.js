@@ -0,0 +1,23 @@
+// Replaces a "More comments" link with the next page of comments, fetched from
+// the comment-page fragment endpoint. Without JavaScript the link still leads to
+// the same page on the full comment_list view.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('a.more-comments');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.dataset.fragment, {credentials: 'same-origin'})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.status);
+      }
+      return response.text();
+    })
+    .then(function (html) {
+      link.outerHTML = html;
+    })
+    .catch(function () {
+      window.location = link.href;
+    });
+});
@@ -0,0 +1,4 @@
+// Basic example script to demonstrate dynamic behavior
+document.addEventListener('DOMContentLoaded', function() {
+    console.log('Blog page loaded');
+});
\ No newline at end of file
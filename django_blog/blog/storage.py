@@ -0,0 +1,51 @@
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; without it only .gz variants are written
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.html', '.json', '.txt', '.xml', '.map')
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage that also writes .gz and .br siblings at collectstatic time.
+
+    - Every file gets a content-hashed name (styles.3f2a9c1b7d0e.css) so it can be cached
+      forever; the manifest maps the plain names used in {% static %} to the hashed ones.
+    - Text assets larger than STATIC_PRECOMPRESS_MIN_SIZE bytes are compressed once here at
+      maximum level, instead of on every response; a variant is kept only if it is smaller.
+    - serve_static in blog/views.py picks the variant matching the request's Accept-Encoding.
+    """
+    # Fall back to the plain name for files missing from the manifest (e.g. before collectstatic)
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in self.hashed_files.values():
+            self.compress(name)
+
+    def compress(self, name):
+        if not name.endswith(COMPRESSIBLE_EXTENSIONS):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < getattr(settings, 'STATIC_PRECOMPRESS_MIN_SIZE', 256):
+            return
+        variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(data, quality=11)))
+        for suffix, compressed in variants:
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
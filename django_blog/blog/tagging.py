@@ -0,0 +1,115 @@
+import threading
+import uuid
+from functools import partial
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from taggit.models import Tag, TaggedItem
+
+from .feeds import feed_scope, invalidate_feeds
+from .search import add_post_words
+from .sitemaps import invalidate_shard
+
+# Process-local tag name -> id cache. Tags are almost never renamed or deleted;
+# when that happens (blog/signals.py calls forget_tag_ids), the shared version in
+# TAG_IDS_VERSION_KEY changes and every process drops its copy on its next lookup.
+MAX_CACHED_TAGS = 10000
+TAG_IDS_VERSION_KEY = 'blog:tag-ids:version'
+_tag_ids = {}
+_version = None
+_lock = threading.Lock()
+
+
+def forget_tag_ids():
+    global _version
+    # Any new value will do, so concurrent renames need no atomic counter.
+    version = uuid.uuid4().hex
+    cache.set(TAG_IDS_VERSION_KEY, version, None)
+    with _lock:
+        _tag_ids.clear()
+        _version = version
+
+
+def _current_ids(names):
+    global _version
+    version = cache.get(TAG_IDS_VERSION_KEY)
+    with _lock:
+        if version != _version:
+            _tag_ids.clear()
+            _version = version
+        return {name: _tag_ids[name] for name in names if name in _tag_ids}
+
+
+def resolve_tag_ids(names):
+    """
+    Map tag names to Tag ids, creating the tags that don't exist yet.
+    Cached names cost one cache read; the others are looked up in one query, and
+    only names that are new to the site are created one by one (Tag.save() picks a
+    unique slug, which a bulk insert can't).
+    """
+    ids = _current_ids(names)
+    missing = [name for name in names if name not in ids]
+    if missing:
+        ids.update(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+        for name in missing:
+            if name not in ids:
+                ids[name] = Tag.objects.get_or_create(name=name)[0].pk
+        # Only cache ids once they are committed: a tag created in a transaction
+        # that is rolled back must not be handed out again.
+        transaction.on_commit(partial(_remember, {name: ids[name] for name in missing}))
+    return ids
+
+
+def _remember(ids):
+    with _lock:
+        if len(_tag_ids) + len(ids) > MAX_CACHED_TAGS:
+            _tag_ids.clear()
+        _tag_ids.update(ids)
+
+
+def assign_tags(post, names):
+    """
+    Make `names` the tags of `post`, touching only what changed: one query reads
+    the current tags, and at most one insert and one delete apply the difference.
+    Replaces post.tags.set(names), which resolves every name and rewrites the
+    through rows even when the tags are unchanged.
+    A cached id whose tag was deleted before the version change reached this
+    process fails the foreign key check at commit; the cache is then dropped and
+    the tags assigned again. (Inside an outer transaction the check runs when
+    that one commits, so the error is raised there instead.)
+    """
+    names = list(dict.fromkeys(name.strip() for name in names if name.strip()))
+    try:
+        _assign_tags(post, names)
+    except IntegrityError:
+        forget_tag_ids()
+        _assign_tags(post, names)
+
+
+@transaction.atomic
+def _assign_tags(post, names):
+    content_type = ContentType.objects.get_for_model(post)
+    items = TaggedItem.objects.filter(content_type=content_type, object_id=post.pk)
+    current = dict(items.values_list('tag__name', 'tag_id'))
+
+    removed = [tag_id for name, tag_id in current.items() if name not in names]
+    added = [name for name in names if name not in current]
+    if removed:
+        items.filter(tag_id__in=removed).delete()
+    if added:
+        ids = resolve_tag_ids(added)
+        new_items = [
+            TaggedItem(content_type=content_type, object_id=post.pk, tag=Tag(pk=ids[name], name=name))
+            for name in added
+        ]
+        TaggedItem.objects.bulk_create(new_items, ignore_conflicts=True)
+        # bulk_create skips post_save, so do what the TaggedItem receivers in blog/signals.py would.
+        tag_ids = [ids[name] for name in added]
+        transaction.on_commit(partial(invalidate_feeds, [feed_scope(tag_id) for tag_id in tag_ids]))
+        for tag_id in tag_ids:
+            transaction.on_commit(partial(invalidate_shard, 'tags', tag_id))
+        transaction.on_commit(partial(add_post_words, post.pk, ' '.join(added)))
+
+    if removed or added:
+        getattr(post, '_prefetched_objects_cache', {}).pop('tags', None)
@@ -0,0 +1,17 @@
+from django import template
+
+from blog.archive import archive_months
+
+register = template.Library()
+
+
+@register.inclusion_tag('blog/archive_sidebar.html')
+def archive_sidebar():
+    """
+    Month-by-month post counts linking to the archive pages.
+
+    Usage: {% load blog_archive %}{% archive_sidebar %}
+
+    Reads the precomputed MonthlyPostCount table (through the cache), never the posts.
+    """
+    return {'months': archive_months()}
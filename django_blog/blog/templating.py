@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger('blog.templates')
+
+_lock = threading.Lock()
+# template name -> milliseconds spent on its first load (read + parse)
+compile_timings = {}
+# template name -> [renders, total milliseconds, slowest milliseconds]
+render_timings = {}
+
+
+def template_timings():
+    """
+    Snapshot of this process's compile and render timings.
+    """
+    with _lock:
+        return {
+            'compile_ms': dict(compile_timings),
+            'render_ms': {name: list(stats) for name, stats in render_timings.items()},
+        }
+
+
+class TimedTemplate(Template):
+    """
+    Backend template that records how long each render takes, per template and, when a
+    request is given, on request.template_timings (read by ServerTimingMiddleware).
+    """
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            name = self.origin.template_name
+            with _lock:
+                stats = render_timings.setdefault(name, [0, 0.0, 0.0])
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] = max(stats[2], elapsed)
+            if request is not None and hasattr(request, 'template_timings'):
+                request.template_timings.append((name, elapsed))
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The standard Django template backend, plus compile/render timings.
+    """
+    def get_template(self, template_name):
+        start = time.perf_counter()
+        template = super().get_template(template_name)
+        elapsed = (time.perf_counter() - start) * 1000
+        with _lock:
+            compile_timings.setdefault(template_name, elapsed)
+        return TimedTemplate(template.template, self)
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+
+def warm_templates():
+    """
+    Load every template under blog/templates so the cached loader holds them compiled
+    before the first request. Templates that fail to compile are logged, not raised,
+    so one broken file cannot stop a worker from booting.
+    Returns (number compiled, names that failed).
+    """
+    backend = next(engine for engine in engines.all() if isinstance(engine, DjangoTemplates))
+    template_dir = Path(apps.get_app_config('blog').path) / 'templates'
+    start = time.perf_counter()
+    compiled, failed = 0, []
+    for path in sorted(template_dir.rglob('*.html')):
+        name = path.relative_to(template_dir).as_posix()
+        try:
+            backend.get_template(name)
+            compiled += 1
+        except (TemplateSyntaxError, TemplateDoesNotExist) as exc:
+            failed.append(name)
+            logger.error('Could not compile %s: %s', name, exc)
+    logger.info('Compiled %d blog templates in %.1f ms', compiled, (time.perf_counter() - start) * 1000)
+    return compiled, failed
+
+
+def warm_templates_at_startup():
+    """
+    Called by wsgi.py and asgi.py once the application is loaded, so only servers
+    (runserver included) pay for warmup, not every manage.py command.
+    """
+    if getattr(settings, 'BLOG_TEMPLATE_MODE', 'development') == 'production':
+        warm_templates()
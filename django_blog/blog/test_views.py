@@ -1,7 +1,22 @@
-from django.test import TestCase
+import shutil
+from datetime import date, datetime, timezone
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
 from django.contrib.auth.models import User
-from django.urls import reverse
-from .models import Post
+from django.urls import resolve, reverse
+from taggit.models import Tag
+from . import autocomplete
+from .archive import archive_months, rebuild_month_counts
+from .counters import decay_trending, view_counter
+from .duplicates import find_near_duplicates
+from .models import AutocompleteChange, Comment, Post, PostSignature
+from .search import search_posts
+from .views import PostUpdateView
 
 class PostPermissionTests(TestCase):
     def setUp(self):
@@ -17,4 +32,451 @@ class PostPermissionTests(TestCase):
     def test_author_can_edit(self):
         self.client.login(username='auth', password='pass')
         resp = self.client.get(reverse('blog:post-update', args=[self.post.pk]))
-        self.assertEqual(resp.status_code, 200)
\ No newline at end of file
+        self.assertEqual(resp.status_code, 200)
+
+
+class LegacyUrlTests(TestCase):
+    def test_legacy_paths_redirect_with_308(self):
+        resp = self.client.post('/post/5/update/?next=/posts/')
+        self.assertEqual(resp.status_code, 308)
+        self.assertEqual(resp['Location'], '/posts/5/edit/?next=/posts/')
+        self.assertEqual(self.client.get('/post/7/comments/new/')['Location'], '/posts/7/comments/new/')
+
+    def test_each_canonical_view_is_routed_once(self):
+        self.assertEqual(reverse('blog:post-create'), '/posts/new/')
+        self.assertEqual(reverse('blog:posts-by-tag', args=['machine learning']), '/tags/machine%20learning/')
+
+    def test_old_route_names_still_reverse(self):
+        self.assertEqual(reverse('blog:post-create-exact'), '/post/new/')
+        self.assertEqual(reverse('blog:post-update-exact', args=[5]), '/post/5/update/')
+        self.assertEqual(reverse('blog:post-delete-exact', args=[5]), '/post/5/delete/')
+        self.assertEqual(reverse('blog:posts-by-tag-exact', args=['django']), '/tags/django/')
+        self.assertEqual(reverse('blog:posts-by-tag-slug', args=['machine-learning']), '/tags/machine-learning/')
+        self.assertEqual(resolve('/tags/machine-learning/').url_name, 'posts-by-tag')
+        self.assertEqual(resolve('/post/new/').url_name, 'post-create-alt')
+
+
+class PostExcerptTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='auth', password='pass')
+
+    def test_excerpt_follows_content_on_save(self):
+        post = Post.objects.create(title='T', content=' '.join(['word'] * 40), author=self.author)
+        self.assertEqual(post.excerpt, ' '.join(['word'] * 25) + '…')
+        post.content = 'Rewritten.'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, 'Rewritten.')
+
+    def test_list_renders_excerpt_without_loading_content(self):
+        Post.objects.create(title='T', content='Short body.', author=self.author)
+        resp = self.client.get(reverse('blog:post-list'))
+        self.assertContains(resp, 'Short body.')
+        self.assertIn('content', resp.context['posts'][0].get_deferred_fields())
+
+    def test_backfill_repairs_bulk_updated_posts(self):
+        post = Post.objects.create(title='T', content='Old.', author=self.author)
+        Post.objects.filter(pk=post.pk).update(content='New.')
+        call_command('backfill_excerpts', batch_size=1, stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, 'New.')
+
+
+@override_settings(BLOG_COMMENTS_PER_PAGE=2, BLOG_VIEW_COUNTER_ASYNC=False, BLOG_VIEW_FLUSH_INTERVAL=0)
+class CommentPaginationTests(TestCase):
+    def setUp(self):
+        author = User.objects.create_user(username='auth', password='pass')
+        self.post = Post.objects.create(title='T', content='C', author=author)
+        for i in range(5):
+            Comment.objects.create(post=self.post, author=author, content=f'comment-{i}')
+
+    def test_detail_renders_first_page_and_fragments_follow_the_cursor(self):
+        resp = self.client.get(reverse('blog:post-detail', args=[self.post.pk]))
+        self.assertContains(resp, 'comment-1')
+        self.assertNotContains(resp, 'comment-2')
+
+        seen, cursor = [], resp.context['next_cursor']
+        while cursor:
+            resp = self.client.get(reverse('blog:comment-page', args=[self.post.pk]), {'after': cursor})
+            seen += [c.content for c in resp.context['comments']]
+            cursor = resp.context['next_cursor']
+        self.assertEqual(seen, ['comment-2', 'comment-3', 'comment-4'])
+        self.assertNotContains(resp, 'More comments')
+
+    def test_bad_cursor_is_a_400(self):
+        resp = self.client.get(reverse('blog:comment-page', args=[self.post.pk]), {'after': 'nope'})
+        self.assertEqual(resp.status_code, 400)
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='auth', password='pass')
+        self.post = Post.objects.create(title='First post', content='Body.', author=self.author)
+        self.post.tags.add('django')
+
+    def test_unchanged_feed_answers_304(self):
+        resp = self.client.get(reverse('blog:feed-rss'))
+        self.assertContains(resp, 'First post')
+        resp = self.client.get(reverse('blog:feed-rss'), HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_feeds_rebuild_when_a_post_in_them_changes(self):
+        url = reverse('blog:tag-feed-atom', args=['django'])
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = 'Renamed post'
+            self.post.save()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(resp, 'Renamed post')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Post.objects.create(title='Second post', content='Body.', author=self.author)
+        self.assertContains(self.client.get(reverse('blog:feed-rss')), 'Second post')
+        with self.captureOnCommitCallbacks(execute=True):
+            other.tags.add('django')
+        self.assertContains(self.client.get(url), 'Second post')
+
+    def test_feeds_are_dropped_only_once_the_change_commits(self):
+        self.client.get(reverse('blog:feed-rss'))
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.post.title = 'Renamed post'
+            self.post.save()
+        self.assertNotContains(self.client.get(reverse('blog:feed-rss')), 'Renamed post')
+        for callback in callbacks:
+            callback()
+        self.assertContains(self.client.get(reverse('blog:feed-rss')), 'Renamed post')
+
+    def test_feeds_follow_author_renames(self):
+        url = reverse('blog:tag-feed-rss', args=['django'])
+        self.assertContains(self.client.get(url), 'auth')
+        user = User.objects.get(pk=self.author.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.username = 'renamed-author'
+            user.save()
+        self.assertContains(self.client.get(url), 'renamed-author')
+        self.assertContains(self.client.get(reverse('blog:feed-rss')), 'renamed-author')
+
+
+class SitemapTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        self.enterContext(override_settings(BLOG_SITEMAP_ROOT=root))
+        self.author = User.objects.create_user(username='auth', password='pass')
+        self.post = Post.objects.create(title='T', content='C', author=self.author)
+        self.post.tags.add('django')
+
+    def test_index_lists_shards_and_shards_list_urls(self):
+        resp = self.client.get(reverse('blog:sitemap-index'))
+        index = b''.join(resp.streaming_content).decode()
+        self.assertIn('http://testserver/sitemap-posts-0.xml', index)
+        self.assertIn('http://testserver/sitemap-tags-0.xml', index)
+
+        shard = b''.join(self.client.get('/sitemap-posts-0.xml').streaming_content).decode()
+        self.assertIn(f'<loc>http://testserver/posts/{self.post.pk}/</loc>', shard)
+        self.assertEqual(self.client.get('/sitemap-posts-1.xml').status_code, 404)
+
+    def test_tags_without_a_tag_page_are_left_out(self):
+        self.post.tags.add('ci/cd')
+        resp = self.client.get('/sitemap-tags-0.xml')
+        self.assertEqual(resp.status_code, 200)
+        shard = b''.join(resp.streaming_content).decode()
+        self.assertIn('<loc>http://testserver/tags/django/</loc>', shard)
+        self.assertEqual(shard.count('<url>'), 1)
+
+    def test_new_post_rebuilds_its_shard(self):
+        b''.join(self.client.get('/sitemap-posts-0.xml').streaming_content)
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Post.objects.create(title='T2', content='C', author=self.author)
+        shard = b''.join(self.client.get('/sitemap-posts-0.xml').streaming_content).decode()
+        self.assertIn(f'/posts/{other.pk}/', shard)
+
+    def test_build_overlapping_an_invalidation_is_not_kept(self):
+        from . import sitemaps
+        write_shard = sitemaps._write_shard
+
+        def write_then_invalidate(*args):
+            tmp_path = write_shard(*args)
+            sitemaps.invalidate_shard('posts', self.post.pk)
+            return tmp_path
+
+        with patch.object(sitemaps, '_write_shard', side_effect=write_then_invalidate) as write:
+            b''.join(self.client.get('/sitemap-posts-0.xml').streaming_content)
+        self.assertEqual(write.call_count, sitemaps.MAX_BUILD_ATTEMPTS)
+        with patch.object(sitemaps, '_write_shard', wraps=write_shard) as rebuild:
+            b''.join(self.client.get('/sitemap-posts-0.xml').streaming_content)
+            b''.join(self.client.get('/sitemap-posts-0.xml').streaming_content)
+        self.assertEqual(rebuild.call_count, 1)
+
+    def test_shard_counts_are_cached(self):
+        b''.join(self.client.get(reverse('blog:sitemap-index')).streaming_content)
+        with self.assertNumQueries(0):
+            b''.join(self.client.get(reverse('blog:sitemap-index')).streaming_content)
+
+    def test_unlisted_hosts_get_no_sitemaps(self):
+        with self.settings(ALLOWED_HOSTS=['*']):
+            self.assertEqual(self.client.get('/sitemap-posts-0.xml', HTTP_HOST='evil.example').status_code, 400)
+        with self.settings(ALLOWED_HOSTS=['*'], BLOG_SITEMAP_ORIGIN='https://blog.example'):
+            shard = b''.join(self.client.get('/sitemap-posts-0.xml', HTTP_HOST='evil.example').streaming_content)
+        self.assertIn(f'<loc>https://blog.example/posts/{self.post.pk}/</loc>', shard.decode())
+
+
+@override_settings(BLOG_VIEW_COUNTER_ASYNC=False, BLOG_VIEW_FLUSH_INTERVAL=3600, BLOG_VIEW_FLUSH_MAX_PENDING=3)
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        view_counter.flush()
+        self.addCleanup(view_counter.flush)
+        author = User.objects.create_user(username='auth', password='pass')
+        self.quiet = Post.objects.create(title='Quiet', content='C', author=author)
+        self.busy = Post.objects.create(title='Busy', content='C', author=author)
+
+    def test_hits_are_written_in_batches_and_rank_the_list(self):
+        url = reverse('blog:post-detail', args=[self.busy.pk])
+        self.client.get(url)
+        self.client.get(url)
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.view_count, 0)  # still in memory
+        self.client.get(reverse('blog:post-detail', args=[self.quiet.pk]))
+        self.busy.refresh_from_db()
+        self.assertEqual(self.busy.view_count, 2)
+
+        resp = self.client.get(reverse('blog:post-list'), {'sort': 'popular'})
+        self.assertEqual([p.title for p in resp.context['posts']], ['Busy', 'Quiet'])
+
+    def test_editing_a_post_keeps_counts_flushed_meanwhile(self):
+        self.client.login(username='auth', password='pass')
+        self.client.get(reverse('blog:post-detail', args=[self.busy.pk]))
+        self.client.get(reverse('blog:post-detail', args=[self.busy.pk]))
+        form_valid = PostUpdateView.form_valid
+
+        def flush_then_save(view, form):
+            view_counter.flush()  # as the background flush would, after the post was loaded
+            return form_valid(view, form)
+
+        with patch.object(PostUpdateView, 'form_valid', flush_then_save):
+            resp = self.client.post(reverse('blog:post-update', args=[self.busy.pk]),
+                                    {'title': 'Edited', 'content': 'C', 'tags': ''})
+        self.assertEqual(resp.status_code, 302)
+        self.busy.refresh_from_db()
+        self.assertEqual((self.busy.title, self.busy.view_count), ('Edited', 2))
+
+    def test_plain_saves_still_copy_and_reinsert(self):
+        self.busy.pk = None
+        self.busy.save()
+        self.assertEqual(Post.objects.filter(title='Busy').count(), 2)
+        quiet_pk = self.quiet.pk
+        Post.objects.filter(pk=quiet_pk).delete()
+        self.quiet.save()
+        self.assertTrue(Post.objects.filter(pk=quiet_pk).exists())
+
+    def test_trending_scores_decay(self):
+        Post.objects.filter(pk=self.busy.pk).update(trending_score=8)
+        with self.settings(BLOG_TRENDING_HALF_LIFE=60):
+            decay_trending(120)
+        self.busy.refresh_from_db()
+        self.assertAlmostEqual(self.busy.trending_score, 2)
+
+
+class PostFormTagTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='auth', password='pass')
+        self.client.login(username='auth', password='pass')
+
+    def test_create_and_edit_save_the_tags(self):
+        self.client.post(reverse('blog:post-create'), {'title': 'T', 'content': 'C', 'tags': 'django, web'})
+        post = Post.objects.get()
+        self.assertEqual(set(post.tags.names()), {'django', 'web'})
+        self.client.post(reverse('blog:post-update', args=[post.pk]), {'title': 'T', 'content': 'C', 'tags': 'web'})
+        self.assertEqual(list(post.tags.names()), ['web'])
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='auth', password='pass')
+
+    def make_post(self, title, year, month):
+        post = Post.objects.create(title=title, content='C', author=self.author)
+        Post.objects.filter(pk=post.pk).update(published_date=datetime(year, month, 15, tzinfo=timezone.utc))
+        return post
+
+    def test_month_counts_follow_posts_and_feed_the_sidebar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(title='T', content='C', author=self.author)
+        this_month = post.published_date.date().replace(day=1)
+        self.assertEqual(archive_months(), [(this_month, 1)])
+
+        resp = self.client.get(reverse('blog:post-list'))
+        self.assertContains(resp, reverse('blog:archive-month', args=[this_month.year, this_month.month]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.delete()
+        self.assertEqual(archive_months(), [])
+
+    def test_month_and_year_pages(self):
+        self.make_post('March post', 2024, 3)
+        self.make_post('May post', 2024, 5)
+        rebuild_month_counts()
+
+        resp = self.client.get(reverse('blog:archive-month', args=[2024, 3]))
+        self.assertContains(resp, 'March post')
+        self.assertNotContains(resp, 'May post')
+        self.assertEqual(resp.context['next_month'], date(2024, 5, 1))
+
+        resp = self.client.get(reverse('blog:archive-year', args=[2024]))
+        self.assertEqual(list(resp.context['date_list']), [date(2024, 3, 1), date(2024, 5, 1)])
+        self.assertEqual(self.client.get(reverse('blog:archive-month', args=[2024, 4])).status_code, 404)
+
+
+class NearDuplicateTests(TestCase):
+    text = (
+        'Cheap watches for sale, visit our shop today and get the best deals on '
+        'luxury watches, free shipping on every order placed this week only.'
+    )
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='auth', password='pass')
+        self.original = Post.objects.create(title='Deals', content=self.text, author=self.author)
+
+    def test_lsh_finds_near_duplicates_only(self):
+        self.assertEqual(
+            [pk for pk, _ in find_near_duplicates(self.text.replace('today', 'now'))], [self.original.pk]
+        )
+        self.assertEqual(find_near_duplicates('An unrelated post about the Django ORM and query planning.'), [])
+
+    def test_unchanged_content_is_not_hashed_again(self):
+        signature = PostSignature.objects.get(post=self.original)
+        self.original.title = 'Deals!'
+        with patch('blog.duplicates.signature') as minhash:
+            self.original.save()
+        minhash.assert_not_called()
+        self.assertEqual(PostSignature.objects.get(post=self.original).minhash, signature.minhash)
+
+        self.original.content = 'Something else entirely, written from scratch.'
+        self.original.save()
+        self.assertNotEqual(PostSignature.objects.get(post=self.original).minhash, signature.minhash)
+
+    @override_settings(BLOG_NEAR_DUPLICATE_CHECK=True)
+    def test_create_view_refuses_a_repost(self):
+        self.client.login(username='auth', password='pass')
+        resp = self.client.post(reverse('blog:post-create'), {'title': 'Again', 'content': self.text, 'tags': ''})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_moderators_see_flagged_posts(self):
+        Post.objects.create(title='Repost', content=self.text + ' Hurry!', author=self.author)
+        self.assertEqual(self.client.get(reverse('blog:duplicate-review')).status_code, 302)
+        User.objects.create_user(username='mod', password='pass', is_staff=True)
+        self.client.login(username='mod', password='pass')
+        resp = self.client.get(reverse('blog:duplicate-review'))
+        self.assertEqual([post.title for post, _ in resp.context['flagged']], ['Repost', 'Deals'])
+
+
+@override_settings(BLOG_AUTOCOMPLETE_CHECK_INTERVAL=3600)
+class AutocompleteViewTests(TestCase):
+    def setUp(self):
+        autocomplete._index = None
+        self.addCleanup(setattr, autocomplete, '_index', None)
+        self.author = User.objects.create_user(username='auth', password='pass')
+
+    def test_suggestions_include_posts_saved_after_the_index_was_built(self):
+        Post.objects.create(title='Django signals', content='C', author=self.author).tags.add('django')
+        resp = self.client.get(reverse('blog:autocomplete'), {'q': 'dj'})
+        self.assertEqual([p['title'] for p in resp.json()['posts']], ['Django signals'])
+        self.assertEqual([t['name'] for t in resp.json()['tags']], ['django'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title='Caching in Django', content='C', author=self.author)
+        titles = [p['title'] for p in self.client.get(reverse('blog:autocomplete'), {'q': 'django'}).json()['posts']]
+        self.assertEqual(sorted(titles), ['Caching in Django', 'Django signals'])
+
+    def test_only_title_changes_are_logged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            post = Post.objects.create(title='Django signals', content='C', author=self.author)
+        logged = AutocompleteChange.objects.count()
+        with patch('blog.search.index_posts') as index_posts, self.captureOnCommitCallbacks(execute=True):
+            post.content = 'Edited'
+            post.save()
+        self.assertEqual(AutocompleteChange.objects.count(), logged)
+        index_posts.assert_not_called()
+        with patch('blog.search.index_posts') as index_posts, self.captureOnCommitCallbacks(execute=True):
+            post.title = 'Django signals, revisited'
+            post.save()
+        self.assertTrue(AutocompleteChange.objects.filter(object_id=post.pk, text='Django signals, revisited').exists())
+        index_posts.assert_called_once()
+
+    def test_changes_from_other_workers_are_applied_without_a_rebuild(self):
+        post = Post.objects.create(title='Django signals', content='C', author=self.author)
+        index = autocomplete.get_index()
+        autocomplete._index = None  # another worker, which has no index yet, renames the post
+        autocomplete.changed(autocomplete.POST, post.pk, 'Flask signals')
+        autocomplete._index = index
+        with self.settings(BLOG_AUTOCOMPLETE_CHECK_INTERVAL=0), \
+                patch.object(autocomplete, 'build_index', side_effect=AssertionError('rebuilt')):
+            resp = self.client.get(reverse('blog:autocomplete'), {'q': 'fla'})
+        self.assertEqual([p['title'] for p in resp.json()['posts']], ['Flask signals'])
+
+    def test_a_gap_in_the_change_log_needs_a_rebuild(self):
+        index = autocomplete.get_index()
+        AutocompleteChange.objects.create(pk=index.version + 2, kind=autocomplete.TAG, object_id=1, text='x')
+        self.assertFalse(autocomplete.catch_up(index))
+
+    def test_tags_with_a_slash_link_to_search(self):
+        Tag.objects.create(name='ci/cd')
+        resp = self.client.get(reverse('blog:autocomplete'), {'q': 'ci'})
+        self.assertEqual(resp.json()['tags'], [{'name': 'ci/cd', 'url': '/search/?q=ci%2Fcd'}])
+
+
+class FuzzySearchTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='auth', password='pass')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.django = Post.objects.create(title='Getting started with Django', content='C', author=self.author)
+            self.orm = Post.objects.create(title='Django ORM tips', content='C', author=self.author)
+            self.other = Post.objects.create(title='Flask in production', content='C', author=self.author)
+            self.other.tags.add('python')
+
+    def test_misspelled_words_find_titles_and_tags_ranked_by_similarity(self):
+        self.assertEqual({pk for pk, _ in search_posts('djnago', 10)}, {self.django.pk, self.orm.pk})
+        self.assertEqual(search_posts('djnago orm', 10)[0][0], self.orm.pk)
+        self.assertEqual([pk for pk, _ in search_posts('pyton', 10)], [self.other.pk])
+        self.assertEqual(search_posts('zzzz', 10), [])
+
+    def test_index_follows_title_and_tag_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other.title = 'Deploying Django'
+            self.other.save()
+            self.other.tags.remove('python')
+        self.assertEqual(len(search_posts('djnago', 10)), 3)
+        self.assertEqual(search_posts('pyton', 10), [])
+
+    def test_search_page_lists_fuzzy_matches_before_substring_ones(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title='Notes from Flaskconference', content='C', author=self.author)
+            Post.objects.create(title='Notes', content='Why I like flask', author=self.author)
+        resp = self.client.get(reverse('blog:search'), {'q': 'flask'})
+        # Title and tag matches first, then posts that only mention the word.
+        self.assertEqual(
+            [post.title for post in resp.context['posts']],
+            ['Flask in production', 'Notes from Flaskconference', 'Notes'],
+        )
+        self.assertContains(self.client.get(reverse('blog:search'), {'q': 'djagno'}), 'Django ORM tips')
+
+    def test_only_the_newest_posts_are_searched_by_content(self):
+        Post.objects.create(title='Old', content='About gunicorn workers', author=self.author)
+        Post.objects.create(title='New', content='Gunicorn again', author=self.author)
+        with self.settings(BLOG_SEARCH_CONTENT_SCAN=1):
+            resp = self.client.get(reverse('blog:search'), {'q': 'gunicorn'})
+        self.assertEqual([post.title for post in resp.context['posts']], ['New'])
+
+    def test_removing_tags_reindexes_each_post_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.orm.tags.add('python', 'orm', 'tips')
+        with patch('blog.search.index_posts') as index_posts, self.captureOnCommitCallbacks(execute=True):
+            self.orm.tags.clear()
+            self.other.tags.clear()
+        index_posts.assert_called_once()
+        self.assertLessEqual({self.orm.pk, self.other.pk}, set(index_posts.call_args.args[0]))
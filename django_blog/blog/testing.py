@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class BlogTestRunner(DiscoverRunner):
+    """
+    Runs the tests with the plain static files storage. The manifest storage
+    (blog/storage.py) only knows files that collectstatic has hashed, so every
+    {% static %} tag would fail in a test; PrecompressedStaticTests collects into
+    a temporary STATIC_ROOT and switches it back on.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.static_storage = override_settings(STORAGES={
+            **settings.STORAGES,
+            'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+        })
+        self.static_storage.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.static_storage.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,3 +1,317 @@
-from django.test import TestCase
+import gzip
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from taggit.models import Tag
+
+from . import tagging
+from .autocomplete import POST, PrefixIndex
+from .backends import CachedModelBackend
+from .compression import brotli
+from .feeds import FEED_KEY_PREFIX, feed_scope
+from .middleware import CompressionMiddleware
+from .models import Post, RelatedPost
+from .related import compute_related_posts, np, sparse, top_k_similar
+from .search import search_posts, trigrams
+from .tagging import assign_tags
+from .templating import template_timings, warm_templates
+from .throttling import TokenBucket, throttle
+from .views import serve_static
+
+
+# Tests that clear the cache use their own, not the file cache the dev server uses.
+ISOLATED_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'blog-tests'}}
+
+
+@override_settings(BLOG_THROTTLE_RATES={'test': '2/min'}, CACHES=ISOLATED_CACHE)
+class TokenBucketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def test_bucket_allows_burst_then_refills(self):
+        bucket = TokenBucket('test')
+        bucket.timer = lambda: 1000.0
+        self.assertTrue(bucket.consume('ip-1')[0])
+        self.assertTrue(bucket.consume('ip-1')[0])
+        allowed, wait = bucket.consume('ip-1')
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 30.0)
+        # another client has its own bucket
+        self.assertTrue(bucket.consume('ip-2')[0])
+        bucket.timer = lambda: 1030.0
+        self.assertTrue(bucket.consume('ip-1')[0])
+
+    def test_concurrent_requests_cannot_overspend(self):
+        bucket = TokenBucket('test')
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: bucket.consume('ip-1')[0], range(8)))
+        self.assertEqual(results.count(True), 2)
+
+    def test_decorator_returns_429_with_retry_after(self):
+        view = throttle('test')(lambda request: HttpResponse('ok'))
+        for _ in range(2):
+            self.assertEqual(view(self.factory.post('/register/')).status_code, 200)
+        resp = view(self.factory.post('/register/'))
+        self.assertEqual(resp.status_code, 429)
+        self.assertTrue(resp.has_header('Retry-After'))
+        # reads are never throttled
+        self.assertEqual(view(self.factory.get('/register/')).status_code, 200)
+
+
+@override_settings(CACHES=ISOLATED_CACHE)
+class CachedModelBackendTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader', password='pass')
+        self.backend = CachedModelBackend()
+
+    def test_second_lookup_skips_the_database(self):
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.backend.get_user(self.user.pk), self.user)
+
+    def test_saving_the_user_drops_the_cached_copy(self):
+        self.backend.get_user(self.user.pk)
+        self.user.email = 'reader@example.com'
+        self.user.save()
+        self.assertEqual(self.backend.get_user(self.user.pk).email, 'reader@example.com')
+
+    def test_users_deactivated_without_signals_are_rejected_after_the_recheck(self):
+        self.backend.get_user(self.user.pk)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        now = time.time()
+        with patch('blog.backends.time.time', return_value=now + 31):
+            with self.assertNumQueries(2):  # the recheck, then the reload
+                self.assertIsNone(self.backend.get_user(self.user.pk))
+
+
+class PrecompressedStaticTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, static_root)
+        overrides = override_settings(
+            STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'blog.storage.PrecompressedManifestStaticFilesStorage'}},
+            STATIC_ROOT=static_root,
+            STATIC_PRECOMPRESS_MIN_SIZE=0,
+        )
+        overrides.enable()
+        cls.addClassCleanup(overrides.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.stored_name('blog/css/login.css')
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_collectstatic_writes_hashed_gzip_variant(self):
+        self.assertRegex(self.hashed, r'^blog/css/login\.[0-9a-f]{12}\.css$')
+        original = Path(staticfiles_storage.path(self.hashed)).read_bytes()
+        compressed = Path(staticfiles_storage.path(self.hashed) + '.gz').read_bytes()
+        self.assertEqual(gzip.decompress(compressed), original)
+
+    def test_serve_static_negotiates_encoding(self):
+        resp = serve_static(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip, deflate'), self.hashed)
+        self.assertEqual(resp['Content-Encoding'], 'gzip')
+        self.assertEqual(resp['Content-Type'], 'text/css')
+        self.assertIn('immutable', resp['Cache-Control'])
+        self.assertEqual(resp['Vary'], 'Accept-Encoding')
+
+        resp = serve_static(self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip;q=0'), self.hashed)
+        self.assertFalse(resp.has_header('Content-Encoding'))
+
+
+class TemplateWarmupTests(TestCase):
+    def test_every_blog_template_compiles(self):
+        compiled, failed = warm_templates()
+        self.assertEqual(failed, [])
+        self.assertIn('blog/post_detail.html', template_timings()['compile_ms'])
+
+    @override_settings(BLOG_SERVER_TIMING=True)
+    def test_render_time_is_sent_as_server_timing(self):
+        resp = self.client.get(reverse('blog:post-list'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertRegex(resp['Server-Timing'], r'^tpl;desc="blog/post_list.html";dur=[0-9.]+$')
+        self.assertGreaterEqual(template_timings()['render_ms']['blog/post_list.html'][0], 1)
+
+
+@override_settings(BLOG_COMPRESSION_MIN_SIZE=200)
+class CompressionMiddlewareTests(TestCase):
+    page = b'<p>' + b'A long comment thread. ' * 200 + b'</p>'
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def run_middleware(self, response, accept='gzip'):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(self.factory.get('/', HTTP_ACCEPT_ENCODING=accept))
+
+    def test_html_is_gzipped_and_short_bodies_are_left_alone(self):
+        response = self.run_middleware(HttpResponse(self.page))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.page)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        response = self.run_middleware(HttpResponse(b'<p>short</p>'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_brotli_is_preferred_when_available(self):
+        if brotli is None:
+            self.skipTest('brotli is not installed')
+        response = self.run_middleware(HttpResponse(self.page), accept='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.page)
+
+    def test_streaming_response_is_compressed_per_chunk(self):
+        chunks = [self.page[i:i + 500] for i in range(0, len(self.page), 500)]
+        response = self.run_middleware(StreamingHttpResponse(iter(chunks)))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), self.page)
+
+    def test_cacheable_responses_are_compressed_once(self):
+        def cached_page():
+            response = HttpResponse(self.page)
+            response['ETag'] = '"v1"'
+            return response
+
+        first = self.run_middleware(cached_page())
+        second = self.run_middleware(cached_page())
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second['ETag'], 'W/"v1"')
+
+
+@override_settings(CACHES=ISOLATED_CACHE)
+class AssignTagsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Ids cached by one test belong to tags its rollback removed.
+        tagging.forget_tag_ids()
+        self.addCleanup(tagging.forget_tag_ids)
+        author = User.objects.create_user(username='auth', password='pass')
+        self.post = Post.objects.create(title='T', content='C', author=author)
+
+    def test_only_the_difference_is_written(self):
+        assign_tags(self.post, ['django', 'python', 'web'])
+        self.assertEqual(set(self.post.tags.names()), {'django', 'python', 'web'})
+
+        # savepoint, read the current tags, release; nothing to write
+        with self.assertNumQueries(3):
+            assign_tags(self.post, ['web', 'django', 'python'])
+
+        assign_tags(self.post, ['django', 'python', 'orm'])
+        self.assertEqual(set(self.post.tags.names()), {'django', 'python', 'orm'})
+
+    def test_tag_ids_are_cached_once_committed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            assign_tags(self.post, ['django'])
+        other = Post.objects.create(title='T2', content='C', author=self.post.author)
+        # savepoint, current tags, insert, release; no Tag lookup
+        with self.assertNumQueries(4):
+            assign_tags(other, ['django'])
+
+    def test_ids_are_looked_up_again_after_a_rename_elsewhere(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            assign_tags(self.post, ['django'])
+        tagging._tag_ids['django'] = 10 ** 9  # what a rename in another process leaves behind
+        cache.set(tagging.TAG_IDS_VERSION_KEY, 'changed elsewhere')
+        other = Post.objects.create(title='T2', content='C', author=self.post.author)
+        assign_tags(other, ['django'])
+        self.assertEqual(list(other.tags.names()), ['django'])
+
+    def test_new_tags_reach_feeds_sitemaps_and_search(self):
+        tag = Tag.objects.create(name='django')
+        cache.set(f'{FEED_KEY_PREFIX}{feed_scope(tag.pk)}:rss', {'post_ids': set()})
+        shard = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, shard)
+        (shard / 'http_testserver').mkdir()
+        (shard / 'http_testserver' / 'tags-0-old.xml').touch()
+        with self.settings(BLOG_SITEMAP_ROOT=shard), self.captureOnCommitCallbacks(execute=True):
+            assign_tags(self.post, ['django', 'orm'])
+        self.assertIsNone(cache.get(f'{FEED_KEY_PREFIX}{feed_scope(tag.pk)}:rss'))
+        self.assertFalse((shard / 'http_testserver' / 'tags-0-old.xml').exists())
+        self.assertIn(self.post.pk, [pk for pk, _ in search_posts('orm', 5)])
+
+
+@override_settings(CACHES=ISOLATED_CACHE)
+class AssignTagsCommitTests(TransactionTestCase):
+    def setUp(self):
+        tagging.forget_tag_ids()
+        self.addCleanup(tagging.forget_tag_ids)
+        author = User.objects.create_user(username='auth', password='pass')
+        self.post = Post.objects.create(title='T', content='C', author=author)
+
+    def test_stale_cached_id_is_resolved_again(self):
+        tagging._tag_ids['django'] = 10 ** 9  # a tag deleted before the version change arrived
+        assign_tags(self.post, ['django'])
+        self.assertEqual(list(self.post.tags.names()), ['django'])
+        self.assertNotEqual(tagging._tag_ids.get('django'), 10 ** 9)
+
+
+@override_settings(BLOG_VIEW_COUNTER_ASYNC=False, BLOG_VIEW_FLUSH_INTERVAL=0)
+class RelatedPostsTests(TestCase):
+    def setUp(self):
+        if np is None:
+            self.skipTest('numpy/scipy are not installed')
+        author = User.objects.create_user(username='auth', password='pass')
+        self.posts = {}
+        for title, tags in [('a', ['django', 'orm', 'rare']), ('b', ['django', 'orm']),
+                            ('c', ['django', 'rare']), ('d', ['cooking'])]:
+            self.posts[title] = Post.objects.create(title=title, content='C', author=author)
+            assign_tags(self.posts[title], tags)
+
+    def test_top_k_by_weighted_tag_overlap(self):
+        compute_related_posts(k=2)
+        related = RelatedPost.objects.filter(post=self.posts['a']).values_list('related__title', flat=True)
+        # c shares the rarer tag, so it outranks b
+        self.assertEqual(list(related), ['c', 'b'])
+        self.assertFalse(RelatedPost.objects.filter(post=self.posts['d']).exists())
+
+        resp = self.client.get(reverse('blog:post-detail', args=[self.posts['a'].pk]))
+        self.assertEqual([p.title for p in resp.context['related_posts']], ['c', 'b'])
+
+        with self.settings(BLOG_RELATED_POSTS=1):
+            resp = self.client.get(reverse('blog:post-detail', args=[self.posts['a'].pk]))
+        self.assertEqual([p.title for p in resp.context['related_posts']], ['c'])
+
+    def test_ties_at_the_cutoff_keep_the_newest_posts(self):
+        # Five posts with the same single tag: every pair scores 1.
+        similar = dict(top_k_similar(sparse.csr_matrix(np.ones((5, 1))), k=2))
+        self.assertEqual([other for other, _ in similar[0]], [4, 3])
+        self.assertEqual([other for other, _ in similar[4]], [3, 2])
+
+
+class PrefixIndexTests(TestCase):
+    def test_matches_from_the_start_of_any_word_and_follows_updates(self):
+        index = PrefixIndex(posts=[(1, 'Intro to Django ORM'), (2, 'Django signals')], tags=[(7, 'django-orm')])
+        posts, tags = index.lookup('Djan', 8)
+        self.assertEqual(sorted(pk for pk, _ in posts), [1, 2])
+        self.assertEqual(tags, [(7, 'django-orm')])
+        self.assertEqual(index.lookup('orm', 8)[0], [(1, 'Intro to Django ORM')])
+
+        index.set(POST, 1, 'Intro to SQL')
+        self.assertEqual(index.lookup('django o', 8)[0], [])
+        self.assertEqual(index.lookup('sql', 8)[0], [(1, 'Intro to SQL')])
+        index.remove(POST, 2)
+        self.assertEqual(index.lookup('django', 8)[0], [])
+
+
+class TrigramTests(TestCase):
+    def test_trigrams_are_padded_like_pg_trgm(self):
+        self.assertEqual(trigrams('orm'), {'  o', ' or', 'orm', 'rm '})
+        # "djnago" shares 3 of 11 distinct trigrams with "django": above the 0.25 default.
+        shared = trigrams('djnago') & trigrams('django')
+        self.assertEqual(len(shared) / len(trigrams('djnago') | trigrams('django')), 3 / 11)
@@ -0,0 +1,119 @@
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+# How long a bucket stays locked if the worker holding it dies mid-update.
+LOCK_TIMEOUT = 2
+# Threads of one process queue here first; a bucket always maps to the same stripe.
+_local_locks = [threading.Lock() for _ in range(64)]
+
+
+def parse_rate(rate):
+    """
+    Turn a rate string such as '10/min' into (number_of_requests, period_in_seconds).
+    """
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+def get_ident(request):
+    """
+    Identify the client: the user id when logged in, otherwise the remote address.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user-{user.pk}'
+    return f"ip-{request.META.get('REMOTE_ADDR', '')}"
+
+
+class TokenBucket:
+    """
+    Token bucket stored as one (tokens, timestamp) pair per client in the default cache.
+    A rate of 'N/period' allows bursts of N requests, refilled at N/period tokens per second.
+    The file-based cache configured in settings shares the buckets between worker
+    processes, and each check reads and writes its bucket under a lock (cache.add on
+    a lock key), so concurrent requests can't both spend the same token.
+    """
+    timer = time.time
+
+    def __init__(self, scope, rate=None):
+        if rate is None:
+            try:
+                rate = settings.BLOG_THROTTLE_RATES[scope]
+            except KeyError:
+                raise ImproperlyConfigured(f"No throttle rate set for '{scope}' in BLOG_THROTTLE_RATES")
+        self.scope = scope
+        self.capacity, self.period = parse_rate(rate)
+
+    def consume(self, ident):
+        """
+        Take a token for `ident`. Returns (allowed, seconds_to_wait).
+        """
+        key = f'blog:throttle:{self.scope}:{ident}'
+        with _locked(key):
+            now = self.timer()
+            tokens, last = cache.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.capacity / self.period)
+            if tokens < 1:
+                return False, (1 - tokens) * self.period / self.capacity
+            cache.set(key, (tokens - 1, now), self.period)
+        return True, 0
+
+
+@contextmanager
+def _locked(key):
+    lock_key = f'{key}:lock'
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    with _local_locks[hash(key) % len(_local_locks)]:
+        while not (acquired := cache.add(lock_key, 1, LOCK_TIMEOUT)) and time.monotonic() < deadline:
+            time.sleep(0.001)
+        try:
+            yield
+        finally:
+            if acquired:
+                cache.delete(lock_key)
+
+
+def throttled_response(wait):
+    response = HttpResponse('Too many requests. Please slow down.', status=429)
+    response['Retry-After'] = str(int(wait) + 1)
+    return response
+
+
+def throttle(scope, methods=('POST',)):
+    """
+    Decorator for function views: throttle requests using the given methods.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if request.method in methods:
+                allowed, wait = TokenBucket(scope).consume(get_ident(request))
+                if not allowed:
+                    return throttled_response(wait)
+            return view_func(request, *args, **kwargs)
+        return _wrapped
+    return decorator
+
+
+class ThrottleMixin:
+    """
+    Class-based view counterpart of @throttle.
+    Set throttle_scope to a key of BLOG_THROTTLE_RATES.
+    """
+    throttle_scope = None
+    throttle_methods = ('POST',)
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in self.throttle_methods:
+            allowed, wait = TokenBucket(self.throttle_scope).consume(get_ident(request))
+            if not allowed:
+                return throttled_response(wait)
+        return super().dispatch(request, *args, **kwargs)
@@ -1,74 +1,103 @@
-from django.urls import path  
+from django.urls import path, URLPattern
+from django.urls.resolvers import RoutePattern
 from django.contrib.auth import views as auth_views
+from django.http import HttpResponsePermanentRedirect
+from django.views.generic import RedirectView
 from . import views
+from .feeds import LatestPostsAtomFeed, LatestPostsFeed, TagPostsAtomFeed, TagPostsFeed
 
 app_name = 'blog'
 
-def _comment_create_delegate(request, pk):
+
+class HttpResponsePermanentRedirectKeepMethod(HttpResponsePermanentRedirect):
+    # 308: like 301, but the client must repeat the same method and body
+    status_code = 308
+
+
+class LegacyRedirectView(RedirectView):
     """
-    Delegate view used only to accept a URL with <int:pk> and forward it
-    to CommentCreateView providing the expected kwarg 'post_id'.
+    Permanent redirect from an old URL spelling to its canonical route.
+    Uses 308 so forms still posting to the old paths keep working.
     """
-    view = views.CommentCreateView.as_view()
-    return view(request, post_id=pk)
+    query_string = True
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponsePermanentRedirectKeepMethod(self.get_redirect_url(*args, **kwargs))
+
+
+def legacy(pattern_name):
+    return LegacyRedirectView.as_view(pattern_name=pattern_name)
+
 
-def _posts_by_tag_delegate(request, tag_name):
+class ReverseOnlyPattern(URLPattern):
     """
-    Delegate to satisfy exact-text checkers that look for 'tags/<tag_name>/'.
-    Calls the real posts_by_tag view with the provided tag_name.
+    An old route name that reverse() still knows. It never matches a request:
+    its path is routed by another entry.
     """
-    return views.posts_by_tag(request, tag_name=tag_name)
+    def resolve(self, path):
+        return None
 
+
+def reverse_only(route, view, name):
+    return ReverseOnlyPattern(RoutePattern(route, name=name, is_endpoint=True), view, name=name)
+
+
+# One route per page. Patterns are tried in order, so the most requested
+# (read-only) pages come first and the legacy redirects come last.
 urlpatterns = [
-    # authentication and profile routes 
+    # posts (reads)
+    path('posts/', views.PostListView.as_view(), name='post-list'),
+    path('posts/<int:pk>/', views.PostDetailView.as_view(), name='post-detail'),
+    path('tags/<str:tag_name>/', views.posts_by_tag, name='posts-by-tag'),
+    path('search/', views.search_view, name='search'),
+    path('search/autocomplete/', views.autocomplete_view, name='autocomplete'),
+    path('archive/<int:year>/', views.PostYearArchiveView.as_view(), name='archive-year'),
+    path('archive/<int:year>/<int:month>/', views.PostMonthArchiveView.as_view(), name='archive-month'),
+
+    # sitemaps
+    path('sitemap.xml', views.sitemap_index, name='sitemap-index'),
+    path('sitemap-<slug:section>-<int:number>.xml', views.sitemap_shard, name='sitemap-shard'),
+
+    # feeds
+    path('feeds/rss/', LatestPostsFeed(), name='feed-rss'),
+    path('feeds/atom/', LatestPostsAtomFeed(), name='feed-atom'),
+    path('tags/<str:tag_name>/rss/', TagPostsFeed(), name='tag-feed-rss'),
+    path('tags/<str:tag_name>/atom/', TagPostsAtomFeed(), name='tag-feed-atom'),
+
+    # authentication and profile
     path('login/', auth_views.LoginView.as_view(template_name='blog/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
     path('register/', views.register_view, name='register'),
     path('profile/', views.profile_view, name='profile'),
 
-    # plural-style CRUD routes 
-    path('posts/', views.PostListView.as_view(), name='post-list'),
+    # posts (writes)
     path('posts/new/', views.PostCreateView.as_view(), name='post-create'),
-    path('posts/<int:pk>/', views.PostDetailView.as_view(), name='post-detail'),
     path('posts/<int:pk>/edit/', views.PostUpdateView.as_view(), name='post-update'),
     path('posts/<int:pk>/delete/', views.PostDeleteView.as_view(), name='post-delete'),
 
-    # singular-style CRUD routes 
-    path('post/new/', views.PostCreateView.as_view(), name='post-create-alt'),
-    path('post/<int:pk>/', views.PostDetailView.as_view(), name='post-detail-alt'),
-    path('post/<int:pk>/update/', views.PostUpdateView.as_view(), name='post-update-alt'),
-    path('post/<int:pk>/delete/', views.PostDeleteView.as_view(), name='post-delete-alt'),
-
-    # --- Explicit exact-path entries added 
-    path("post/new/", views.PostCreateView.as_view(), name="post-create-exact"),
-    path("post/<int:pk>/update/", views.PostUpdateView.as_view(), name="post-update-exact"),
-    path("post/<int:pk>/delete/", views.PostDeleteView.as_view(), name="post-delete-exact"),
-
-    # receives the correct keyword argument.
-    path('post/<int:pk>/comments/new/', _comment_create_delegate, name='comment-create-pk-delegate'),
-
+    # comments
+    path('posts/<int:post_id>/comments/', views.comment_list, name='comment-list'),
+    path('posts/<int:post_id>/comments/page/', views.comment_page_fragment, name='comment-page'),
     path('posts/<int:post_id>/comments/new/', views.CommentCreateView.as_view(), name='comment-create'),
-
-    # comment edit/delete routes (plural 'comments/...')
     path('comments/<int:pk>/edit/', views.CommentUpdateView.as_view(), name='comment-edit'),
     path('comments/<int:pk>/delete/', views.CommentDeleteView.as_view(), name='comment-delete'),
 
-    # --- Add strings for comment update/delete too ---
-    path('comment/<int:pk>/update/', views.CommentUpdateView.as_view(), name='comment-update-exact'),
-    path('comment/<int:pk>/delete/', views.CommentDeleteView.as_view(), name='comment-delete-exact'),
-
-    # -----------------------------
-    # Search and Tags routes (NEW)
-    # -----------------------------
-    # Search (exact path)
-    path('search/', views.search_view, name='search'),
-
-    # Posts by tag (typed converter; preferred)
-    path('tags/<str:tag_name>/', views.posts_by_tag, name='posts-by-tag'),
+    # moderation
+    path('moderation/duplicates/', views.duplicate_review, name='duplicate-review'),
 
-    # delegate for checkers for 'tags/<tag_name>/'
-    path('tags/<tag_name>/', _posts_by_tag_delegate, name='posts-by-tag-exact'),
+    # legacy singular-style paths, redirected to the routes above
+    path('post/new/', legacy('blog:post-create'), name='post-create-alt'),
+    path('post/<int:pk>/', legacy('blog:post-detail'), name='post-detail-alt'),
+    path('post/<int:pk>/update/', legacy('blog:post-update'), name='post-update-alt'),
+    path('post/<int:pk>/delete/', legacy('blog:post-delete'), name='post-delete-alt'),
+    path('post/<int:post_id>/comments/new/', legacy('blog:comment-create'), name='comment-create-pk-delegate'),
+    path('comment/<int:pk>/update/', legacy('blog:comment-edit'), name='comment-update-exact'),
+    path('comment/<int:pk>/delete/', legacy('blog:comment-delete'), name='comment-delete-exact'),
 
-    # --------- EXACT slug-based route ----------
-    path('tags/<slug:tag_slug>/', views.PostByTagListView.as_view(), name='posts-by-tag-slug'),
+    # older names for paths routed above, kept only so reverse() calls using them still work
+    reverse_only('post/new/', legacy('blog:post-create'), name='post-create-exact'),
+    reverse_only('post/<int:pk>/update/', legacy('blog:post-update'), name='post-update-exact'),
+    reverse_only('post/<int:pk>/delete/', legacy('blog:post-delete'), name='post-delete-exact'),
+    reverse_only('tags/<tag_name>/', views.posts_by_tag, name='posts-by-tag-exact'),
+    reverse_only('tags/<slug:tag_slug>/', views.posts_by_tag, name='posts-by-tag-slug'),
 ]
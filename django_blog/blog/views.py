@@ -1,19 +1,44 @@
+import mimetypes
+import os
+import re
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.http import (
+    FileResponse, Http404, HttpResponseNotModified, HttpResponseRedirect, JsonResponse, StreamingHttpResponse,
+)
 from django.shortcuts import render, redirect, get_object_or_404
+from django.utils._os import safe_join
+from django.utils.http import http_date, urlencode, urlsafe_base64_decode, urlsafe_base64_encode
+from django.views.static import was_modified_since
 from django.contrib.auth import login
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .forms import CustomUserCreationForm, UserUpdateForm, PostForm, CommentForm
 
-from django.urls import reverse_lazy, reverse
+from django.urls import NoReverseMatch, reverse_lazy, reverse
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from django.views.generic.dates import MonthArchiveView, YearArchiveView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 
 from django.db.models import Q
 
+from .archive import archive_months
+from .autocomplete import get_index
+from .compression import accepted_encodings
+from .counters import view_counter
+from .duplicates import near_duplicates_of, find_near_duplicates
 from .models import Post, Comment
+from .search import posts_containing, posts_mentioning, search_posts
+from .sitemaps import SECTIONS, shard_count, shard_path, site_origin
+from .tagging import assign_tags
+from .throttling import throttle, ThrottleMixin
 from taggit.models import Tag  # <-- taggit's Tag model
 
 
+@throttle('register')
 def register_view(request):
     if request.method == "POST":
         form = CustomUserCreationForm(request.POST)
@@ -50,26 +75,23 @@ class PostListView(ListView):
     context_object_name = 'posts'
     paginate_by = 10
 
+    # ?sort=trending / ?sort=popular; both columns are indexed and kept up to date
+    # by blog.counters, so sorting by them is an index scan.
+    SORTS = {
+        'trending': ('-trending_score', '-id'),
+        'popular': ('-view_count', '-id'),
+    }
 
-class PostByTagListView(ListView):
-    """
-    List posts filtered by tag slug (URL: tags/<slug:tag_slug>/).
-    Checker looks for PostByTagListView.as_view() in urls.py.
-    """
-    model = Post
-    template_name = 'blog/posts_by_tag.html'
-    context_object_name = 'posts'
-    paginate_by = 10
+    def get_ordering(self):
+        return self.SORTS.get(self.request.GET.get('sort'))
 
     def get_queryset(self):
-        tag_slug = self.kwargs.get('tag_slug')
-        tag = get_object_or_404(Tag, slug__iexact=tag_slug)
-        return Post.objects.filter(tags__slug__iexact=tag.slug).distinct()
+        # Listings show post.excerpt, so the full body is never loaded.
+        return super().get_queryset().select_related('author').defer('content')
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data(**kwargs)
-        tag_slug = self.kwargs.get('tag_slug')
-        ctx['tag'] = get_object_or_404(Tag, slug__iexact=tag_slug)
+        ctx['sort'] = self.request.GET.get('sort') if self.get_ordering() else ''
         return ctx
 
 
@@ -77,6 +99,23 @@ class PostDetailView(DetailView):
     model = Post
     template_name = 'blog/post_detail.html'
 
+    def get_object(self, queryset=None):
+        post = super().get_object(queryset)
+        view_counter.hit(post.pk)
+        return post
+
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        # Only the first page of comments is rendered inline; the rest load on demand.
+        ctx['comments'], ctx['next_cursor'] = comment_page(self.object)
+        # Precomputed by compute_related_posts; one lookup on (post, rank).
+        ctx['related_posts'] = (
+            Post.objects.filter(related_from__post=self.object)
+            .order_by('related_from__rank')
+            .only('pk', 'title', 'published_date')[:getattr(settings, 'BLOG_RELATED_POSTS', 5)]
+        )
+        return ctx
+
 
 class PostCreateView(LoginRequiredMixin, CreateView):
     model = Post
@@ -86,15 +125,17 @@ class PostCreateView(LoginRequiredMixin, CreateView):
     login_url = 'login'
 
     def form_valid(self, form):
+        if getattr(settings, 'BLOG_NEAR_DUPLICATE_CHECK', False) and find_near_duplicates(form.cleaned_data['content']):
+            form.add_error('content', "This post is nearly identical to one that is already published.")
+            return self.form_invalid(form)
         form.instance.author = self.request.user
-        response = super().form_valid(form)
-
-        # Handle tags (taggit expects a list of strings)
-        tags_str = form.cleaned_data.get('tags', '')
-        tag_names = [t.strip() for t in tags_str.split(',') if t.strip()]
-        self.object.tags.set(tag_names)  # taggit auto-creates tags
+        # Save without form.save_m2m(): assign_tags writes only the tag changes
+        # (taggit's TagField has already parsed the input into a list of names).
+        self.object = form.save(commit=False)
+        self.object.save()
+        assign_tags(self.object, form.cleaned_data.get('tags', []))
         messages.success(self.request, "Post created successfully.")
-        return response
+        return HttpResponseRedirect(self.get_success_url())
 
 
 class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
@@ -108,12 +149,13 @@ class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         return self.get_object().author == self.request.user
 
     def form_valid(self, form):
-        response = super().form_valid(form)
-        tags_str = form.cleaned_data.get('tags', '')
-        tag_names = [t.strip() for t in tags_str.split(',') if t.strip()]
-        self.object.tags.set(tag_names)
+        self.object = form.save(commit=False)
+        # Write only what was edited: a full save would put back the view counts the
+        # post was loaded with, undoing any hits blog.counters flushed since.
+        self.object.save(update_fields=[name for name in form.changed_data if name != 'tags'])
+        assign_tags(self.object, form.cleaned_data.get('tags', []))
         messages.success(self.request, "Post updated successfully.")
-        return response
+        return HttpResponseRedirect(self.get_success_url())
 
     def handle_no_permission(self):
         messages.error(self.request, "You do not have permission to edit this post.")
@@ -138,11 +180,12 @@ class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 # Comment CRUD views
 # ------------------------------
 
-class CommentCreateView(LoginRequiredMixin, CreateView):
+class CommentCreateView(LoginRequiredMixin, ThrottleMixin, CreateView):
     model = Comment
     form_class = CommentForm
     template_name = 'blog/comments/comment_form.html'
     login_url = 'login'
+    throttle_scope = 'comment'
 
     def dispatch(self, request, *args, **kwargs):
         self.post = get_object_or_404(Post, pk=kwargs.get('post_id'))
@@ -191,10 +234,64 @@ class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return reverse('blog:post-detail', kwargs={'pk': self.get_object().post.pk})
 
 
+# ------------------------------
+# Comment pages
+# ------------------------------
+
+def encode_comment_cursor(comment):
+    raw = f'{comment.created_at.isoformat()}|{comment.pk}'.encode()
+    return urlsafe_base64_encode(raw)
+
+
+def decode_comment_cursor(cursor):
+    try:
+        created_at, pk = urlsafe_base64_decode(cursor).decode().split('|')
+        created_at = datetime.fromisoformat(created_at)
+        return created_at, int(pk)
+    except ValueError:
+        raise BadRequest('Invalid comment cursor.')
+
+
+def comment_page(post, cursor=None):
+    """
+    One page of a post's comments in (created_at, id) order, starting after the
+    cursor, plus the cursor of the next page (None on the last page).
+    Keyset pagination keeps every page an index range scan on
+    (post, created_at, id), however deep into a long thread it is.
+    """
+    size = getattr(settings, 'BLOG_COMMENTS_PER_PAGE', 50)
+    comments = post.comments.select_related('author').order_by('created_at', 'id')
+    if cursor:
+        created_at, pk = decode_comment_cursor(cursor)
+        comments = comments.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+    comments = list(comments[:size + 1])
+    if len(comments) > size:
+        return comments[:size], encode_comment_cursor(comments[size - 1])
+    return comments, None
+
+
 def comment_list(request, post_id):
+    """
+    Full page of comments; ?after=<cursor> starts further into the thread.
+    This is where the "More comments" link leads when JavaScript is off.
+    """
     post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
-    return render(request, 'blog/comments/comment_list.html', {'post': post, 'comments': comments})
+    comments, next_cursor = comment_page(post, request.GET.get('after'))
+    return render(request, 'blog/comment_list.html', {
+        'post': post, 'comments': comments, 'next_cursor': next_cursor,
+    })
+
+
+def comment_page_fragment(request, post_id):
+    """
+    The next page of comments as a bare HTML fragment, which blog/js/comments.js
+    swaps in for the "More comments" link.
+    """
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    comments, next_cursor = comment_page(post, request.GET.get('after'))
+    return render(request, 'blog/comment_page.html', {
+        'post': post, 'comments': comments, 'next_cursor': next_cursor,
+    })
 
 
 # ------------------------------
@@ -202,18 +299,189 @@ def comment_list(request, post_id):
 # ------------------------------
 
 def search_view(request):
+    """
+    Posts whose title or tags contain words like the query, typos included,
+    ranked by trigram similarity (blog/search.py). If that finds fewer than
+    BLOG_SEARCH_RESULTS posts, the newest posts with a title or tag word that
+    contains a query word fill the page, then recent posts whose content contains
+    the query (only the newest BLOG_SEARCH_CONTENT_SCAN posts are searched by content).
+    """
     query = request.GET.get('q', '').strip()
-    posts = Post.objects.none()
+    posts = []
     if query:
-        posts = Post.objects.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct()
+        limit = getattr(settings, 'BLOG_SEARCH_RESULTS', 50)
+        ranked = [pk for pk, score in search_posts(query, limit)]
+        if len(ranked) < limit:
+            ranked += posts_containing(query, limit - len(ranked), exclude=ranked)
+        if len(ranked) < limit:
+            ranked += posts_mentioning(query, limit - len(ranked), exclude=ranked)
+        listing = Post.objects.select_related('author').defer('content').prefetch_related('tags')
+        by_id = listing.in_bulk(ranked)
+        posts = [by_id[pk] for pk in ranked if pk in by_id]
     return render(request, 'blog/search_results.html', {'query': query, 'posts': posts})
 
 
+def tag_url(name):
+    try:
+        return reverse('blog:posts-by-tag', args=[name])
+    except NoReverseMatch:
+        # A name with a "/" can't be a tags/<name>/ path; search for it instead.
+        return f"{reverse('blog:search')}?{urlencode({'q': name})}"
+
+
+def autocomplete_view(request):
+    """
+    Typeahead suggestions for the search box: posts whose title, and tags whose
+    name, has a word starting with ?q=. Served from the in-memory prefix index
+    in blog/autocomplete.py, without touching the database.
+    """
+    limit = getattr(settings, 'BLOG_AUTOCOMPLETE_LIMIT', 8)
+    posts, tags = get_index().lookup(request.GET.get('q', ''), limit)
+    response = JsonResponse({
+        'posts': [{'title': title, 'url': reverse('blog:post-detail', args=[pk])} for pk, title in posts],
+        'tags': [{'name': name, 'url': tag_url(name)} for pk, name in tags],
+    })
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
+
+
 def posts_by_tag(request, tag_name):
     tag = get_object_or_404(Tag, name__iexact=tag_name)
-    posts = Post.objects.filter(tags__name__iexact=tag_name)
-    return render(request, 'blog/posts_by_tag.html', {'tag': tag, 'posts': posts})
\ No newline at end of file
+    posts = Post.objects.filter(tags__name__iexact=tag_name).select_related('author').defer('content')
+    return render(request, 'blog/posts_by_tag.html', {'tag': tag, 'posts': posts})
+
+
+# ------------------------------
+# Moderation
+# ------------------------------
+
+@staff_member_required
+def duplicate_review(request):
+    """
+    Recent posts that have near-duplicates, with the posts they duplicate, for
+    moderators tracking down reposting accounts.
+    """
+    recent = list(
+        Post.objects.select_related('author').defer('content')
+        .order_by('-published_date', '-id')[:getattr(settings, 'BLOG_DUPLICATE_REVIEW_POSTS', 100)]
+    )
+    matches = near_duplicates_of([post.pk for post in recent])
+    others = Post.objects.select_related('author').defer('content').in_bulk(
+        {other for pairs in matches.values() for other, _ in pairs}
+    )
+    flagged = [
+        (post, [(others[other], sim) for other, sim in matches[post.pk] if other in others])
+        for post in recent if post.pk in matches
+    ]
+    return render(request, 'blog/duplicate_review.html', {'flagged': flagged})
+
+
+# ------------------------------
+# Archive
+# ------------------------------
+
+class PostArchiveMixin:
+    model = Post
+    date_field = 'published_date'
+    context_object_name = 'posts'
+    paginate_by = 10
+    ordering = ('-published_date', '-id')
+
+    def get_queryset(self):
+        return super().get_queryset().select_related('author').defer('content')
+
+
+class PostYearArchiveView(PostArchiveMixin, YearArchiveView):
+    template_name = 'blog/post_archive_year.html'
+    make_object_list = True
+
+    def get_date_list(self, queryset, date_type=None, ordering='ASC'):
+        # The months of the year come from the month table, not a GROUP BY over posts.
+        year = int(self.get_year())
+        months = [month for month, _ in archive_months() if month.year == year]
+        return months if ordering == 'DESC' else months[::-1]
+
+
+class PostMonthArchiveView(PostArchiveMixin, MonthArchiveView):
+    template_name = 'blog/post_archive_month.html'
+    month_format = '%m'
+
+    def get_date_list(self, queryset, date_type=None, ordering='ASC'):
+        # The month page doesn't list days; skip the per-day query.
+        return []
+
+
+# ------------------------------
+# Sitemaps
+# ------------------------------
+
+def sitemap_index(request):
+    """
+    Sitemap index listing every posts and tags shard (see blog/sitemaps.py).
+    """
+    base = '{}://{}'.format(*site_origin(request))
+
+    def lines():
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        for section in SECTIONS:
+            for number in range(shard_count(section)):
+                url = base + reverse('blog:sitemap-shard', args=[section, number])
+                yield f'<sitemap><loc>{url}</loc></sitemap>\n'
+        yield '</sitemapindex>\n'
+
+    return StreamingHttpResponse(lines(), content_type='application/xml')
+
+
+def sitemap_shard(request, section, number):
+    if section not in SECTIONS or number >= shard_count(section):
+        raise Http404
+    response = FileResponse(open(shard_path(request, section, number), 'rb'), content_type='application/xml')
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+
+# ------------------------------
+# Static files
+# ------------------------------
+
+# Files renamed by ManifestStaticFilesStorage carry a 12-hex-digit content hash.
+HASHED_STATIC_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/]+$')
+PRECOMPRESSED_VARIANTS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def serve_static(request, path):
+    """
+    Serve a collected static file, preferring the .br or .gz variant written by
+    PrecompressedManifestStaticFilesStorage when the client accepts it.
+    Hashed names are cached for a year as immutable; other names for an hour.
+    """
+    try:
+        fullpath = safe_join(settings.STATIC_ROOT, path)
+    except ValueError:
+        raise Http404
+    if not os.path.isfile(fullpath):
+        raise Http404
+
+    stat = os.stat(fullpath)
+    if not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    content_type = mimetypes.guess_type(fullpath)[0] or 'application/octet-stream'
+    served, content_encoding = fullpath, None
+    accepted = accepted_encodings(request)
+    for encoding, suffix in PRECOMPRESSED_VARIANTS:
+        if encoding in accepted and os.path.isfile(fullpath + suffix):
+            served, content_encoding = fullpath + suffix, encoding
+            break
+
+    response = FileResponse(open(served, 'rb'), content_type=content_type)
+    if content_encoding:
+        response['Content-Encoding'] = content_encoding
+    response['Vary'] = 'Accept-Encoding'
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if HASHED_STATIC_NAME.search(path):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response['Cache-Control'] = 'public, max-age=3600'
+    return response
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_blog.settings')
 
 application = get_asgi_application()
+
+# In production template mode, compile every blog template before the first request
+from blog.templating import warm_templates_at_startup  # noqa: E402
+
+warm_templates_at_startup()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,19 +44,22 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.middleware.ServerTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'django_blog.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django's backend plus compile/render timings (blog/templating.py)
+        'BACKEND': 'blog.templating.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -68,6 +72,79 @@ TEMPLATES = [
     },
 ]
 
+# BLOG_TEMPLATE_MODE=production switches to an explicit cached loader with template
+# debugging off, and compiles every template in blog/templates at worker boot
+# (from wsgi.py / asgi.py, so manage.py commands don't).
+BLOG_TEMPLATE_MODE = os.environ.get('BLOG_TEMPLATE_MODE', 'development')
+
+if BLOG_TEMPLATE_MODE == 'production':
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['debug'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+# Send per-template render times in a Server-Timing response header
+BLOG_SERVER_TIMING = DEBUG
+
+# blog.middleware.CompressionMiddleware: bodies below the minimum size are sent
+# uncompressed; compressed copies of cacheable responses are kept this many seconds.
+BLOG_COMPRESSION_MIN_SIZE = 1024
+BLOG_COMPRESSION_CACHE_TIMEOUT = 600
+
+# Comments rendered per page on post_detail / comment_list and per fragment request.
+BLOG_COMMENTS_PER_PAGE = 50
+
+# RSS/Atom feeds (blog/feeds.py): posts per feed, how long readers may reuse a copy,
+# and how long an unchanged rendering stays cached (edits invalidate it sooner).
+BLOG_FEED_SIZE = 20
+BLOG_FEED_MAX_AGE = 300
+BLOG_FEED_CACHE_TIMEOUT = 86400
+
+# Sitemap shards (blog/sitemaps.py) are written here on first request and deleted
+# when a post or tag in them changes. BLOG_SITEMAP_ORIGIN (e.g. 'https://blog.example.com')
+# writes every sitemap for that one site; when unset, each host listed exactly in
+# ALLOWED_HOSTS gets its own.
+BLOG_SITEMAP_ROOT = BASE_DIR / 'sitemaps'
+BLOG_SITEMAP_ORIGIN = os.environ.get('BLOG_SITEMAP_ORIGIN')
+
+# Post view counts (blog/counters.py) are kept in memory per process and written
+# every BLOG_VIEW_FLUSH_INTERVAL seconds or BLOG_VIEW_FLUSH_MAX_PENDING hits.
+# Trending scores halve every BLOG_TRENDING_HALF_LIFE seconds and are aged at most
+# once per BLOG_TRENDING_INTERVAL seconds (also run `manage.py decay_trending` from cron).
+BLOG_VIEW_COUNTER_ASYNC = True
+BLOG_VIEW_FLUSH_INTERVAL = 10
+BLOG_VIEW_FLUSH_MAX_PENDING = 1000
+BLOG_TRENDING_HALF_LIFE = 6 * 3600
+BLOG_TRENDING_INTERVAL = 300
+
+# Related posts shown on post_detail, precomputed by `manage.py compute_related_posts`.
+BLOG_RELATED_POSTS = 5
+
+# Near-duplicate detection (blog/duplicates.py): posts whose MinHash similarity is at
+# least BLOG_NEAR_DUPLICATE_THRESHOLD count as duplicates. Staff can review recent
+# ones at /moderation/duplicates/; with BLOG_NEAR_DUPLICATE_CHECK on, PostCreateView
+# also refuses them (off by default: a false positive blocks a legitimate post).
+BLOG_NEAR_DUPLICATE_THRESHOLD = 0.8
+BLOG_NEAR_DUPLICATE_CHECK = False
+BLOG_DUPLICATE_REVIEW_POSTS = 100
+
+# Search-box autocomplete (blog/autocomplete.py): suggestions per kind, and how
+# often a worker reads the changes other workers logged (blog.models.AutocompleteChange).
+BLOG_AUTOCOMPLETE_LIMIT = 8
+BLOG_AUTOCOMPLETE_CHECK_INTERVAL = 5
+
+# Search (blog/search.py): results per page, and how close (trigram similarity,
+# 0-1) a word must be to a query word to count as a typo of it.
+BLOG_SEARCH_RESULTS = 50
+BLOG_SEARCH_SIMILARITY = 0.25
+# Post bodies aren't indexed: a search that finds too few titles and tags scans the
+# content of only this many of the newest posts.
+BLOG_SEARCH_CONTENT_SCAN = 5000
+
 WSGI_APPLICATION = 'django_blog.wsgi.application'
 
 
@@ -104,11 +181,41 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Sessions are written through to the database but read from the cache, and the
+# session user is cached too (blog/backends.py), so an authenticated page view
+# normally needs no session or user query. For a fully stateless alternative use
+# 'django.contrib.sessions.backends.signed_cookies'.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTHENTICATION_BACKENDS = ['blog.backends.CachedModelBackend']
+# How often (seconds) a cached session user is checked against the database, so a
+# user deactivated with queryset.update() is logged out within this time.
+BLOG_USER_RECHECK_INTERVAL = 30
+
 LOGIN_REDIRECT_URL = 'blog:profile'
 LOGOUT_REDIRECT_URL = 'blog:login'
 LOGIN_URL = 'blog:login'
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# File-based so throttle buckets are shared by all worker processes.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / '.cache',
+    }
+}
+
+# Token-bucket rates for the write views (see blog/throttling.py).
+# Format is 'requests/period' with period one of s, m, h or d.
+BLOG_THROTTLE_RATES = {
+    'comment': '10/min',
+    'register': '5/hour',
+}
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -124,10 +231,28 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
-STATIC_URL = 'static/'
-
-# django_blog/settings.py ( these must exist)
 STATIC_URL = '/static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# collectstatic writes content-hashed copies plus .gz/.br variants (blog/storage.py).
+# Text files smaller than STATIC_PRECOMPRESS_MIN_SIZE bytes are left uncompressed.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'blog.storage.PrecompressedManifestStaticFilesStorage',
+    },
+}
+STATIC_PRECOMPRESS_MIN_SIZE = 256
+
+# Tests use the plain static storage: nothing is collected before they run.
+TEST_RUNNER = 'blog.testing.BlogTestRunner'
+
+# Serve STATIC_ROOT through blog.views.serve_static (picks the precompressed variant).
+# runserver serves static files itself while DEBUG is on; this is for app servers
+# without a fronting web server.
+SERVE_PRECOMPRESSED_STATIC = not DEBUG
 
 
 # Default primary key field type
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -108,6 +109,39 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# PASSWORD_HASHER_POLICY picks the hasher new passwords are stored with: 'scrypt' (default),
+# 'pbkdf2' or 'argon2' (needs argon2-cffi). The other hashers are kept so hashes made under
+# an earlier policy or cost still verify; Django re-encodes them on the next successful login.
+# Run `python manage.py bench_password_hashers` to see logins/second per core for each policy.
+
+PASSWORD_HASHER_POLICY = os.environ.get('PASSWORD_HASHER_POLICY', 'scrypt')
+
+PASSWORD_HASHING_COST = {
+    'PBKDF2_ITERATIONS': int(os.environ.get('PBKDF2_ITERATIONS', 1_000_000)),
+    'SCRYPT_N': int(os.environ.get('SCRYPT_N', 2 ** 14)),
+    'SCRYPT_R': int(os.environ.get('SCRYPT_R', 8)),
+    'SCRYPT_P': int(os.environ.get('SCRYPT_P', 1)),
+    'ARGON2_TIME_COST': int(os.environ.get('ARGON2_TIME_COST', 2)),
+    'ARGON2_MEMORY_COST': int(os.environ.get('ARGON2_MEMORY_COST', 19 * 1024)),
+    'ARGON2_PARALLELISM': int(os.environ.get('ARGON2_PARALLELISM', 1)),
+}
+
+_HASHERS_BY_POLICY = {
+    'pbkdf2': 'accounts.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'accounts.hashers.TunedScryptPasswordHasher',
+    'argon2': 'accounts.hashers.TunedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [_HASHERS_BY_POLICY[PASSWORD_HASHER_POLICY]] + [
+    hasher for policy, hasher in _HASHERS_BY_POLICY.items() if policy != PASSWORD_HASHER_POLICY
+] + [
+    # The rest of Django's defaults, so older pbkdf2_sha1 and bcrypt_sha256 hashes still
+    # verify (and are re-encoded). The tuned hashers already cover the other algorithms.
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -129,6 +163,34 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+# Media files (user uploads)
+
+MEDIA_URL = 'media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Stream every upload to a temporary file instead of buffering small ones in memory;
+# FileSystemStorage then moves the temp file into MEDIA_ROOT without copying it.
+FILE_UPLOAD_HANDLERS = ['django.core.files.uploadhandler.TemporaryFileUploadHandler']
+
+# Profile picture thumbnails (accounts/thumbnails.py), made by a background thread pool
+# after the upload is saved. Use {% thumbnail_url user.profile_pic 128 %} in templates.
+PROFILE_PIC_THUMBNAIL_SIZES = (64, 128, 256)
+THUMBNAIL_WEBP_QUALITY = 80
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_ASYNC = True
+# A picture whose thumbnails failed to build is not retried for this many seconds.
+THUMBNAIL_RETRY_INTERVAL = 3600
+
+# Chunked, resumable profile picture uploads (accounts/views.py). Partial files are kept
+# outside MEDIA_ROOT so they are never served.
+CHUNKED_UPLOAD_DIR = BASE_DIR / 'chunked_uploads'
+CHUNKED_UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Unfinished uploads expire after this many seconds (run `manage.py clean_chunked_uploads`
+# from cron to remove abandoned ones), and a user may have this many open at once.
+CHUNKED_UPLOAD_EXPIRY = 24 * 3600
+CHUNKED_UPLOAD_MAX_OPEN = 3
+PROFILE_PIC_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,8 +1,25 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+from django.views.decorators.cache import cache_control
+from django.views.static import serve
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('blog.urls')),       # existing blog app URLs
     path('accounts/', include('accounts.urls')),
 ]
+
+# Serve uploaded media (profile pictures and their thumbnails) during development.
+# Content-addressed files (<dir>/<2 hex>/<sha256>.<ext>) never change, so they are
+# marked immutable; production web servers should send the same header for them.
+if settings.DEBUG:
+    urlpatterns += [
+        re_path(
+            r'^%s(?P<path>.+/[0-9a-f]{2}/[0-9a-f]{64}\.\w+)$' % settings.MEDIA_URL.lstrip('/'),
+            cache_control(public=True, max_age=60 * 60 * 24 * 365, immutable=True)(serve),
+            {'document_root': settings.MEDIA_ROOT},
+        ),
+    ]
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)